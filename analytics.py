@@ -0,0 +1,331 @@
+import argparse
+import getpass
+import random
+import sqlite3
+import threading
+from collections import deque
+from pathlib import Path
+from time import perf_counter, time
+
+from typing_state import TypingState
+
+BATCH_INTERVAL = 1.0  # Seconds the writer thread collects events before committing them together
+MIN_COUNT = 20  # Keystrokes a key or bigram needs before reports rank it
+REPORT_LIMIT = 10
+WEAK_FEATURES = 16  # Weakest keys and bigrams practice picks texts for
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY, player TEXT NOT NULL, seed INTEGER NOT NULL, started REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS keystrokes (
+    session INTEGER NOT NULL, time REAL NOT NULL, building TEXT NOT NULL, expected TEXT NOT NULL,
+    typed TEXT NOT NULL, latency REAL);
+CREATE TABLE IF NOT EXISTS key_stats (
+    player TEXT NOT NULL, key TEXT NOT NULL, count INTEGER NOT NULL, errors INTEGER NOT NULL,
+    timed INTEGER NOT NULL, latency_sum REAL NOT NULL, latency_squares REAL NOT NULL, PRIMARY KEY (player, key));
+CREATE TABLE IF NOT EXISTS bigram_stats (
+    player TEXT NOT NULL, bigram TEXT NOT NULL, count INTEGER NOT NULL, errors INTEGER NOT NULL,
+    timed INTEGER NOT NULL, latency_sum REAL NOT NULL, latency_squares REAL NOT NULL, PRIMARY KEY (player, bigram));
+CREATE TABLE IF NOT EXISTS text_stats (
+    player TEXT NOT NULL, building TEXT NOT NULL, text TEXT NOT NULL, attempts INTEGER NOT NULL,
+    mistakes INTEGER NOT NULL, seconds REAL NOT NULL, PRIMARY KEY (player, building, text));
+"""
+
+# Rollups add a batch's totals onto the stored ones
+UPSERT_KEY = """
+INSERT INTO key_stats VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (player, key) DO UPDATE SET
+    count = count + excluded.count, errors = errors + excluded.errors, timed = timed + excluded.timed,
+    latency_sum = latency_sum + excluded.latency_sum, latency_squares = latency_squares + excluded.latency_squares
+"""
+UPSERT_BIGRAM = UPSERT_KEY.replace("key_stats", "bigram_stats").replace("(player, key)", "(player, bigram)")
+UPSERT_TEXT = """
+INSERT INTO text_stats VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (player, building, text) DO UPDATE SET
+    attempts = attempts + excluded.attempts, mistakes = mistakes + excluded.mistakes, seconds = seconds + excluded.seconds
+"""
+
+# Event kinds queued by SessionRecorder
+EVENT_SESSION = 0
+EVENT_KEYSTROKE = 1
+EVENT_TEXT = 2
+
+
+def connect(path: str | Path) -> sqlite3.Connection:
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode = WAL")  # Reports can read while a game is writing
+    connection.execute("PRAGMA synchronous = NORMAL")
+    return connection
+
+
+class SessionRecorder:
+    """
+    Queues the typing events of one game for an AnalyticsStore, attached to GameManager.analytics.
+    Only appends tuples, everything else happens on the store's writer thread.
+    """
+
+    def __init__(self, store: "AnalyticsStore", session: int, player: str):
+        self.store = store
+        self.session = session
+        self.player = player
+
+    def keystroke(self, typing: TypingState, char: str, building_id: str, now: float):
+        """
+        Called before char is pushed onto typing. The latency is the time since the previous keystroke of the text,
+        the first one has none as it includes reading the text.
+        """
+        position = len(typing.typed)
+        previous = typing.text[position - 1] if position else ""
+        latency = now - typing.keystroke_times[-1] if typing.keystroke_times else None
+        self.store.events.append((EVENT_KEYSTROKE, self.session, self.player, now, building_id,
+                                  typing.text[position], previous, char, latency))
+
+    def text(self, typing: TypingState, building_id: str, now: float):
+        """
+        Called once a building text has been completed.
+        """
+        self.store.events.append((EVENT_TEXT, self.player, building_id, typing.text, typing.mistakes,
+                                  now - typing.start_time))
+
+
+class AnalyticsStore:
+    """
+    SQLite store of typing statistics across sessions and players. Games queue events in memory, a background
+    thread writes them every BATCH_INTERVAL in one transaction together with the per key, bigram and text rollups,
+    so the frame loop never waits on the disk and reports never scan the raw keystrokes.
+    """
+
+    def __init__(self, path: str | Path, interval: float = BATCH_INTERVAL):
+        self.path = path
+        self.interval = interval
+        connection = connect(path)
+        with connection:
+            connection.executescript(SCHEMA)
+        connection.close()
+        self.lock = threading.Lock()
+        self.next_token = 0  # Games know their session by a token, its row id is assigned by sqlite on insert
+        self.session_ids: dict[int, int] = dict()  # Token -> sessions row id, only used by the writer
+        self.events: deque[tuple] = deque()  # Appended by games, drained by the writer
+        self.written = 0
+        self.error: sqlite3.Error | None = None
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="analytics-writer", daemon=True)
+        self.thread.start()
+
+    def session(self, player: str, seed: int) -> SessionRecorder:
+        with self.lock:
+            token, self.next_token = self.next_token, self.next_token + 1
+        self.events.append((EVENT_SESSION, token, player, seed, time()))
+        return SessionRecorder(self, token, player)
+
+    def _run(self):
+        connection = connect(self.path)
+        try:
+            while not self.closed.wait(self.interval):
+                self._write(connection)
+            self._write(connection)
+        finally:
+            connection.close()
+
+    def _write(self, connection: sqlite3.Connection):
+        """
+        Drains the queued events and commits them with their rollups, aggregated per batch first.
+        Session rows are numbered by sqlite inside the transaction, so processes sharing the file never collide.
+        Sessions of a batch which failed are queued again, the keystrokes of their later batches need the rows.
+        """
+        events = list()
+        while self.events:
+            events.append(self.events.popleft())
+        if not events:
+            return
+        sessions, keystrokes = list(), list()
+        keys, bigrams, texts = dict(), dict(), dict()
+        for event in events:
+            if event[0] == EVENT_KEYSTROKE:
+                _, token, player, now, building_id, expected, previous, typed, latency = event
+                keystrokes.append((token, now, building_id, expected, typed, latency))
+                error = typed != expected
+                add_keystroke(keys, (player, expected), error, latency)
+                if previous:
+                    add_keystroke(bigrams, (player, previous + expected), error, latency)
+            elif event[0] == EVENT_TEXT:
+                _, player, building_id, text, mistakes, seconds = event
+                totals = texts.setdefault((player, building_id, text), [0, 0, 0.0])
+                totals[0] += 1
+                totals[1] += mistakes
+                totals[2] += seconds
+            else:
+                sessions.append(event)
+        ids = self.session_ids
+        try:
+            with connection:
+                for _, token, player, seed, started in sessions:
+                    ids[token] = connection.execute("INSERT INTO sessions (player, seed, started) VALUES (?, ?, ?)",
+                                                    (player, seed, started)).lastrowid
+                connection.executemany("INSERT INTO keystrokes VALUES (?, ?, ?, ?, ?, ?)",
+                                       [(ids[token], *row) for token, *row in keystrokes])
+                connection.executemany(UPSERT_KEY, [(*key, *totals) for key, totals in keys.items()])
+                connection.executemany(UPSERT_BIGRAM, [(*key, *totals) for key, totals in bigrams.items()])
+                connection.executemany(UPSERT_TEXT, [(*key, *totals) for key, totals in texts.items()])
+            self.written += len(events)
+        except sqlite3.Error as error:
+            self.error = error
+            for event in sessions:  # Rolled back, the ids may go to another process's sessions
+                ids.pop(event[1], None)
+            self.events.extendleft(reversed(sessions))
+
+    def close(self):
+        """
+        Writes whatever is still queued and stops the thread.
+        """
+        self.closed.set()
+        self.thread.join()
+
+
+def add_keystroke(rollup: dict, key: tuple[str, str], error: bool, latency: float | None):
+    totals = rollup.get(key)
+    if totals is None:
+        totals = rollup[key] = [0, 0, 0, 0.0, 0.0]  # count, errors, timed, latency sum, latency squares
+    totals[0] += 1
+    totals[1] += error
+    if latency is not None:
+        totals[2] += 1
+        totals[3] += latency
+        totals[4] += latency * latency
+
+
+def report(path: str | Path, player: str | None = None, limit: int = REPORT_LIMIT,
+           min_count: int = MIN_COUNT) -> list[str]:
+    """
+    Slowest and most error-prone keys and bigrams and the hardest building texts, read from the rollups only.
+    All players together if player is None.
+    """
+    connection = connect(path)
+    where, arguments = ("WHERE player = ?", (player,)) if player is not None else ("", ())
+    lines = list()
+    try:
+        for table, column, label in (("key_stats", "key", "keys"), ("bigram_stats", "bigram", "bigrams")):
+            rows = connection.execute(
+                f"SELECT {column}, SUM(count), SUM(errors), SUM(timed), SUM(latency_sum), SUM(latency_squares) "
+                f"FROM {table} {where} GROUP BY {column} HAVING SUM(count) >= ?", (*arguments, min_count)).fetchall()
+            stats = list()
+            for name, count, errors, timed, latency_sum, latency_squares in rows:
+                mean = latency_sum / timed if timed else 0.0
+                deviation = max(latency_squares / timed - mean * mean, 0.0) ** 0.5 if timed else 0.0
+                stats.append((repr(name), count, errors / count, mean, deviation))
+            for title, order in (("Slowest", lambda row: row[3]), ("Most mistyped", lambda row: row[2])):
+                lines.append(f"{title} {label} (at least {min_count} keystrokes)")
+                for name, count, error_rate, mean, deviation in sorted(stats, key=order, reverse=True)[:limit]:
+                    lines.append(f"{name:>8} | {count:>9,} keystrokes | errors {error_rate:>6.1%} | "
+                                 f"latency {mean * 1000:>5.0f} ms ± {deviation * 1000:.0f}")
+                lines.append("")
+
+        rows = connection.execute(
+            f"SELECT building, text, SUM(attempts), SUM(mistakes), SUM(seconds) FROM text_stats {where} "
+            f"GROUP BY building, text ORDER BY SUM(seconds) * 12.0 / (LENGTH(text) * SUM(attempts)) DESC LIMIT ?",
+            (*arguments, limit)).fetchall()
+        lines.append("Hardest building texts")
+        for building_id, text, attempts, mistakes, seconds in rows:
+            wpm = len(text) * attempts * 12 / max(seconds, 0.001)
+            lines.append(f"{building_id:>14} | {attempts:>5} attempts | {wpm:>5.1f} WPM | "
+                         f"{mistakes / attempts:>4.1f} mistakes | {text}")
+    finally:
+        connection.close()
+    return lines
+
+
+def weakness(path: str | Path, player: str, min_count: int = MIN_COUNT, limit: int = WEAK_FEATURES) -> dict[str, float]:
+    """
+    The player's weakest keys and bigrams for practice.PracticeSelector. A feature's weight is how far its
+    error rate and mean latency, each relative to the player's average over all keys, exceed the average.
+    Empty for players without enough history.
+    """
+    connection = connect(path)
+    try:
+        totals = connection.execute("SELECT SUM(count), SUM(errors), SUM(timed), SUM(latency_sum) FROM key_stats "
+                                    "WHERE player = ?", (player,)).fetchone()
+        rows = [row for table, column in (("key_stats", "key"), ("bigram_stats", "bigram"))
+                for row in connection.execute(f"SELECT {column}, count, errors, timed, latency_sum FROM {table} "
+                                              f"WHERE player = ? AND count >= ?", (player, min_count))]
+    finally:
+        connection.close()
+    count, errors, timed, latency_sum = totals
+    if not count or not timed:
+        return dict()
+    error_rate = max(errors / count, 1 / count)
+    latency = latency_sum / timed
+    weights = dict()
+    for feature, count, errors, timed, latency_sum in rows:
+        relative_latency = latency_sum / timed / latency if timed else 1.0
+        weight = (errors / count / error_rate + relative_latency) / 2 - 1
+        if weight > 0:
+            weights[feature] = weight
+    return dict(sorted(weights.items(), key=lambda item: item[1], reverse=True)[:limit])
+
+
+def fill(path: str | Path, keystrokes: int, players: int = 3, seed: int = 0) -> float:
+    """
+    Types keystrokes random characters of random texts through a store, returns the seconds spent queueing them.
+    """
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz ,."
+    store = AnalyticsStore(path)
+    recorders = [store.session(f"player{number}", seed) for number in range(players)]
+    queued = 0.0
+    now = time()
+    while keystrokes > 0:
+        recorder = rng.choice(recorders)
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(20, 60)))
+        typing = TypingState(text, now)
+        start = perf_counter()
+        for char in text[:keystrokes]:
+            now += rng.uniform(0.08, 0.4)
+            typed = char if rng.random() > 0.05 else rng.choice(alphabet)
+            recorder.keystroke(typing, typed, "synthetic", now)
+            typing.push(typed, now)
+        if typing.full:
+            recorder.text(typing, "synthetic", now)
+        queued += perf_counter() - start
+        keystrokes -= len(text)
+    store.close()
+    if store.error is not None:
+        raise store.error
+    return queued
+
+
+def default_player() -> str:
+    """
+    Name analytics are stored under when none is given, the login name.
+    """
+    try:
+        return getpass.getuser()
+    except (KeyError, OSError):
+        return "player"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Typing statistics of Keyboard Kingdoms players.")
+    parser.add_argument("database", help="sqlite file written by main.py --analytics or server.py --analytics")
+    parser.add_argument("--player", help="only this player, everyone if omitted")
+    parser.add_argument("--limit", type=int, default=REPORT_LIMIT, help="rows per table")
+    parser.add_argument("--min-count", type=int, default=MIN_COUNT)
+    parser.add_argument("--fill", type=int, metavar="KEYSTROKES",
+                        help="first add this many synthetic keystrokes, timing the writes")
+    args = parser.parse_args()
+
+    if args.fill:
+        start = perf_counter()
+        queued = fill(args.database, args.fill)
+        wall_time = perf_counter() - start
+        print(f"Keystrokes: {args.fill:,} | Queueing: {queued / args.fill * 1e6:.2f} µs each | "
+              f"Written in {wall_time:.2f}s | {args.fill / wall_time:,.0f} per second")
+    start = perf_counter()
+    lines = report(args.database, args.player, args.limit, args.min_count)
+    if args.player is not None:
+        weights = weakness(args.database, args.player, args.min_count)
+        lines.extend(["", "Practice weights: " + (", ".join(f"{feature!r} {weight:.2f}"
+                                                             for feature, weight in weights.items()) or "none yet")])
+    print("\n".join(lines))
+    print(f"Report time: {(perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import curses
+from functools import lru_cache
+
+from colors import Color, Colors
+
+ENTER_SCREEN = "\x1b[?1049h\x1b[?25l\x1b[2J"
+LEAVE_SCREEN = "\x1b[0m\x1b[?25h\x1b[?1049l"
+
+
+@lru_cache(maxsize=None)
+def colors_by_index() -> dict[int, Color]:
+    return {member.index: member for member in vars(Colors).values() if isinstance(member, Color)}
+
+
+@lru_cache(maxsize=1024)
+def sgr(attr: int) -> str:
+    """
+    Select Graphic Rendition sequence for a curses attribute made of a color pair and flags.
+    """
+    parts = ["0"]
+    if attr & curses.A_BOLD:
+        parts.append("1")
+    if attr & curses.A_DIM:
+        parts.append("2")
+    if attr & curses.A_REVERSE:
+        parts.append("7")
+    color = colors_by_index().get((attr & curses.A_COLOR) >> 8)
+    if color is not None:
+        parts.append(str(30 + color.fg) if color.fg < 8 else f"38;5;{color.fg}")
+        parts.append(str(40 + color.bg) if color.bg < 8 else f"48;5;{color.bg}")
+    return f"\x1b[{';'.join(parts)}m"
+
+
+class AnsiScreen:
+    """
+    Window stand-in behind a session's Renderer, turning the cells it flushes into ANSI escape sequences.
+    """
+
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self.chunks: list[str] = list()
+        self.attr: int | None = None
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self.height, self.width
+
+    def bkgd(self, char: str, attr: int = 0):
+        self.chunks.append(sgr(attr))
+        self.attr = attr
+
+    def erase(self):
+        self.chunks.append("\x1b[2J")
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0):
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise curses.error("addstr() returned ERR")
+        self.chunks.append(f"\x1b[{y + 1};{x + 1}H")
+        if attr != self.attr:
+            self.chunks.append(sgr(attr))
+            self.attr = attr
+        self.chunks.append(text)
+
+    def refresh(self):
+        pass
+
+    def take(self) -> bytes:
+        """
+        Returns everything drawn since the last call, encoded for the client.
+        """
+        data = "".join(self.chunks).encode("utf-8")
+        self.chunks.clear()
+        return data
@@ -0,0 +1,273 @@
+import argparse
+import csv
+import itertools
+import os
+from dataclasses import dataclass
+from multiprocessing import Pool
+from time import perf_counter
+
+import numpy as np
+
+import battle
+import game_manager as gm
+from batch import BUILD_PRIORITY
+from buildings import Buildings
+from layout import compile_layout
+from resources import Resources
+
+DAY_PHASES = 3  # Phases with work before every night
+CHUNK_SIZE = 100_000  # Runs simulated together in one worker task
+ACCURACY_SPREAD = 20.0  # Beta concentration of per phase accuracy around the mean, higher is more consistent
+
+
+@dataclass(frozen=True)
+class Params:
+    """
+    One point of the balancing grid.
+    """
+    threat_starter: float
+    threat_modifier: float
+    days_to_survive: int
+    cost_scale: float = 1.0
+    output_scale: float = 1.0
+
+    def threat(self, day: int) -> int:
+        """
+        Same curve as GameManager.calculate_threat.
+        """
+        return int(round((day * self.threat_starter) * (self.threat_modifier ** day)))
+
+
+@dataclass
+class Economy:
+    """
+    Buildings, starting state and unlock costs of the game flattened into arrays indexed by building and resource.
+    """
+    resources: list[str]
+    building_ids: list[str]
+    costs: np.ndarray
+    outputs: np.ndarray
+    output_resource: np.ndarray
+    input_resource: np.ndarray  # -1 for buildings without input
+    input_amount: np.ndarray
+    activation_order: list[int]  # Producers first, so consumers see this phase's output
+    build_order: list[int]
+    start_amounts: np.ndarray
+    start_buildings: np.ndarray
+    start_unlocked: int
+    unlock_cumulative: np.ndarray  # Total cost of unlocking the n cheapest locked keys
+
+    @classmethod
+    def load(cls, file_path: str = gm.BUILDINGS_FILE_PATH, layout: list[str] = gm.KEYBOARD_LAYOUT) -> "Economy":
+        resources = Resources()
+        names = [resource.name for resource in resources]
+        buildings = list(Buildings(file_path, resources, 0))
+        ids = [building.id for building in buildings]
+
+        keyboard_layout = compile_layout(layout, gm.CENTER_KEYS)
+        locked_costs = sorted(cost for char, cost in zip(keyboard_layout.chars, keyboard_layout.unlock_costs)
+                              if char not in keyboard_layout.center_keys)
+        start_buildings = np.zeros(len(buildings), np.int64)
+        for building_id in ("low_food", "low_money"):  # Keyboard.starting_keys
+            start_buildings[ids.index(building_id)] += 1
+
+        return cls(
+            resources=names,
+            building_ids=ids,
+            costs=np.array([building.purchase_cost for building in buildings], np.float64),
+            outputs=np.array([building.output_amount for building in buildings], np.float64),
+            output_resource=np.array([names.index(building.output_resource.name) for building in buildings]),
+            input_resource=np.array([names.index(building.input_resource.name) if building.input_resource else -1
+                                     for building in buildings]),
+            input_amount=np.array([building.input_amount or 0 for building in buildings], np.int64),
+            activation_order=sorted(range(len(buildings)), key=lambda b: buildings[b].input_resource is not None),
+            build_order=[ids.index(building_id) for building_id in BUILD_PRIORITY if building_id in ids],
+            start_amounts=np.array([resource.amount for resource in resources], np.int64),
+            start_buildings=start_buildings,
+            start_unlocked=len(keyboard_layout.center_keys),
+            unlock_cumulative=np.concatenate(([0], np.cumsum(locked_costs))).astype(np.int64),
+        )
+
+
+def simulate(economy: Economy, params: Params, runs: int, rng: np.random.Generator, accuracy: float = 0.95,
+             spread: float = ACCURACY_SPREAD, activations: float | None = None, battles: bool = False) -> dict:
+    """
+    Plays runs games at once, every resource and building count is one array row over all runs.
+    Each day phase the player activates buildings (all of them, or a Poisson number around activations),
+    earning output scaled by a Beta distributed accuracy, then unlocks the cheapest keys with knowledge
+    and fills empty keys in BUILD_PRIORITY order like the autoplayer. Nights are resolved against the threat curve,
+    or with battles fought out by the battle engine for every game still alive, losses included.
+    """
+    money = economy.resources.index("Money")
+    military = economy.resources.index("Military")
+    knowledge = economy.resources.index("Knowledge")
+    costs = np.maximum(np.rint(economy.costs * params.cost_scale), 1).astype(np.int64)
+    outputs = economy.outputs * params.output_scale
+
+    amounts = np.repeat(economy.start_amounts[:, None], runs, axis=1)  # Resource rows, contiguous per resource
+    built = np.repeat(economy.start_buildings[:, None], runs, axis=1)
+    unlocked = np.zeros(runs, np.int64)  # Keys unlocked besides the starting ones
+    alive = np.ones(runs, bool)
+    day_reached = np.full(runs, params.days_to_survive, np.int64)
+    max_unlocks = len(economy.unlock_cumulative) - 1
+    trained_by = np.zeros((len(economy.building_ids), len(battle.DEFENDERS)))  # Military output per defender type
+    for b, building_id in enumerate(economy.building_ids):
+        if economy.output_resource[b] == military:
+            trained_by[b, battle.TRAINED_BY.get(building_id, 0)] = outputs[b]
+
+    for day in range(1, params.days_to_survive + 1):
+        for _ in range(DAY_PHASES):
+            ratio = rng.beta(accuracy * spread, (1.0 - accuracy) * spread, runs) if accuracy < 1.0 else np.ones(runs)
+            budget = rng.poisson(activations, runs) if activations is not None else None
+            for b in economy.activation_order:
+                count = built[b]
+                if budget is not None:
+                    count = np.minimum(count, budget)
+                source = economy.input_resource[b]
+                if source >= 0:
+                    count = np.minimum(count, amounts[source] // economy.input_amount[b])
+                    amounts[source] -= count * economy.input_amount[b]
+                amounts[economy.output_resource[b]] += count * np.rint(outputs[b] * ratio).astype(np.int64)
+                if budget is not None:
+                    budget -= count
+
+            spendable = economy.unlock_cumulative[unlocked] + amounts[knowledge]
+            new_unlocked = np.minimum(np.searchsorted(economy.unlock_cumulative, spendable, side="right") - 1,
+                                      max_unlocks)
+            amounts[knowledge] -= economy.unlock_cumulative[new_unlocked] - economy.unlock_cumulative[unlocked]
+            unlocked = new_unlocked
+
+            empty = economy.start_unlocked + unlocked - built.sum(axis=0)
+            for b in economy.build_order:
+                count = np.minimum(empty, amounts[money] // costs[b])
+                built[b] += count
+                amounts[money] -= count * costs[b]
+                empty -= count
+
+        threat = params.threat(day)
+        if battles:
+            fighting = np.flatnonzero(alive)
+            held, left, _ = battle.night(amounts[military, fighting], built[:, fighting].T @ trained_by,
+                                         np.full(fighting.size, threat), day, rng)
+            survived = np.zeros(runs, bool)
+            survived[fighting] = held
+            amounts[military, fighting] = battle.points(left)
+        else:
+            survived = amounts[military] >= threat
+        day_reached[alive & ~survived] = day
+        alive &= survived
+        amounts[knowledge, alive] += threat
+
+    return {
+        "runs": runs,
+        "wins": int(alive.sum()),
+        "days": int(day_reached.sum()),
+        "losses_by_day": np.bincount(day_reached[~alive], minlength=params.days_to_survive + 1)[1:].tolist(),
+    }
+
+
+def run_task(task: tuple) -> tuple[Params, dict]:
+    """
+    Simulates one chunk of a grid point, executed inside a worker process.
+    """
+    economy, params, runs, seed, accuracy, spread, activations, battles = task
+    return params, simulate(economy, params, runs, np.random.default_rng(seed), accuracy, spread, activations,
+                            battles)
+
+
+def run_grid(economy: Economy, grid: list[Params], runs: int, workers: int, accuracy: float = 0.95,
+             spread: float = ACCURACY_SPREAD, activations: float | None = None, chunk_size: int = CHUNK_SIZE,
+             seed: int = 0, battles: bool = False) -> dict[Params, dict]:
+    """
+    Splits runs per grid point into chunks across a process pool and aggregates them per point.
+    Every chunk gets its own child seed, so results don't depend on the number of workers.
+    """
+    chunks = [(params, min(chunk_size, runs - start)) for params in grid for start in range(0, runs, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    tasks = [(economy, params, count, chunk_seed, accuracy, spread, activations, battles)
+             for (params, count), chunk_seed in zip(chunks, seeds)]
+    results = {params: {"runs": 0, "wins": 0, "days": 0, "losses_by_day": [0] * params.days_to_survive}
+               for params in grid}
+    with Pool(workers) as pool:
+        for params, result in pool.imap_unordered(run_task, tasks):
+            totals = results[params]
+            for name in ("runs", "wins", "days"):
+                totals[name] += result[name]
+            totals["losses_by_day"] = [a + b for a, b in zip(totals["losses_by_day"], result["losses_by_day"])]
+    return results
+
+
+def surfaces(results: dict[Params, dict]) -> list[str]:
+    """
+    Win rate tables with threat starter as rows and threat modifier as columns,
+    one per remaining combination of days and scales. The game's current constants are starred.
+    """
+    starters = sorted({params.threat_starter for params in results})
+    modifiers = sorted({params.threat_modifier for params in results})
+    lines = list()
+    for days, cost_scale, output_scale in sorted({(p.days_to_survive, p.cost_scale, p.output_scale) for p in results}):
+        lines.append(f"Win rate | days {days} | cost x{cost_scale:g} | output x{output_scale:g}")
+        lines.append(f"{'starter/mod':>12}" + "".join(f"{modifier:>9g}" for modifier in modifiers))
+        for starter in starters:
+            cells = list()
+            for modifier in modifiers:
+                params = Params(starter, modifier, days, cost_scale, output_scale)
+                current = (starter, modifier, days, cost_scale, output_scale) == \
+                          (gm.THREAT_STARTER, gm.THREAT_MODIFIER, gm.DAYS_TO_SURVIVE, 1.0, 1.0)
+                totals = results[params]
+                cells.append(f"{totals['wins'] / totals['runs']:>8.1%}" + ("*" if current else " "))
+            lines.append(f"{starter:>12g}" + "".join(cells))
+        lines.append("")
+    return lines
+
+
+def write_csv(path: str, results: dict[Params, dict]):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["threat_starter", "threat_modifier", "days_to_survive", "cost_scale", "output_scale",
+                         "runs", "win_rate", "average_day", "losses_by_day"])
+        for params, totals in results.items():
+            writer.writerow([params.threat_starter, params.threat_modifier, params.days_to_survive,
+                             params.cost_scale, params.output_scale, totals["runs"],
+                             totals["wins"] / totals["runs"], totals["days"] / totals["runs"],
+                             " ".join(map(str, totals["losses_by_day"]))])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo win rates of Keyboard Kingdoms over a grid of "
+                                                 "threat and economy constants.")
+    parser.add_argument("--threat-starter", type=float, nargs="+", default=[gm.THREAT_STARTER])
+    parser.add_argument("--threat-modifier", type=float, nargs="+", default=[gm.THREAT_MODIFIER])
+    parser.add_argument("--days", type=int, nargs="+", default=[gm.DAYS_TO_SURVIVE])
+    parser.add_argument("--cost-scale", type=float, nargs="+", default=[1.0], help="multiplier on building costs")
+    parser.add_argument("--output-scale", type=float, nargs="+", default=[1.0],
+                        help="multiplier on building outputs")
+    parser.add_argument("--runs", type=int, default=1_000_000, help="simulated games per grid point")
+    parser.add_argument("--accuracy", type=float, default=0.95, help="mean typing accuracy")
+    parser.add_argument("--spread", type=float, default=ACCURACY_SPREAD)
+    parser.add_argument("--activations", type=float, help="mean activations per phase, every building if omitted")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", metavar="PATH", help="also write every grid point to a csv file")
+    parser.add_argument("--battles", action="store_true",
+                        help="fight nights out with the battle engine, far slower, fewer --runs are enough")
+    args = parser.parse_args()
+
+    grid = [Params(*point) for point in itertools.product(args.threat_starter, args.threat_modifier, args.days,
+                                                          args.cost_scale, args.output_scale)]
+    start = perf_counter()
+    results = run_grid(Economy.load(), grid, args.runs, args.workers, args.accuracy, args.spread, args.activations,
+                       args.chunk_size, args.seed, args.battles)
+    wall_time = perf_counter() - start
+
+    print("\n".join(surfaces(results)))
+    total_runs = sum(totals["runs"] for totals in results.values())
+    print(f"Grid points: {len(grid)} | Runs: {total_runs:,} | Workers: {args.workers} | Wall time: {wall_time:.2f}s "
+          f"| Runs per second: {total_runs / wall_time:,.0f}")
+    if args.csv:
+        write_csv(args.csv, results)
+
+
+if __name__ == "__main__":
+    main()
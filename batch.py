@@ -0,0 +1,162 @@
+import argparse
+import os
+import random
+from multiprocessing import Pool
+from time import perf_counter
+
+import game_manager as gm
+
+# Keycodes the scripted players press besides writable characters
+KEY_TAB = 9
+KEY_BACKSPACE = 263
+
+# Order in which the autoplayer tries to build, the first affordable one wins
+BUILD_PRIORITY = ["high_military", "low_military", "high_money", "medium_money", "low_money",
+                  "high_food", "low_food", "high_knowledge", "low_knowledge"]
+
+
+class AutoPlayer:
+    """
+    Scripted player deciding the next keycode from the game state.
+    Types with the given accuracy, activates every building it can, then builds, unlocks and ends the phase.
+    """
+
+    def __init__(self, rng: random.Random, accuracy: float = 0.95):
+        self.rng = rng
+        self.accuracy = accuracy
+        self.target: str = ""
+
+    def __call__(self, game: gm.GameManager) -> int:
+        if game.mode in (gm.MODE_INITIAL, gm.MODE_TYPING):
+            return self.type_text(game, game.current_text)
+        if game.mode == gm.MODE_BUILDING_SELECT:
+            return self.type_text(game, self.target)
+        return self.choose_action(game)
+
+    def type_text(self, game: gm.GameManager, text: str) -> int:
+        """
+        Types the next character of text, fixing its own mistakes with backspace.
+        """
+        typed = game.current_input if game.mode == gm.MODE_BUILDING_SELECT else game.typing.typed
+        if typed and typed[-1] != text[len(typed) - 1]:
+            return KEY_BACKSPACE
+        char = text[len(typed)]
+        if game.mode == gm.MODE_TYPING and self.rng.random() > self.accuracy:
+            char = "~" if char != "~" else "#"
+        return ord(char)
+
+    def choose_action(self, game: gm.GameManager) -> int:
+        """
+        Picks a key to activate, build on or unlock, otherwise moves on to the next phase.
+        """
+        if game.phases.is_night():
+            return KEY_TAB
+        resources = game.resources
+        keyboard = game.keyboard
+        for key in keyboard.active_buildings():
+            building = key.building
+            if building.input_resource is None or building.input_resource.amount >= building.input_amount:
+                return ord(key.char)
+        empty_key = next(keyboard.empty_keys(), None)
+        if empty_key is not None:
+            for building_id in BUILD_PRIORITY:
+                building = game.buildings.find_building_by_id(building_id)
+                if building.purchase_cost <= resources.money.amount:
+                    self.target = building.name.lower()
+                    return ord(empty_key.char)
+        cheapest = min(keyboard.locked_keys(), key=lambda k: k.unlock_cost, default=None)
+        if cheapest is not None and cheapest.unlock_cost <= resources.knowledge.amount:
+            return ord(cheapest.char)
+        return KEY_TAB
+
+
+POLICIES = {
+    "autoplay": AutoPlayer,
+}
+
+
+def run_session(seed: int, policy: str = "autoplay", accuracy: float = 0.95, max_keys: int = 100_000,
+                battles: bool = False) -> dict:
+    """
+    Plays a single scripted game with no terminal and returns its summary.
+    """
+    game = gm.GameManager(gm.KEYBOARD_LAYOUT, seed)
+    if battles:
+        from battle import BattleEngine
+        game.battle = BattleEngine()
+    player = POLICIES[policy](random.Random(seed), accuracy)
+    keys = 0
+    while game.mode != gm.MODE_GAME_OVER and keys < max_keys:
+        game.key_logic(player(game))
+        keys += 1
+    return {
+        "seed": seed,
+        "won": game.mode == gm.MODE_GAME_OVER and game.battle_report is not None
+               and game.battle_report[0] == "VICTORY!",
+        "day": game.phases.day,
+        "keys": keys,
+        "resources": {resource.name: resource.amount for resource in game.resources},
+    }
+
+
+def run_shard(shard: tuple[int, int, str, float, int, bool]) -> dict:
+    """
+    Runs count sessions starting at seed and aggregates them, executed inside a worker process.
+    """
+    first_seed, count, policy, accuracy, max_keys, battles = shard
+    totals = {"games": 0, "wins": 0, "days": 0, "keys": 0, "cpu_time": 0.0}
+    start = perf_counter()
+    for seed in range(first_seed, first_seed + count):
+        summary = run_session(seed, policy, accuracy, max_keys, battles)
+        totals["games"] += 1
+        totals["wins"] += summary["won"]
+        totals["days"] += summary["day"]
+        totals["keys"] += summary["keys"]
+    totals["cpu_time"] = perf_counter() - start
+    return totals
+
+
+def run_batch(games: int, workers: int, policy: str = "autoplay", accuracy: float = 0.95,
+              max_keys: int = 100_000, shard_size: int = 50, seed: int = 0, battles: bool = False) -> dict:
+    """
+    Shards games across a process pool and returns the aggregated results with throughput.
+    """
+    shards = [(seed + start, min(shard_size, games - start), policy, accuracy, max_keys, battles)
+              for start in range(0, games, shard_size)]
+    totals = {"games": 0, "wins": 0, "days": 0, "keys": 0, "cpu_time": 0.0}
+    start = perf_counter()
+    with Pool(workers) as pool:
+        for result in pool.imap_unordered(run_shard, shards):
+            for name in totals:
+                totals[name] += result[name]
+    totals["wall_time"] = perf_counter() - start
+    totals["workers"] = workers
+    totals["games_per_second"] = totals["games"] / totals["wall_time"]
+    totals["games_per_second_per_core"] = totals["games"] / max(totals["cpu_time"], 1e-9)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run scripted Keyboard Kingdoms games without a terminal.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--policy", choices=POLICIES, default="autoplay")
+    parser.add_argument("--accuracy", type=float, default=0.95)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    parser.add_argument("--shard-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--battles", action="store_true", help="fight nights out with the battle engine")
+    args = parser.parse_args()
+
+    totals = run_batch(args.games, args.workers, args.policy, args.accuracy, args.max_keys, args.shard_size,
+                       args.seed, args.battles)
+    print(f"Games: {totals['games']} | Wins: {totals['wins']} ({totals['wins'] / max(totals['games'], 1):.2%})")
+    print(f"Average day reached: {totals['days'] / max(totals['games'], 1):.2f} | "
+          f"Keys per game: {totals['keys'] / max(totals['games'], 1):.0f}")
+    print(f"Workers: {totals['workers']} | Wall time: {totals['wall_time']:.2f}s")
+    print(f"Games per second: {totals['games_per_second']:.1f} | "
+          f"per core: {totals['games_per_second_per_core']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import argparse
+from dataclasses import dataclass
+from time import perf_counter
+
+import numpy as np
+
+UNITS_PER_POINT = 10  # Units fielded per point of military, and raiders per point of threat
+ROUNDS = 12  # Rounds of fire before the raiders left retreat at dawn
+WAVES = 3  # Raider waves per night
+WAVE_GAP = 2  # Rounds between two waves
+BRUTES_PER_DAY = 0.08  # Share of the raiders which are brutes, added every day after the first
+MAX_BRUTES = 0.4
+MAX_UNITS = 1 << 21  # Units of both sides fought in one slice of battles, bounds the memory of bulk runs
+
+
+@dataclass(frozen=True)
+class UnitType:
+    """
+    Stats of one kind of unit, accuracy being the chance a shot hits.
+    """
+    name: str
+    health: float
+    attack: float
+    accuracy: float
+
+
+DEFENDERS = [UnitType("Militia", 10.0, 3.0, 0.6), UnitType("Soldiers", 12.0, 4.0, 0.7)]
+TRAINED_BY = {"low_military": 0, "high_military": 1}  # Military buildings not listed train militia
+RAIDERS = [UnitType("Raiders", 12.0, 4.0, 0.6), UnitType("Brutes", 18.0, 5.0, 0.55)]
+
+
+class Army:
+    """
+    One side of many battles at once, a unit per array element grouped by battle.
+    """
+
+    def __init__(self, counts: np.ndarray, units: list[UnitType]):
+        self.battles, kinds = counts.shape
+        self.max_health = np.array([unit.health for unit in units], np.float32)
+        self.attack = np.array([unit.attack for unit in units], np.float32)
+        self.accuracy = np.array([unit.accuracy for unit in units], np.float32)
+        cells = np.arange(counts.size)
+        self.battle = np.repeat(cells // kinds, counts.ravel())
+        self.kind = np.repeat(cells % kinds, counts.ravel()).astype(np.int8)
+        self.health = self.max_health[self.kind]
+
+    def counts(self) -> np.ndarray:
+        return np.bincount(self.battle, minlength=self.battles)
+
+    def join(self, other: "Army"):
+        """
+        Adds the units of another army of the same battles, keeping them grouped by battle.
+        """
+        battle = np.concatenate((self.battle, other.battle))
+        order = np.argsort(battle, kind="stable")
+        self.battle = battle[order]
+        self.kind = np.concatenate((self.kind, other.kind))[order]
+        self.health = np.concatenate((self.health, other.health))[order]
+
+    def volley(self, enemy: "Army", enemy_counts: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        Damage every enemy unit takes this round. Each unit fires once at a random enemy of its battle.
+        """
+        hit = rng.random(self.kind.size, np.float32) < self.accuracy[self.kind]
+        battle = self.battle[hit]
+        kind = self.kind[hit]
+        targets = enemy_counts[battle]
+        engaged = targets > 0
+        battle, kind, targets = battle[engaged], kind[engaged], targets[engaged]
+        first = np.cumsum(enemy_counts) - enemy_counts
+        chosen = first[battle] + (rng.random(battle.size) * targets).astype(np.int64)
+        return np.bincount(chosen, weights=self.attack[kind], minlength=enemy.kind.size)
+
+    def take(self, damage: np.ndarray):
+        health = self.health - damage
+        alive = health > 0
+        self.battle, self.kind, self.health = self.battle[alive], self.kind[alive], health[alive].astype(np.float32)
+
+
+def waves(raiders: np.ndarray) -> list[np.ndarray]:
+    """
+    Splits raider counts into WAVES parts of near equal size.
+    """
+    return [raiders * (wave + 1) // WAVES - raiders * wave // WAVES for wave in range(WAVES)]
+
+
+def _fight(defenders: np.ndarray, raiders: np.ndarray, rng: np.random.Generator,
+           rounds: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    home = Army(defenders, DEFENDERS)
+    arriving = [Army(part, RAIDERS) for part in waves(raiders)]
+    raid = arriving.pop(0)
+    fought = np.zeros(len(defenders), np.int64)
+    for number in range(rounds):
+        if arriving and number and number % WAVE_GAP == 0:
+            raid.join(arriving.pop(0))
+        home_counts, raid_counts = home.counts(), raid.counts()
+        engaged = (home_counts > 0) & (raid_counts > 0)
+        if not engaged.any() and not (arriving and (home_counts > 0).any()):
+            break
+        fought += engaged
+        to_raid = home.volley(raid, raid_counts, rng)
+        to_home = raid.volley(home, home_counts, rng)
+        raid.take(to_raid)
+        home.take(to_home)
+    waiting = sum((army.counts() for army in arriving), np.zeros(len(defenders), np.int64))
+    return home.counts(), raid.counts() + waiting, fought
+
+
+def fight(defenders: np.ndarray, raiders: np.ndarray, rng: np.random.Generator,
+          rounds: int = ROUNDS) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Fights battles at once, defenders and raiders being unit counts with a row per battle and a column per
+    unit type of DEFENDERS and RAIDERS. Every round both sides fire at the same time, raiders arrive in WAVES.
+    Returns per battle the defenders and raiders left standing and the rounds both sides fought.
+    Battles are fought in slices of at most MAX_UNITS units.
+    """
+    sizes = np.cumsum(defenders.sum(axis=1) + raiders.sum(axis=1))
+    results = list()
+    start = 0
+    while start < len(defenders):
+        end = max(int(np.searchsorted(sizes, (sizes[start - 1] if start else 0) + MAX_UNITS, side="right")),
+                  start + 1)
+        results.append(_fight(defenders[start:end], raiders[start:end], rng, rounds))
+        start = end
+    if not results:
+        empty = np.zeros(0, np.int64)
+        return empty, empty, empty
+    return tuple(np.concatenate(parts) for parts in zip(*results))
+
+
+def muster(military: np.ndarray, trained: np.ndarray, units_per_point: int = UNITS_PER_POINT) -> np.ndarray:
+    """
+    Defender counts per battle and unit type, military split by the military output of the buildings
+    training each type. Without military buildings every unit is militia.
+    """
+    total = military.astype(np.int64) * units_per_point
+    weight = trained.sum(axis=1)
+    shares = np.divide(trained, weight[:, None], out=np.zeros(trained.shape), where=weight[:, None] > 0)
+    counts = np.floor(total[:, None] * shares).astype(np.int64)
+    counts[:, 0] += total - counts.sum(axis=1)
+    return counts
+
+
+def raid(threat: np.ndarray, day: int, units_per_point: int = UNITS_PER_POINT) -> np.ndarray:
+    """
+    Raider counts per battle and unit type for the night of day, more of them brutes every day.
+    """
+    total = threat.astype(np.int64) * units_per_point
+    brutes = np.rint(total * min(BRUTES_PER_DAY * (day - 1), MAX_BRUTES)).astype(np.int64)
+    return np.stack((total - brutes, brutes), axis=1)
+
+
+def night(military: np.ndarray, trained: np.ndarray, threat: np.ndarray, day: int, rng: np.random.Generator,
+          units_per_point: int = UNITS_PER_POINT, rounds: int = ROUNDS) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Nights of many games at once. Returns per game whether the city held, the defenders left and the rounds fought.
+    """
+    home, _, fought = fight(muster(military, trained, units_per_point), raid(threat, day, units_per_point),
+                            rng, rounds)
+    return home > 0, home, fought
+
+
+def points(units: np.ndarray, units_per_point: int = UNITS_PER_POINT) -> np.ndarray:
+    """
+    Military left by surviving defenders, a squad counting as long as one of it stands.
+    """
+    return -(-units // units_per_point)
+
+
+class BattleEngine:
+    """
+    Resolves a game's nights unit by unit in place of comparing military with the threat.
+    Every night is seeded from the game seed and the day, so replays and restored snapshots fight it the same.
+    """
+
+    def __init__(self, units_per_point: int = UNITS_PER_POINT, rounds: int = ROUNDS):
+        self.units_per_point = units_per_point
+        self.rounds = rounds
+
+    def trained(self, game) -> np.ndarray:
+        """
+        Military output of the game's buildings per defender type.
+        """
+        trained = np.zeros((1, len(DEFENDERS)))
+        for key in game.keyboard.keys:
+            building = key.building
+            if building is not None and building.output_resource is game.resources.military:
+                trained[0, TRAINED_BY.get(building.id, 0)] += building.output_amount
+        return trained
+
+    def resolve(self, game) -> tuple[bool, str]:
+        """
+        Fights the night, leaves the game with the surviving military and returns whether the city held
+        with a line for the battle report.
+        """
+        military = game.resources.military
+        rng = np.random.default_rng([game.seed, game.phases.day])
+        held, left, fought = night(np.array([military.amount]), self.trained(game), np.array([game.threat]),
+                                   game.phases.day, rng, self.units_per_point, self.rounds)
+        defenders = military.amount * self.units_per_point
+        military.amount = int(points(left, self.units_per_point)[0])
+        return bool(held[0]), (f"{game.threat * self.units_per_point} raiders in {WAVES} waves, {int(fought[0])} "
+                               f"rounds, {defenders - int(left[0])} of {defenders} defenders fell.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fight many nights at once and report how often the city holds.")
+    parser.add_argument("--military", type=int, nargs="+", default=[20, 40, 60], help="military points defending")
+    parser.add_argument("--threat", type=int, default=40)
+    parser.add_argument("--day", type=int, default=3)
+    parser.add_argument("--soldiers", type=float, default=0.5, help="share of the military trained in barracks")
+    parser.add_argument("--battles", type=int, default=10_000)
+    parser.add_argument("--units-per-point", type=int, default=UNITS_PER_POINT)
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    trained = np.tile([1.0 - args.soldiers, args.soldiers], (args.battles, 1))
+    threat = np.full(args.battles, args.threat)
+    print(f"Threat {args.threat} on day {args.day} | {args.battles:,} battles per row")
+    for military in args.military:
+        start = perf_counter()
+        held, left, fought = night(np.full(args.battles, military), trained, threat, args.day, rng,
+                                   args.units_per_point, args.rounds)
+        elapsed = perf_counter() - start
+        left = points(left, args.units_per_point)
+        print(f"Military {military:>6} | held {held.mean():>7.1%} | military left {left.mean():>9.1f} "
+              f"| rounds {fought.mean():>5.1f} | {elapsed / args.battles * 1e3:.3f} ms per battle")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import argparse
+import curses
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import game_manager as gm
+import main as ui
+from buildings import Buildings
+from corpus import compile_corpus
+from renderer import Renderer
+from resources import Resources
+
+SIZES = ((24, 80), (50, 160), (80, 240))  # Terminal rows x columns
+CORPUS_SIZES = ((9, 100), (100, 1_000), (1_000, 1_000))  # Buildings x texts per building
+DRAW_MODES = {  # Benchmark name: mode the game has to be in
+    "initial": gm.MODE_INITIAL,
+    "idle": gm.MODE_IDLE,
+    "typing": gm.MODE_TYPING,
+    "building_select": gm.MODE_BUILDING_SELECT,
+    "night": gm.MODE_IDLE,
+}
+KEY_BACKSPACE = 263
+THRESHOLD = 0.15  # Relative slowdown against the baseline reported as a regression
+
+
+class StubScreen:
+    """
+    Stand-in for a curses window which only checks bounds and counts calls, so draws can be timed without a terminal.
+    """
+
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self.calls = 0
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self.height, self.width
+
+    def erase(self):
+        self.calls += 1
+
+    def bkgd(self, char, attr=0):
+        self.calls += 1
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0):
+        self.calls += 1
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise curses.error("addstr() returned ERR")
+
+    def addch(self, y: int, x: int, char, attr: int = 0):
+        self.calls += 1
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise curses.error("addch() returned ERR")
+
+    def refresh(self):
+        self.calls += 1
+
+
+def new_game(seed: int = 0) -> gm.GameManager:
+    return gm.GameManager(gm.KEYBOARD_LAYOUT, seed)
+
+
+def press(game: gm.GameManager, keys: str | list[int]):
+    for key in keys:
+        game.key_logic(ord(key) if isinstance(key, str) else key)
+
+
+def game_in(mode: str) -> gm.GameManager:
+    """
+    Returns a fresh game driven through key_logic into the given benchmark mode.
+    """
+    game = new_game()
+    if mode == "initial":
+        return game
+    press(game, gm.CONFIRM_MESSAGE)
+    if mode == "typing":
+        press(game, "f")  # Starting Hut
+    elif mode == "building_select":
+        press(game, "gh")  # Empty starting key, menu filtered by a letter
+    elif mode == "night":
+        game.resources.military.amount = 10_000  # Enough to win the first battle and stay in the game
+        while not game.phases.is_night():
+            press(game, [9])
+    if game.mode != DRAW_MODES[mode]:
+        raise RuntimeError(f"could not reach {mode}, game is in {game.mode}")
+    return game
+
+
+def measure(func, number: int, repeat: int) -> dict:
+    """
+    Runs func number times per round and returns per call statistics in microseconds.
+    """
+    rounds = list()
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((perf_counter() - start) / number * 1e6)
+    return {"median_us": statistics.median(rounds), "min_us": min(rounds), "number": number, "repeat": repeat}
+
+
+def bench_draw(sizes, number: int, repeat: int) -> dict:
+    """
+    Full frame draws per mode and terminal size, straight into a stub screen and through the Renderer diff.
+    """
+    results = dict()
+    for mode in DRAW_MODES:
+        game = game_in(mode)
+        for height, width in sizes:
+            stub = StubScreen(height, width)
+            results[f"draw.{mode}.{height}x{width}"] = measure(lambda: ui.draw(stub, game), number, repeat)
+            renderer = Renderer(StubScreen(height, width))
+            results[f"draw_renderer.{mode}.{height}x{width}"] = measure(lambda: ui.draw(renderer, game),
+                                                                        number, repeat)
+            keyboard_stub = StubScreen(height, width)
+            results[f"draw_keyboard.{mode}.{height}x{width}"] = measure(
+                lambda: ui.draw_keyboard(keyboard_stub, game, height, width), number, repeat)
+    return results
+
+
+def bench_keys(number: int, repeat: int) -> dict:
+    """
+    key_logic throughput per mode. Every round types a key and takes it back, so the game stays in its mode.
+    """
+    results = dict()
+    for mode in DRAW_MODES:
+        game = game_in(mode)
+        if mode in ("initial", "typing"):
+            keys = [ord(game.current_text[0] if game.current_text else gm.CONFIRM_MESSAGE[0]), KEY_BACKSPACE]
+        elif mode == "building_select":
+            keys = [ord("z"), KEY_BACKSPACE]
+        else:  # Locked key in daylight, the city sleeps at night
+            keys = [ord("q"), ord("q")]
+
+        def round_trip():
+            game.key_logic(keys[0])
+            game.key_logic(keys[1])
+
+        stats = measure(round_trip, number, repeat)
+        results[f"keys.{mode}"] = {**stats, "median_us": stats["median_us"] / 2, "min_us": stats["min_us"] / 2}
+    return results
+
+
+def synthetic_corpus(directory: Path, buildings: int, texts: int, seed: int = 0) -> Path:
+    """
+    Writes a buildings json asset with the real buildings padded out to the given counts.
+    """
+    rng = random.Random(seed)
+    with Path(gm.BUILDINGS_FILE_PATH).open(encoding="utf-8") as f:
+        real = json.load(f)["buildings"]
+    pool = [text for building in real for text in building["texts"]]
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    entries = list()
+    for i in range(buildings):
+        entry = dict(real[i % len(real)])
+        if i >= len(real):
+            entry["id"] = f"synthetic_{i}"
+            entry["name"] = "".join(rng.choice(letters) for _ in range(rng.randint(4, 10))).capitalize()
+            entry["purchase_cost"] = rng.randrange(25, 500, 25)
+        entry["texts"] = [rng.choice(pool) for _ in range(texts)]
+        entries.append(entry)
+    path = directory / f"buildings_{buildings}x{texts}.json"
+    with path.open("w", encoding="utf-8") as f:
+        json.dump({"buildings": entries}, f)
+    return path
+
+
+def bench_load(corpus_sizes, repeat: int) -> dict:
+    """
+    Cold asset load from the json and from the compiled corpus at several corpus sizes.
+    """
+    results = dict()
+    with tempfile.TemporaryDirectory() as directory:
+        for buildings, texts in corpus_sizes:
+            json_path = synthetic_corpus(Path(directory), buildings, texts)
+            name = f"{buildings}x{texts}"
+            results[f"load.json.{name}"] = measure(lambda: Buildings(json_path, Resources(), 0), 1, repeat)
+            compile_corpus(json_path)
+            results[f"load.corpus.{name}"] = measure(lambda: Buildings(json_path, Resources(), 0).corpus.close(),
+                                                     1, repeat)
+    return results
+
+
+def bench_startup(repeat: int) -> dict:
+    """
+    Imports of main.py in a fresh interpreter, the critical path to the intro screen, and the asset load
+    Startup runs behind the intro.
+    """
+    rounds = list()
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", "import main; print(main.IMPORTED - main.STARTED)"],
+                                capture_output=True, text=True, check=True).stdout
+        rounds.append(float(output) * 1e6)
+    results = {"startup.imports": {"median_us": statistics.median(rounds), "min_us": min(rounds), "number": 1,
+                                   "repeat": repeat}}
+    results["startup.assets"] = measure(lambda: gm.GameManager(gm.KEYBOARD_LAYOUT, 0, load=False).load_assets(),
+                                        1, repeat)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Prints every benchmark against the baseline and returns the names which got slower than threshold.
+    """
+    regressions = list()
+    print(f"{'benchmark':<44} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, stats in results.items():
+        if name not in baseline:
+            print(f"{name:<44} {'-':>12} {stats['median_us']:>10.1f}us {'new':>8}")
+            continue
+        before = baseline[name]["median_us"]
+        change = stats["median_us"] / max(before, 1e-9) - 1.0
+        flag = " !" if change > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<44} {before:>10.1f}us {stats['median_us']:>10.1f}us {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark drawing, key handling, asset loading and startup.")
+    parser.add_argument("--only", choices=("draw", "keys", "load", "startup"), action="append",
+                        help="run only these groups, can be repeated")
+    parser.add_argument("--quick", action="store_true", help="smallest terminal and corpus only, fewer rounds")
+    parser.add_argument("--number", type=int, default=200, help="calls per round for draws and keys")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results as json to this file")
+    parser.add_argument("--baseline", help="json results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    groups = args.only or ["draw", "keys", "load", "startup"]
+    sizes = SIZES[:1] if args.quick else SIZES
+    corpus_sizes = CORPUS_SIZES[:1] if args.quick else CORPUS_SIZES
+    number = args.number // 10 if args.quick else args.number
+    repeat = 3 if args.quick else args.repeat
+
+    results = dict()
+    if "draw" in groups:
+        results.update(bench_draw(sizes, number, repeat))
+    if "keys" in groups:
+        results.update(bench_keys(number * 10, repeat))
+    if "load" in groups:
+        results.update(bench_load(corpus_sizes, repeat))
+    if "startup" in groups:
+        results.update(bench_startup(repeat))
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmarks regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+    elif not args.output:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+import threading
+from time import time
+
+import curses
+
+from ansi import ENTER_SCREEN, LEAVE_SCREEN, AnsiScreen, sgr
+from renderer import WIDE_TAIL, Pad
+
+KEYFRAME_INTERVAL = 5.0  # Seconds between full screens sent to every viewer, recordings can start playing from any
+VIEWER_HIGH_WATER = 64 * 1024  # Bytes queued for a viewer above which it skips frames until it has drained
+TITLE = "Keyboard Kingdoms"
+
+
+def event(offset: float, kind: str, data: str) -> bytes:
+    """
+    One asciicast v2 event line, data already json encoded so viewers share the encoding.
+    """
+    return f"[{offset:.6f}, \"{kind}\", {data}]\n".encode("utf-8")
+
+
+class FrameTap:
+    """
+    Window stand-in between a Renderer and the real window. Every call is forwarded, the cells a frame changed
+    are collected and handed to a Broadcaster on refresh. The Renderer already flushes only changed cells,
+    so this costs the player a list append per run and one hand-off per frame, however many viewers watch.
+    """
+
+    def __init__(self, screen, broadcaster: "Broadcaster"):
+        self.screen = screen
+        self.broadcaster = broadcaster
+        self.ops: list[tuple] = list()  # (y, x, text, attr), or (None, height, width, blank) for an erase
+        self.blank: tuple[str, int] = (" ", 0)
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self.screen.getmaxyx()
+
+    def bkgd(self, char: str, attr: int = 0):
+        self.screen.bkgd(char, attr)
+        self.blank = (char, attr)
+
+    def erase(self):
+        self.screen.erase()
+        self.ops.append((None, *self.screen.getmaxyx(), self.blank))
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0):
+        self.ops.append((y, x, text, attr))
+        self.screen.addstr(y, x, text, attr)
+
+    def refresh(self):
+        self.screen.refresh()
+        if self.ops:
+            ops, self.ops = self.ops, list()
+            self.broadcaster.publish(time(), ops)
+
+
+class Viewer:
+    """
+    One connected viewer, event times are relative to when it joined.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter, joined: float):
+        self.writer = writer
+        self.joined = joined
+        self.behind = False
+        self.skipped = 0
+
+    @property
+    def backlog(self) -> int:
+        return self.writer.transport.get_write_buffer_size()
+
+    def send(self, now: float, kind: str, data: str):
+        self.writer.write(event(now - self.joined, kind, data))
+
+
+class Broadcaster:
+    """
+    Streams one player's screen as asciicast v2 to any number of viewers on a local Unix socket.
+    Runs its own asyncio loop on a background thread: frames from the FrameTap are applied to a shadow grid
+    and encoded once as an ANSI delta, only the socket writes are per viewer. A joining viewer, and every viewer
+    each KEYFRAME_INTERVAL, gets a keyframe redrawing the whole screen. A viewer whose queue passes
+    VIEWER_HIGH_WATER skips frames, and once its queue has drained gets a keyframe of the latest screen.
+    """
+
+    def __init__(self, path: str, keyframe_interval: float = KEYFRAME_INTERVAL):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.shadow = Pad(0, 0)
+        self.encoder = AnsiScreen(0, 0)
+        self.viewers: set[Viewer] = set()
+        self.frames = 0
+        self.keyframes = 0
+        self.last_keyframe = 0.0
+        self.cached_keyframe: tuple[int, str] | None = None  # Frame number, json encoded keyframe
+        self.loop = asyncio.new_event_loop()
+        self.server: asyncio.AbstractServer | None = None
+        self.error: OSError | None = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="broadcaster", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            if os.path.exists(self.path):  # Left behind by a broadcast that didn't shut down
+                os.unlink(self.path)
+            self.server = self.loop.run_until_complete(asyncio.start_unix_server(self._serve, self.path))
+        except OSError as error:
+            self.error = error
+            self.ready.set()
+            return
+        self.ready.set()
+        self.loop.run_forever()
+        self.server.close()
+        for viewer in self.viewers:  # Ends their _serve once the connection is lost
+            viewer.writer.close()
+        self.loop.run_until_complete(asyncio.gather(*asyncio.all_tasks(self.loop), return_exceptions=True))
+        self.loop.close()
+
+    def publish(self, now: float, ops: list[tuple]):
+        """
+        Hands a frame over from the player's thread.
+        """
+        self.loop.call_soon_threadsafe(self._frame, now, ops)
+
+    def _apply(self, ops: list[tuple]) -> str:
+        """
+        Applies a frame to the shadow grid and returns it as ANSI for viewers already showing the previous one.
+        """
+        encoder = self.encoder
+        encoder.attr = None  # Every delta sets its colors, viewers resuming from a keyframe may have other ones
+        for op in ops:
+            if op[0] is None:
+                _, height, width, blank = op
+                if (height, width) != (self.shadow.height, self.shadow.width):
+                    self.shadow = Pad(height, width, blank)
+                    encoder.height, encoder.width = height, width
+                self.shadow.blank = blank
+                self.shadow.back = [[blank] * width for _ in range(height)]
+                encoder.bkgd(*blank)
+                encoder.erase()
+                continue
+            y, x, text, attr = op
+            try:
+                encoder.addstr(y, x, text, attr)
+                self.shadow.addstr(y, x, text, attr)
+            except curses.error:
+                pass  # Outside the window, or its last cell which is written all the same
+        return encoder.take().decode("utf-8")
+
+    def keyframe(self) -> str:
+        """
+        The whole current screen as ANSI, json encoded, built at most once per frame.
+        """
+        if self.cached_keyframe is None or self.cached_keyframe[0] != self.frames:
+            shadow = self.shadow
+            chunks = [sgr(shadow.blank[1]), "\x1b[2J"]
+            for y, row in enumerate(shadow.back):
+                x = 0
+                while x < shadow.width:
+                    if row[x] == shadow.blank or row[x][0] == WIDE_TAIL:
+                        x += 1
+                        continue
+                    start, attr = x, row[x][1]
+                    chars = list()
+                    while x < shadow.width and row[x][1] == attr and row[x] != shadow.blank:
+                        chars.append(row[x][0])
+                        x += 1
+                    chunks.append(f"\x1b[{y + 1};{start + 1}H{sgr(attr)}{''.join(chars)}")
+            self.cached_keyframe = (self.frames, json.dumps("".join(chunks)))
+            self.keyframes += 1
+        return self.cached_keyframe[1]
+
+    def _frame(self, now: float, ops: list[tuple]):
+        size = (self.shadow.height, self.shadow.width)
+        delta = json.dumps(self._apply(ops))
+        self.frames += 1
+        resized = (self.shadow.height, self.shadow.width) != size
+        if now - self.last_keyframe >= self.keyframe_interval:
+            self.last_keyframe = now
+            delta = self.keyframe()
+        for viewer in self.viewers:
+            if viewer.behind:
+                viewer.skipped += 1
+                continue
+            if resized:
+                viewer.send(now, "r", self.size())
+            viewer.send(now, "o", delta)
+            if viewer.backlog > VIEWER_HIGH_WATER:
+                viewer.behind = True
+                self.loop.create_task(self._catch_up(viewer))
+
+    async def _catch_up(self, viewer: Viewer):
+        """
+        Waits for a viewer's queue to drain, then brings it to the latest screen.
+        """
+        try:
+            await viewer.writer.drain()
+        except ConnectionError:
+            return
+        viewer.behind = False
+        now = time()
+        viewer.send(now, "r", self.size())
+        viewer.send(now, "o", self.keyframe())
+
+    def size(self) -> str:
+        return json.dumps(f"{self.shadow.width}x{self.shadow.height}")
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        now = time()
+        viewer = Viewer(writer, now)
+        writer.transport.set_write_buffer_limits(high=VIEWER_HIGH_WATER)  # drain() returns once below a quarter
+        header = {"version": 2, "width": self.shadow.width, "height": self.shadow.height, "timestamp": int(now),
+                  "title": TITLE, "env": {"TERM": "xterm-256color"}}
+        writer.write((json.dumps(header) + "\n").encode("utf-8"))
+        viewer.send(now, "o", self.keyframe())
+        self.viewers.add(viewer)
+        try:
+            while await reader.read(4096):  # Viewers only listen, this waits for them to leave
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.viewers.discard(viewer)
+            writer.close()
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+async def receive(path: str, out, raw: bool):
+    """
+    Copies a broadcast to out, the asciicast lines if raw, otherwise the terminal output they carry.
+    """
+    reader, writer = await asyncio.open_unix_connection(path, limit=1 << 24)
+    try:
+        header = await reader.readline()
+        if raw:
+            out.write(header)
+        while line := await reader.readline():
+            if raw:
+                out.write(line)
+                continue
+            _, kind, data = json.loads(line)
+            if kind == "o":
+                out.write(data.encode("utf-8"))
+                out.flush()
+    finally:
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch or record a game broadcast by main.py --broadcast.")
+    parser.add_argument("socket", help="Unix socket the game broadcasts on")
+    parser.add_argument("--record", metavar="PATH", help="write the asciicast to PATH instead, gzipped if it ends "
+                                                         "with .gz")
+    args = parser.parse_args()
+
+    try:
+        if args.record:
+            opener = gzip.open if args.record.endswith(".gz") else open
+            with opener(args.record, "wb") as out:
+                asyncio.run(receive(args.socket, out, raw=True))
+        else:
+            sys.stdout.write(ENTER_SCREEN)
+            sys.stdout.flush()
+            try:
+                asyncio.run(receive(args.socket, sys.stdout.buffer, raw=False))
+            finally:
+                sys.stdout.write(LEAVE_SCREEN)
+    except (KeyboardInterrupt, ConnectionError):
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
 import random
-from dataclasses import dataclass
+from collections.abc import Sequence
+from dataclasses import dataclass, field
 from pathlib import Path
 import json
 
-from resources import Resources, Resource
+from catalog import BuildingCatalog
+from corpus import Corpus, compiled_path
+from resources import MONEY_SYMBOL, Resources, Resource
+from sampler import TextSampler
+
+
+TEXT_REPEAT_WINDOW = 50  # A building never hands out the same text twice within this many activations
 
 
 @dataclass
@@ -19,50 +26,193 @@ class BuildingType:
     output_amount: int
     input_resource: Resource | None
     input_amount: int | None
-    texts: list[str]
+    texts: Sequence[str]
+    sampler: TextSampler | None = field(default=None, repr=False, compare=False)
 
     def __repr__(self):
         output_str = f"+{self.output_amount}{self.output_resource.symbol}"
         input_str = f"-{self.input_amount}{self.input_resource.symbol}" if self.input_resource else "-"
-        return f"{self.name:<10} {self.symbol:<4} {str(self.purchase_cost) + Resources.get_instance().money.symbol:<5} {output_str:<15} {input_str:<10}"
+        return f"{self.name:<10} {self.symbol:<4} {str(self.purchase_cost) + MONEY_SYMBOL:<5} {output_str:<15} {input_str:<10}"
 
     def get_text(self) -> str:
         """
-        Gets a random text from self.texts. Shouldn't give repeat texts.
+        Gets a random text from self.texts. Never runs out and doesn't repeat within the sampler's window.
         """
-        return next(self.texts)
+        return self.texts[self.sampler.draw()]
+
+
+class BuildingsError(Exception):
+    """
+    Raised when a buildings json asset doesn't describe a valid set of buildings.
+    """
+
+
+FIELDS = {  # Field of a building entry: accepted types
+    "id": (str,),
+    "name": (str,),
+    "symbol": (str,),
+    "purchase_cost": (int,),
+    "output_resource": (str,),
+    "output_amount": (int,),
+    "input_resource": (str, type(None)),
+    "input_amount": (int, type(None)),
+    "texts": (list,),
+}
+
+
+def read_records(file_path) -> list[dict]:
+    """
+    Parses and validates a buildings json asset, returning its entries untouched.
+    Everything a game would trip over later is checked here, so a broken edit never reaches a running game.
+    """
+    try:
+        with Path(file_path).open(encoding="utf-8") as f:
+            records = json.load(f)["buildings"]
+    except (OSError, ValueError, KeyError, TypeError) as error:
+        raise BuildingsError(f"can't read {file_path}: {error}") from error
+    if not isinstance(records, list) or not records:
+        raise BuildingsError("'buildings' has to be a non-empty list")
+    resource_names = {resource.name.lower() for resource in Resources()}
+    ids = set()
+    for position, record in enumerate(records):
+        where = f"building {record.get('id', position) if isinstance(record, dict) else position}"
+        if not isinstance(record, dict) or set(record) != set(FIELDS):
+            raise BuildingsError(f"{where} needs exactly the fields {', '.join(FIELDS)}")
+        for name, types in FIELDS.items():
+            if not isinstance(record[name], types) or isinstance(record[name], bool):
+                raise BuildingsError(f"{where}: '{name}' has the wrong type")
+        if record["id"] in ids:
+            raise BuildingsError(f"{where} is defined twice")
+        ids.add(record["id"])
+        if not record["name"].strip():
+            raise BuildingsError(f"{where} has an empty name")
+        for name in ("output_resource", "input_resource"):
+            if record[name] is not None and record[name].lower() not in resource_names:
+                raise BuildingsError(f"{where}: unknown resource '{record[name]}'")
+        if (record["input_resource"] is None) != (record["input_amount"] is None):
+            raise BuildingsError(f"{where} needs both or neither of input_resource and input_amount")
+        if record["purchase_cost"] < 0 or record["output_amount"] < 0 or (record["input_amount"] or 0) < 0:
+            raise BuildingsError(f"{where} has a negative amount")
+        if not record["texts"] or not all(isinstance(text, str) and text for text in record["texts"]):
+            raise BuildingsError(f"{where} needs a non-empty list of non-empty texts")
+    return records
+
+
+def bind(record: dict, resources: Resources) -> dict:
+    """
+    Fields of a BuildingType for an asset entry, resource names resolved to the given game's resources.
+    """
+    fields = dict(record)
+    fields["output_resource"] = resources.find_resource_by_name(record["output_resource"])
+    if record["input_resource"] is not None:
+        fields["input_resource"] = resources.find_resource_by_name(record["input_resource"])
+    return fields
+
+
+def shared_catalog(records: list[dict]) -> BuildingCatalog:
+    """
+    Build menu index of an asset's buildings bound to resources of no game. Games only take ids, names and costs
+    from their catalog, so one built here can be handed to every game loading the same records.
+    """
+    resources = Resources()
+    return BuildingCatalog(BuildingType(**bind(record, resources)) for record in records)
 
 
 @dataclass(init=False)
 class Buildings:
     """
-    A set of buildings imported from a json asset.
+    A set of buildings imported from a json asset, producing and consuming the given game's resources.
+    Records already read by read_records and their shared_catalog can be passed instead of reading the file,
+    so games loaded together share the parse, the text lists and the build menu index.
     """
 
-    def __init__(self, file_path):
-        with Path(file_path).open(encoding="utf-8") as f:
-            data = json.load(f)
-            resources = Resources.get_instance()
-            self.buildings = dict()
-            for building in data["buildings"]:
-                building["output_resource"] = resources.find_resource_by_name(building["output_resource"])
-                if building["input_resource"] is not None:
-                    building["input_resource"] = resources.find_resource_by_name(building["input_resource"])
-                building_type = BuildingType(**building)
-                random.shuffle(building_type.texts)
-                building_type.texts = iter(building_type.texts)
-                self.buildings[building_type.id] = building_type
+    def __init__(self, file_path, resources: Resources, seed: int | None = None,
+                 repeat_window: int = TEXT_REPEAT_WINDOW, records: list[dict] | None = None,
+                 catalog: BuildingCatalog | None = None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.resources = resources
+        self.repeat_window = repeat_window
+        self.version = 0  # Reload applied last, see update
+        self.practice = None  # practice.PracticeSelector choosing texts for a player's weaknesses
+        self.charset = None  # charset.CharsetIndex restricting texts to unlocked keys, takes precedence over practice
+        self.corpus = None
+        corpus_path = compiled_path(file_path) if records is None else None
+        if corpus_path is not None:  # Memory-mapped, texts are decoded only when handed out
+            self.corpus = Corpus(corpus_path)
+            records = list(self.corpus.records())
+        elif records is None:
+            with Path(file_path).open(encoding="utf-8") as f:
+                records = json.load(f)["buildings"]
+        self.records = {record["id"]: record for record in records}  # As last bound, see update
+        self.buildings = dict()
+        for building in records:
+            building_type = BuildingType(**bind(building, resources))
+            building_type.sampler = TextSampler(len(building_type.texts), repeat_window, self.rng)
+            self.buildings[building_type.id] = building_type
+        self.index = catalog if catalog is not None else BuildingCatalog(self)
+
+    def update(self, records: list[dict], version: int,
+               catalog: BuildingCatalog | None = None) -> tuple[list[str], list[str], list[str]]:
+        """
+        Applies a reloaded asset. Buildings which stay keep their BuildingType object, so keys holding one
+        see the new numbers, and their sampler as long as the number of texts is the same.
+        Removed buildings stay on the keys they are built on but can't be built anymore.
+        The shared_catalog of the records can be passed in place of building this game its own, and records
+        carried over unchanged from the last update by hot_reload.diff are skipped without binding them again.
+        Returns the added ids, the ids whose numbers, names or resources changed and the removed ids.
+        """
+        added, changed = list(), list()
+        buildings = dict()
+        for record in records:
+            building = self.buildings.get(record["id"])
+            if building is not None and self.records.get(record["id"]) is record:
+                buildings[building.id] = building
+                continue
+            fields = bind(record, self.resources)
+            if building is None:
+                building = BuildingType(**fields)
+                building.sampler = TextSampler(len(building.texts), self.repeat_window, self.rng)
+                added.append(building.id)
+            else:
+                if len(building.texts) != len(fields["texts"]):
+                    building.sampler = TextSampler(len(fields["texts"]), self.repeat_window, self.rng)
+                if any(getattr(building, name) != value for name, value in fields.items() if name != "texts"):
+                    changed.append(building.id)
+                for name, value in fields.items():
+                    setattr(building, name, value)
+            buildings[building.id] = building
+        removed = [building_id for building_id in self.buildings if building_id not in buildings]
+        if catalog is not None:
+            index = catalog
+        else:
+            index = BuildingCatalog(buildings.values()) if added or changed or removed else self.index  # Texts only
+        self.buildings, self.index, self.version = buildings, index, version
+        self.records = {record["id"]: record for record in records}
+        return added, changed, removed
 
     def __iter__(self):
         return iter(self.buildings.values())
 
+    def get_text(self, building: BuildingType, unlocked: int | None = None) -> str:
+        """
+        Next text to type for an activation of building, unlocked being the bitmask of keys the player can use.
+        """
+        if self.charset is not None and unlocked is not None:
+            return self.charset.get_text(building, unlocked)
+        return self.practice.get_text(building) if self.practice is not None else building.get_text()
+
     def find_building_by_name(self, building_name: str) -> BuildingType:
         """
         Returns the first building found with the exact name given
         """
-        for building in self:
-            if building.name.lower() == building_name.lower():
-                return building
+        return self.resolve(self.index.exact(building_name))
+
+    def resolve(self, building: BuildingType | None) -> BuildingType | None:
+        """
+        This game's building for one found in the catalog, which may be shared with other games.
+        """
+        return self.buildings.get(building.id) if building is not None else None
 
     def find_building_by_id(self, building_id: str) -> BuildingType:
         """
@@ -0,0 +1,181 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Iterable
+
+BUILD_PAGE_SIZE = 10
+FUZZY_DISTANCE = 1  # Typos allowed when suggesting buildings for a query with no prefix match
+
+
+class TrieNode:
+    """
+    Single node of the building name trie. Keeps every building below it ordered by purchase cost.
+    """
+    __slots__ = ("children", "building", "subtree", "costs")
+
+    def __init__(self):
+        self.children: dict[str, TrieNode] = dict()
+        self.building = None
+        self.subtree: list = list()
+        self.costs: list[int] = list()
+
+
+@dataclass
+class CatalogRow:
+    """
+    Single row of the build menu.
+    """
+    building: object
+    text: str
+    affordable: bool
+    distance: int  # 0 for names starting with the query, otherwise the edit distance of the typo
+
+
+class CatalogCursor:
+    """
+    Walks the trie one typed letter at a time, backspace steps back up.
+    """
+
+    def __init__(self, root: TrieNode):
+        self.path: list[TrieNode | None] = [root]
+
+    def push(self, char: str):
+        node = self.path[-1]
+        self.path.append(node.children.get(char.lower()) if node is not None else None)
+
+    def pop(self):
+        if len(self.path) > 1:
+            self.path.pop()
+
+    @property
+    def node(self) -> TrieNode | None:
+        return self.path[-1]
+
+    @property
+    def match(self):
+        """
+        Returns the building whose whole name has been typed or None.
+        """
+        return self.node.building if self.node is not None else None
+
+
+class BuildingCatalog:
+    """
+    Index over the buildings for the build menu: a prefix trie on lowercase names,
+    typo tolerant prefix matching and ordering by purchase cost, so affordability is a bisect on current money.
+    """
+
+    def __init__(self, buildings: Iterable):
+        self.root = TrieNode()
+        self.rows: dict[str, str] = dict()
+        self.positions: dict[str, int] = dict()  # Insertion order, breaks ties of cost the same way on every page
+        self._views: dict[tuple[str, int, int, int], list[CatalogRow]] = dict()
+        for building in buildings:
+            self.insert(building)
+        self._sort(self.root)
+
+    def insert(self, building):
+        node = self.root
+        node.subtree.append(building)
+        for char in building.name.lower():
+            node = node.children.setdefault(char, TrieNode())
+            node.subtree.append(building)
+        if node.building is None:  # Keeps the first building with a duplicate name like find_building_by_name did
+            node.building = building
+        self.rows[building.id] = str(building)
+        self.positions.setdefault(building.id, len(self.positions))
+
+    def _sort(self, root: TrieNode):
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            node.subtree.sort(key=lambda b: b.purchase_cost)
+            node.costs = [b.purchase_cost for b in node.subtree]
+            stack.extend(node.children.values())
+
+    def cursor(self) -> CatalogCursor:
+        return CatalogCursor(self.root)
+
+    def find(self, prefix: str) -> TrieNode | None:
+        node = self.root
+        for char in prefix.lower():
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def exact(self, name: str):
+        """
+        Returns the building with exactly this name (case insensitive) or None.
+        """
+        node = self.find(name)
+        return node.building if node is not None else None
+
+    def fuzzy(self, query: str, max_distance: int, limit: int, typos_only: bool = False) -> list[tuple[int, object]]:
+        """
+        Returns up to limit (distance, building) pairs whose name starts with something within
+        max_distance edits (insertions, deletions, substitutions and swaps) of query, closest first.
+        typos_only leaves out the names starting with query itself, so they don't count against the limit.
+        """
+        query = query.lower()
+        found: dict[str, tuple[int, int, int, object]] = dict()
+        root_row = list(range(len(query) + 1))
+        # Entries are (node, char leading to it, parent row, grandparent row, parent char)
+        stack = [(child, char, root_row, None, "") for char, child in self.root.children.items()]
+        while stack:
+            node, char, parent_row, grandparent_row, parent_char = stack.pop()
+            row = [parent_row[0] + 1]
+            for i in range(1, len(query) + 1):
+                value = min(row[i - 1] + 1, parent_row[i] + 1, parent_row[i - 1] + (query[i - 1] != char))
+                if grandparent_row and i > 1 and query[i - 1] == parent_char and query[i - 2] == char:
+                    value = min(value, grandparent_row[i - 2] + 1)  # Swapped letters
+                row.append(value)
+            distance = row[-1]
+            if distance <= max_distance and (distance or not typos_only):
+                taken = 0  # Everything below this node matches, the cheapest ones are enough
+                for building in node.subtree:
+                    if taken == limit:
+                        break
+                    if typos_only and building.name.lower().startswith(query):
+                        continue
+                    if building.id not in found or found[building.id][0] > distance:
+                        found[building.id] = (distance, building.purchase_cost, self.positions[building.id], building)
+                    taken += 1
+            if distance and min(row) <= max_distance:  # A longer prefix could still be a closer match
+                stack.extend((child, next_char, row, parent_row, char) for next_char, child in node.children.items())
+        ranked = sorted(found.values(), key=lambda entry: entry[:3])
+        return [(distance, building) for distance, _, _, building in ranked[:limit]]
+
+    def view(self, query: str, money: int, page: int = 0, page_size: int = BUILD_PAGE_SIZE) -> list[CatalogRow]:
+        """
+        Returns a page of the build menu for the typed query:
+        names starting with the query ordered by cost (affordable ones first), then close typos.
+        Pages are memoized, so redrawing the same menu every frame costs a dict lookup.
+        """
+        view_key = (query, money, page, page_size)
+        rows = self._views.get(view_key)
+        if rows is None:
+            if len(self._views) >= 64:
+                self._views.clear()
+            rows = self._views[view_key] = self._view(query, money, page, page_size)
+        return rows
+
+    def _view(self, query: str, money: int, page: int, page_size: int) -> list[CatalogRow]:
+        node = self.find(query)
+        matches = node.subtree if node is not None else list()
+        start = page * page_size
+        rows = [CatalogRow(building, self.rows[building.id], building.purchase_cost <= money, 0)
+                for building in matches[start:start + page_size]]
+        if query and len(rows) < page_size:  # Typos continue the pages after the last name starting with query
+            offset = max(start - len(matches), 0)
+            typos = self.fuzzy(query, FUZZY_DISTANCE, offset + page_size - len(rows), typos_only=True)
+            rows.extend(CatalogRow(building, self.rows[building.id], building.purchase_cost <= money, distance)
+                        for distance, building in typos[offset:])
+        return rows
+
+    def affordable_count(self, query: str, money: int) -> int:
+        """
+        Number of buildings starting with query that money can buy right now.
+        """
+        node = self.find(query)
+        return bisect_right(node.costs, money) if node is not None else 0
+
@@ -0,0 +1,183 @@
+import random
+import threading
+from collections.abc import Container, Iterable, Sequence
+
+from buildings import BuildingType
+from layout import CompiledLayout
+
+RETRIES = 4  # Draws from the eligible texts before a recently handed out one is accepted
+
+
+def text_mask(text: str, layout: CompiledLayout) -> int:
+    """
+    Bitmask of the keys a text needs, bit i being key i of the layout like the Keyboard bitsets.
+    Letters are matched case insensitively, characters not on the layout (space, shifted symbols) need no key.
+    """
+    mask = 0
+    for char in set(text):
+        index = layout.find(char)
+        if index is not None:
+            mask |= 1 << index
+    return mask
+
+
+class TextGroups:
+    """
+    Texts of one building grouped by the keys they need, with the groups needing each key.
+    Never changed once built, so one is shared by every game handing out the same texts.
+    """
+
+    def __init__(self, texts: Sequence[str], layout: CompiledLayout):
+        self.texts = texts
+        groups: dict[int, list[int]] = dict()
+        for index, text in enumerate(texts):
+            groups.setdefault(text_mask(text, layout), list()).append(index)
+        self.masks = list(groups)
+        self.members = list(groups.values())
+        self.by_key: list[list[int]] = [list() for _ in layout.chars]  # Key index -> groups needing it
+        for group, mask in enumerate(self.masks):
+            while mask:
+                lowest = mask & -mask
+                self.by_key[lowest.bit_length() - 1].append(group)
+                mask ^= lowest
+
+
+class CharsetPool:
+    """
+    One game's state over the TextGroups of a building, with the texts typeable so far kept in a list.
+    Each group counts its keys still locked and sits in the bucket for that count, every key lists the groups
+    needing it. An unlock only moves the groups of that key down one bucket, a group reaching bucket zero joins
+    the eligible list. Over a game every group moves once per key it needs, a query is a random pick.
+    """
+
+    def __init__(self, groups: TextGroups):
+        self.groups = groups
+        self.texts = groups.texts
+        self.unlocked = -1  # Mask the buckets were built for, none yet
+        self.missing: list[int] = list()  # Group -> keys still locked
+        self.buckets: list[list[int]] = list()  # Keys still locked -> groups
+        self.slots: list[int] = list()  # Group -> position in its bucket
+        self.eligible: list[int] = list()
+
+    def _reset(self):
+        self.missing = [mask.bit_count() for mask in self.groups.masks]
+        self.buckets = [list() for _ in range(len(self.groups.by_key) + 1)]
+        self.slots = list()
+        for group, missing in enumerate(self.missing):
+            self.slots.append(len(self.buckets[missing]))
+            self.buckets[missing].append(group)
+        self.eligible = [index for group in self.buckets[0] for index in self.groups.members[group]]
+        self.unlocked = 0
+
+    def _unlock(self, group: int):
+        """
+        Moves a group down one bucket, swapping the last group of its bucket into its place.
+        """
+        bucket = self.buckets[self.missing[group]]
+        last = bucket.pop()
+        if last != group:
+            bucket[self.slots[group]] = last
+            self.slots[last] = self.slots[group]
+        self.missing[group] -= 1
+        bucket = self.buckets[self.missing[group]]
+        self.slots[group] = len(bucket)
+        bucket.append(group)
+        if not self.missing[group]:
+            self.eligible.extend(self.groups.members[group])
+
+    def update(self, unlocked: int):
+        """
+        Brings the buckets up to date with the unlocked keys. Unlocks are applied incrementally,
+        a mask losing keys (another game's state restored) starts over.
+        """
+        if unlocked == self.unlocked:
+            return
+        if self.unlocked < 0 or self.unlocked & ~unlocked:
+            self._reset()
+        new = unlocked & ~self.unlocked
+        while new:
+            lowest = new & -new
+            for group in self.groups.by_key[lowest.bit_length() - 1]:
+                self._unlock(group)
+            new ^= lowest
+        self.unlocked = unlocked
+
+    def draw(self, unlocked: int, rng: random.Random, recent: Container[int] = ()) -> int:
+        """
+        Index of a text typeable with the unlocked keys. Until there is one, a text of the groups
+        missing the fewest keys, so the mode still leans towards what the player can type.
+        Indexes in recent are drawn again, up to RETRIES draws.
+        """
+        self.update(unlocked)
+        closest = next(bucket for bucket in self.buckets if bucket) if not self.eligible else None
+        for _ in range(RETRIES):
+            if closest is None:
+                index = self.eligible[rng.randrange(len(self.eligible))]
+            else:
+                members = self.groups.members[closest[rng.randrange(len(closest))]]
+                index = members[rng.randrange(len(members))]
+            if index not in recent:
+                break
+        return index
+
+
+class CharsetLibrary:
+    """
+    TextGroups of every building, built once and shared by the games of a process.
+    Groups of buildings given up front are built right away, those of a building added or whose texts a reload
+    replaced on a background thread the first time it is asked for. Until then the old groups are kept serving.
+    """
+
+    def __init__(self, layout: CompiledLayout, buildings: Iterable[BuildingType] = ()):
+        self.layout = layout
+        self.groups: dict[str, TextGroups] = {building.id: TextGroups(building.texts, layout)
+                                              for building in buildings}
+        self.indexing: set[str] = set()  # Building ids with groups being built
+
+    def get(self, building: BuildingType) -> TextGroups | None:
+        """
+        The building's groups, stale ones while new groups are being built, None while it has none yet.
+        """
+        groups = self.groups.get(building.id)
+        if (groups is None or groups.texts is not building.texts) and building.id not in self.indexing:
+            self.indexing.add(building.id)
+            threading.Thread(target=self._build, args=(building.id, building.texts),
+                             name=f"charset-groups-{building.id}", daemon=True).start()
+        return groups
+
+    def _build(self, building_id: str, texts: Sequence[str]):
+        self.groups[building_id] = TextGroups(texts, self.layout)
+        self.indexing.discard(building_id)
+
+
+class CharsetIndex:
+    """
+    Optional mode of Buildings only handing out texts whose keys are all unlocked, or the closest ones while
+    no text of a building is typeable yet. Keeps a game's pools over the groups of a shared CharsetLibrary,
+    a building the library has no groups for yet hands out its texts from its sampler. Picks skip the texts the
+    building's sampler handed out recently and are taken from it, so both share one no-repeat window.
+    """
+
+    def __init__(self, library: CharsetLibrary, rng: random.Random):
+        self.library = library
+        self.rng = rng
+        self.pools: dict[str, CharsetPool] = dict()
+
+    def pool(self, building: BuildingType) -> CharsetPool | None:
+        groups = self.library.get(building)
+        if groups is None:
+            return None
+        pool = self.pools.get(building.id)
+        if pool is None or pool.groups is not groups:
+            pool = self.pools[building.id] = CharsetPool(groups)
+        return pool
+
+    def get_text(self, building: BuildingType, unlocked: int) -> str:
+        pool = self.pool(building)
+        if pool is None:
+            return building.get_text()
+        if pool.texts is not building.texts:  # Stale groups, their indexes are not the sampler's
+            return pool.texts[pool.draw(unlocked, self.rng)]
+        index = pool.draw(unlocked, self.rng, building.sampler.recent)
+        building.sampler.take(index)
+        return pool.texts[index]
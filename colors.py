@@ -1,4 +1,12 @@
-import curses
+# Same values as COLOR_*, kept here so the game rules never need to import curses
+COLOR_BLACK = 0
+COLOR_RED = 1
+COLOR_GREEN = 2
+COLOR_YELLOW = 3
+COLOR_BLUE = 4
+COLOR_MAGENTA = 5
+COLOR_CYAN = 6
+COLOR_WHITE = 7
 
 
 class Color:
@@ -12,41 +20,45 @@ class Color:
         self.fg = foreground
         self.bg = background
         self.index = Color._auto_index
+        self._pair = self.index << 8  # Matches curses.color_pair until the terminal is initialized
         Color._auto_index += 1
 
     def init_pair(self):
         """
         Initializes the color pair in the curses library.
         """
+        import curses
+
         curses.init_pair(self.index, self.fg, self.bg)
+        self._pair = curses.color_pair(self.index)
 
     @property
     def pair(self) -> int:
         """
         Returns the curses color pair attribute.
         """
-        return curses.color_pair(self.index)
+        return self._pair
 
 
 class Colors:
     """
     Container for all color constants.
     """
-    TEXT = Color(curses.COLOR_WHITE, curses.COLOR_BLACK)
-    ACTIVE_KEY = Color(curses.COLOR_BLACK, curses.COLOR_GREEN)
-    GREY_KEY = Color(curses.COLOR_BLACK, curses.COLOR_WHITE)
-    LOCKED_KEY = Color(curses.COLOR_WHITE, curses.COLOR_RED)
-    SUCCESS = Color(curses.COLOR_GREEN, curses.COLOR_BLACK)
-    WARNING = Color(curses.COLOR_YELLOW, curses.COLOR_BLACK)
-    ERROR = Color(curses.COLOR_RED, curses.COLOR_BLACK)
+    TEXT = Color(COLOR_WHITE, COLOR_BLACK)
+    ACTIVE_KEY = Color(COLOR_BLACK, COLOR_GREEN)
+    GREY_KEY = Color(COLOR_BLACK, COLOR_WHITE)
+    LOCKED_KEY = Color(COLOR_WHITE, COLOR_RED)
+    SUCCESS = Color(COLOR_GREEN, COLOR_BLACK)
+    WARNING = Color(COLOR_YELLOW, COLOR_BLACK)
+    ERROR = Color(COLOR_RED, COLOR_BLACK)
 
     # Phase border colors
-    MORNING = Color(curses.COLOR_CYAN, curses.COLOR_BLACK)
-    NOON = Color(curses.COLOR_YELLOW, curses.COLOR_BLACK)
-    EVENING = Color(curses.COLOR_MAGENTA, curses.COLOR_BLACK)
-    NIGHT = Color(curses.COLOR_BLUE, curses.COLOR_BLACK)
+    MORNING = Color(COLOR_CYAN, COLOR_BLACK)
+    NOON = Color(COLOR_YELLOW, COLOR_BLACK)
+    EVENING = Color(COLOR_MAGENTA, COLOR_BLACK)
+    NIGHT = Color(COLOR_BLUE, COLOR_BLACK)
 
-    SHADOW = Color(curses.COLOR_BLACK, 237)
+    SHADOW = Color(COLOR_BLACK, 237)
 
     @staticmethod
     def init():
@@ -54,6 +66,8 @@ class Colors:
         Initializes all color pairs defined in this class.
         Call this after curses.initscr().
         """
+        import curses
+
         # Iterate over class attributes to find ColorDef instances
         for member in vars(Colors).values():
             if isinstance(member, Color):
@@ -0,0 +1,155 @@
+import argparse
+import json
+import mmap
+import struct
+from collections.abc import Sequence
+from pathlib import Path
+
+# File layout: header | building records | string offset table | UTF-8 blob
+MAGIC = b"KKC1"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")  # magic, version, reserved, building count, string count
+RECORD = struct.Struct("<IIIiIiIiII")  # id, name, symbol, purchase cost, output resource, output amount,
+#                                        input resource, input amount, first text, text count
+OFFSET = struct.Struct("<Q")
+NO_STRING = 0xFFFFFFFF
+CORPUS_SUFFIX = ".kkc"
+
+
+class CorpusError(Exception):
+    """
+    Raised when a compiled corpus file is not one this version can read.
+    """
+
+
+def compile_corpus(json_path: str | Path, out_path: str | Path | None = None) -> Path:
+    """
+    Compiles a buildings json asset into the indexed binary corpus format and returns its path.
+    """
+    json_path = Path(json_path)
+    out_path = Path(out_path) if out_path is not None else json_path.with_suffix(CORPUS_SUFFIX)
+    with json_path.open(encoding="utf-8") as f:
+        data = json.load(f)
+
+    strings: list[bytes] = list()
+
+    def add(string: str | None) -> int:
+        if string is None:
+            return NO_STRING
+        strings.append(string.encode("utf-8"))
+        return len(strings) - 1
+
+    records = list()
+    for building in data["buildings"]:
+        fields = (add(building["id"]), add(building["name"]), add(building["symbol"]), building["purchase_cost"],
+                  add(building["output_resource"]), building["output_amount"], add(building["input_resource"]),
+                  building["input_amount"] if building["input_amount"] is not None else -1)
+        first_text = len(strings)
+        for text in building["texts"]:
+            add(text)
+        records.append(RECORD.pack(*fields, first_text, len(building["texts"])))
+
+    tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(records), len(strings)))
+        f.writelines(records)
+        offset = 0
+        for string in strings:
+            f.write(OFFSET.pack(offset))
+            offset += len(string)
+        f.write(OFFSET.pack(offset))
+        f.writelines(strings)
+    tmp_path.replace(out_path)
+    return out_path
+
+
+def compiled_path(json_path: str | Path) -> Path | None:
+    """
+    Returns the compiled corpus next to json_path if there is one at least as new as the json.
+    """
+    json_path = Path(json_path)
+    path = json_path.with_suffix(CORPUS_SUFFIX)
+    if path.exists() and (not json_path.exists() or path.stat().st_mtime >= json_path.stat().st_mtime):
+        return path
+    return None
+
+
+class TextPool(Sequence):
+    """
+    Texts of a single building inside a corpus, decoded only when accessed.
+    """
+
+    def __init__(self, corpus: "Corpus", first: int, count: int):
+        self.corpus = corpus
+        self.first = first
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> str:
+        if not -self.count <= index < self.count:
+            raise IndexError("text index out of range")
+        return self.corpus.string(self.first + index % self.count)
+
+
+class Corpus:
+    """
+    Memory-mapped compiled corpus, nothing is parsed or decoded until asked for.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.building_count, self.string_count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise CorpusError(f"{self.path} is not a version {VERSION} corpus")
+        self.offsets_start = HEADER.size + self.building_count * RECORD.size
+        self.blob_start = self.offsets_start + (self.string_count + 1) * OFFSET.size
+
+    def string(self, index: int) -> str | None:
+        """
+        Decodes a single string from the blob.
+        """
+        if index == NO_STRING:
+            return None
+        start, end = struct.unpack_from("<QQ", self.data, self.offsets_start + index * OFFSET.size)
+        return self.data[self.blob_start + start:self.blob_start + end].decode("utf-8")
+
+    def records(self):
+        """
+        Yields every building as a dict shaped like an entry of the json asset, with its texts as a TextPool.
+        """
+        for i in range(self.building_count):
+            (id_, name, symbol, purchase_cost, output_resource, output_amount, input_resource, input_amount,
+             first_text, text_count) = RECORD.unpack_from(self.data, HEADER.size + i * RECORD.size)
+            yield {
+                "id": self.string(id_),
+                "name": self.string(name),
+                "symbol": self.string(symbol),
+                "purchase_cost": purchase_cost,
+                "output_resource": self.string(output_resource),
+                "output_amount": output_amount,
+                "input_resource": self.string(input_resource),
+                "input_amount": input_amount if input_amount >= 0 else None,
+                "texts": TextPool(self, first_text, text_count),
+            }
+
+    def close(self):
+        self.data.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a buildings json asset into a binary corpus.")
+    parser.add_argument("json_path", nargs="?", default="assets/buildings.json")
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+    path = compile_corpus(args.json_path, args.output)
+    corpus = Corpus(path)
+    print(f"Compiled {corpus.building_count} buildings and {corpus.string_count} strings into {path}")
+    corpus.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,6 @@ class Phase:  # Here mostly just for future additions (could go with a simpler s
     color: int
 
 
-@dataclass
 class Phases:
     """
     Class holding phase information along with the number of days.
@@ -19,8 +18,10 @@ class Phases:
         Phase("Evening", Colors.EVENING),
         Phase("Night", Colors.NIGHT)
     ]
-    current_phase = phases[0]
-    day = 1
+
+    def __init__(self):
+        self.current_phase: Phase = self.phases[0]
+        self.day: int = 1
 
     def next_phase(self):
         """
@@ -0,0 +1,154 @@
+import selectors
+from time import monotonic
+from typing import Callable
+
+import game_manager as gm
+
+# Frames per second the loop is allowed to wake up at without any input or timer, per mode
+FRAME_RATES: dict[str, float] = {
+    gm.MODE_TYPING: 60.0,
+    gm.MODE_BUILDING_SELECT: 30.0,
+    gm.MODE_INITIAL: 10.0,
+    gm.MODE_IDLE: 1.0,
+    gm.MODE_GAME_OVER: 1.0,
+}
+
+
+class Timer:
+    """
+    Single scheduled callback inside the TimerWheel.
+    """
+    __slots__ = ("deadline", "tick", "callback", "cancelled")
+
+    def __init__(self, deadline: float, tick: int, callback: Callable[[], None]):
+        self.deadline = deadline
+        self.tick = tick
+        self.callback = callback
+        self.cancelled = False
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel, timers are bucketed by the tick they expire on.
+    Named timers replace their previous schedule, so re-arming a deadline is O(1).
+    """
+
+    def __init__(self, resolution: float = 0.01, slots: int = 256):
+        self.resolution = resolution
+        self.slots: list[list[Timer]] = [list() for _ in range(slots)]
+        self.named: dict[str, Timer] = dict()
+        self.current_tick: int = int(monotonic() / resolution)
+        self.count: int = 0
+
+    def call_later(self, name: str, delay: float, callback: Callable[[], None]):
+        """
+        Schedules callback to run after delay seconds, replacing a pending timer with the same name.
+        """
+        self.cancel(name)
+        deadline = monotonic() + delay
+        tick = max(int(deadline / self.resolution), self.current_tick)
+        timer = Timer(deadline, tick, callback)
+        self.slots[tick % len(self.slots)].append(timer)
+        self.named[name] = timer
+        self.count += 1
+
+    def cancel(self, name: str):
+        """
+        Cancels the named timer if it's pending.
+        """
+        timer = self.named.pop(name, None)
+        if timer is not None and not timer.cancelled:
+            timer.cancelled = True
+            self.count -= 1
+
+    def next_deadline(self) -> float | None:
+        """
+        Returns the monotonic time of the earliest pending timer or None when nothing is scheduled.
+        """
+        if not self.count:
+            return None
+        for offset in range(len(self.slots)):
+            tick = self.current_tick + offset
+            due = [timer.deadline for timer in self.slots[tick % len(self.slots)]
+                   if timer.tick == tick and not timer.cancelled]
+            if due:
+                return min(due)
+        return min(timer.deadline for slot in self.slots for timer in slot if not timer.cancelled)
+
+    def advance(self, now: float) -> int:
+        """
+        Runs every timer due by now and returns how many fired.
+        """
+        fired = 0
+        target_tick = int(now / self.resolution)
+        while self.current_tick <= target_tick:
+            slot = self.slots[self.current_tick % len(self.slots)]
+            if slot:
+                pending = list()
+                for timer in slot:
+                    if timer.cancelled:
+                        continue
+                    if timer.tick <= self.current_tick and timer.deadline <= now:
+                        timer.cancelled = True
+                        self.count -= 1
+                        timer.callback()
+                        fired += 1
+                    else:
+                        pending.append(timer)
+                slot[:] = pending
+            if self.current_tick == target_tick or not self.count:
+                break
+            self.current_tick += 1
+        self.current_tick = target_tick
+        for name in [name for name, timer in self.named.items() if timer.cancelled]:
+            del self.named[name]
+        return fired
+
+
+class FrameGovernor:
+    """
+    Decides how long the loop may sleep, full rate while typing and close to nothing while idle.
+    """
+
+    def __init__(self, frame_rates: dict[str, float] | None = None):
+        self.frame_rates = frame_rates if frame_rates is not None else FRAME_RATES
+
+    def timeout(self, mode: str, next_deadline: float | None) -> float:
+        """
+        Returns the seconds to block for input given the mode and the next timer deadline.
+        """
+        timeout = 1.0 / self.frame_rates.get(mode, 1.0)
+        if next_deadline is not None:
+            timeout = min(timeout, max(next_deadline - monotonic(), 0.0))
+        return timeout
+
+
+class EventLoop:
+    """
+    Blocks on stdin readiness and timer deadlines instead of polling.
+    """
+
+    def __init__(self, fd: int, governor: FrameGovernor | None = None):
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(fd, selectors.EVENT_READ)
+        self.timers = TimerWheel()
+        self.governor = governor if governor is not None else FrameGovernor()
+
+    def wait(self, mode: str) -> bool:
+        """
+        Sleeps until input is ready, a timer is due or the frame period for mode runs out.
+        Fires due timers and returns whether input is ready.
+        """
+        timeout = self.governor.timeout(mode, self.timers.next_deadline())
+        ready = bool(self.selector.select(timeout)) if timeout > 0 else False
+        self.timers.advance(monotonic())
+        return ready
+
+    def poll(self):
+        """
+        Fires due timers without blocking.
+        """
+        self.timers.advance(monotonic())
+
+    def close(self):
+        self.selector.close()
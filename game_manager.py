@@ -1,9 +1,16 @@
 from day_phases import Phases
 from resources import Resources
-from buildings import Buildings
-from key import Keyboard, Key
 from colors import Colors
+from perf import PerfMonitor
+from typing_state import TypingState
 from time import time
+from typing import TYPE_CHECKING, Callable
+import random
+import threading
+
+if TYPE_CHECKING:  # Loaded with the assets, see GameManager.load_assets
+    from catalog import BuildingCatalog, CatalogCursor
+    from key import Key
 
 MODE_IDLE = 'IDLE'
 MODE_TYPING = 'TYPING_JOB'
@@ -11,7 +18,17 @@ MODE_BUILDING_SELECT = 'TYPING_BUILD'
 MODE_GAME_OVER = 'GAME_OVER'
 MODE_INITIAL = 'INITIAL_SCREEN'
 BUILDINGS_FILE_PATH = 'assets/buildings.json'
+KEYBOARD_LAYOUT = [
+    "`1234567890-=",
+    "qwertyuiop[]",
+    "asdfghjkl;'",
+    "zxcvbnm,./"
+]
 CENTER_KEYS = ["f", "j", "g", "h"]
+CONFIRM_MESSAGE = "Continue"
+KEY_NPAGE = 338  # curses.KEY_NPAGE
+KEY_PPAGE = 339  # curses.KEY_PPAGE
+KEY_F1 = 265  # curses.KEY_F1, toggles debug mode
 
 # Balancing tools
 THREAT_STARTER = 4
@@ -24,16 +41,23 @@ class GameManager:
     Class which manages most backend operations and variables.
     """
 
-    def __init__(self, keyboard_layout: list[str]):
+    def __init__(self, keyboard_layout: list[str], seed: int | None = None, clock: Callable[[], float] = time,
+                 load: bool = True):
+        self.clock = clock
+
         # Resources
+        self.seed: int = seed if seed is not None else random.randrange(1 << 32)
         self.phases: Phases = Phases()
-        self.resources: Resources = Resources.get_instance()
-        self.buildings = Buildings(BUILDINGS_FILE_PATH)
-        self.keyboard = Keyboard(keyboard_layout, CENTER_KEYS)
-        self.keyboard.starting_keys(self.buildings)
+        self.resources: Resources = Resources()
+        self.keyboard_layout = keyboard_layout
+        self.buildings = None  # Buildings and Keyboard, see load_assets
+        self.keyboard = None
+        self.loaded = threading.Event()
+        self.load_error: Exception | None = None
 
         # Logging tools
-        self.debug_mode: bool = False
+        self.debug_mode: bool = False  # Shows the last keycode and the performance HUD
+        self.perf: PerfMonitor = PerfMonitor()
         self.log_message: str = ""
         self.priority_message: str = ""
 
@@ -51,16 +75,55 @@ class GameManager:
 
         # Text tools
         self.current_key: Key | None = None
-        self.current_text: str | None = None
+        self.current_text: str | None = CONFIRM_MESSAGE
         self.current_input: list[str] = list()
+        self.build_cursor: CatalogCursor | None = None
+        self.build_page: int = 0
+        self.typing: TypingState | None = TypingState(CONFIRM_MESSAGE, clock())
         self.type_time: float = 0.0
         self.wpm: float = 0.0
-        self.mistakes: int = 0
         self.mistake_ratio: float = 0.0
 
         # Miscellaneous
         self.threat: int = self.calculate_threat()
         self.escape_time: float = 0.0
+        self.journal = None  # journal.JournalWriter recording every key reaching key_logic
+        self.analytics = None  # analytics.SessionRecorder queueing keystrokes of building texts
+        self.battle = None  # battle.BattleEngine fighting nights unit by unit instead of comparing with the threat
+        self.services: Callable[[], None] | None = None  # Attaches services loaded beside the assets, see wait_loaded
+        if load:
+            self.load_assets()
+
+    def load_assets(self, records: list[dict] | None = None, catalog: "BuildingCatalog | None" = None):
+        """
+        Parses the buildings and builds the keyboard, the part of a game the intro screen doesn't need.
+        Without load the game is created without them, so this can run on a background thread while the intro
+        is played. Nothing reads either before loaded is set, leaving the intro waits for it.
+        Records and catalog already parsed for other games are shared instead of reading the asset, see Buildings.
+        """
+        from buildings import Buildings  # Imported here, the intro paints before these modules are loaded
+        from key import Keyboard
+        try:
+            buildings = Buildings(BUILDINGS_FILE_PATH, self.resources, self.seed, records=records, catalog=catalog)
+            keyboard = Keyboard(self.keyboard_layout, CENTER_KEYS)
+            keyboard.starting_keys(buildings)
+            self.buildings, self.keyboard = buildings, keyboard
+        except Exception as error:
+            self.load_error = error
+            raise
+        finally:
+            self.loaded.set()
+
+    def wait_loaded(self):
+        """
+        Called on leaving the intro, waits for the assets and then the services, so no key reaches the game
+        before everything it holds is in place.
+        """
+        self.loaded.wait()
+        if self.load_error is not None:
+            raise self.load_error
+        if self.services is not None:
+            self.services()
 
     def calculate_threat(self) -> int:
         """
@@ -72,14 +135,22 @@ class GameManager:
         """
         Resolves the night battle based on current military and money resources and day count.
         If it's Night returns a list of strings with victory/loss information or None if it's not Night.
+        With a battle engine the night is fought out and the report gets a line on how it went.
         """
         if self.phases.is_night():
             result_str = f"THREAT LEVEL: {self.threat} | MILITARY: {self.resources.military.amount}"
-            if self.resources.military.amount >= self.threat:
+            details = list()
+            if self.battle is not None:
+                held, line = self.battle.resolve(self)
+                details.append(line)
+            else:
+                held = self.resources.military.amount >= self.threat
+            if held:
                 self.resources.knowledge.add(self.threat)
                 return [
                     "VICTORY!",
                     result_str,
+                    *details,
                     "The city is safe.",
                     f"Gained {self.threat}{self.resources.knowledge.symbol} from combat experience."
                 ]
@@ -89,6 +160,7 @@ class GameManager:
                 return [
                     "DEFEAT...",
                     result_str,
+                    *details,
                     "Raiders breached the defenses!",
                     f"They take everything, including your life."
                 ]
@@ -119,11 +191,15 @@ class GameManager:
                                     f"You need {self.current_key.building.input_amount}{self.current_key.building.input_resource.symbol} to activate {self.current_key.building.input_resource.name}!",
                                     Colors.ERROR.pair)
                                 return
-                        self.current_text = self.current_key.building.get_text()
+                        self.current_text = self.buildings.get_text(self.current_key.building,
+                                                                   self.keyboard.all_keys & ~self.keyboard.locked)
                         self.mode = MODE_TYPING
-                        self.type_time = time()
+                        self.type_time = self.key_press_time
+                        self.typing = TypingState(self.current_text, self.type_time)
                     elif self.current_key.building is None:  # already checks for key locked in earlier if
                         self.mode = MODE_BUILDING_SELECT
+                        self.build_cursor = self.buildings.index.cursor()
+                        self.build_page = 0
             else:
                 self.add_message(f"The city sleeps at night...", Colors.NIGHT.pair)
 
@@ -132,19 +208,20 @@ class GameManager:
         Run logic checks dependant on mode.
         """
         if self.mode == MODE_BUILDING_SELECT:
-            inp = "".join(self.current_input).lower()
-            for b in self.buildings:
-                if inp == b.name.lower() and self.resources.money.amount >= b.purchase_cost:  # complete building
-                    build = self.buildings.find_building_by_name(inp)
-                    self.current_key.building = build
-                    self.resources.money.subtract(build.purchase_cost)
-                    self.add_message(f"{build.name.capitalize()} built on key '{self.current_key.char.upper()}'!",
-                                     Colors.SUCCESS.pair)
-                    self.reset(False)
+            build = self.buildings.resolve(self.build_cursor.match)
+            if build is not None and self.resources.money.amount >= build.purchase_cost:  # complete building
+                self.current_key.building = build
+                self.resources.money.subtract(build.purchase_cost)
+                self.add_message(f"{build.name.capitalize()} built on key '{self.current_key.char.upper()}'!",
+                                 Colors.SUCCESS.pair)
+                self.reset(False)
         elif self.mode == MODE_TYPING and self.current_key.building is not None:
-            self.wpm = (len(self.current_input) * 12) / max((time() - self.type_time), 0.001)
-            self.mistake_ratio = (1.0 - min(self.mistakes / len(self.current_text), 1.0))
-            if "".join(self.current_input) == self.current_text:
+            if not self.typing.complete:  # Shown while typing, the pace and accuracy of the last keystrokes
+                self.wpm = self.typing.rolling_wpm()
+                self.mistake_ratio = self.typing.rolling_accuracy()
+            else:  # The payout is for the whole text
+                self.wpm = self.typing.wpm(self.key_press_time)
+                self.mistake_ratio = (1.0 - min(self.typing.mistakes / len(self.current_text), 1.0))
                 for res in self.resources:
                     if res == self.current_key.building.output_resource:
                         amount_gained: int = int(round(self.current_key.building.output_amount * self.mistake_ratio))
@@ -156,15 +233,35 @@ class GameManager:
                         self.add_message(f"Your WPM was: {self.wpm:.02f}!", Colors.SUCCESS.pair)
                         self.add_message(f"Your accuracy was: {self.mistake_ratio:.2%}.",
                                          Colors.SUCCESS.pair if self.mistake_ratio >= 0.5 else Colors.ERROR.pair)
+                        if self.analytics is not None:
+                            self.analytics.text(self.typing, self.current_key.building.id, self.key_press_time)
                         if self.current_key.building.input_resource is not None:
                             self.current_key.building.input_resource.subtract(self.current_key.building.input_amount)
                         self.reset(False)
                         break
         elif self.mode == MODE_INITIAL:
-            if "".join(self.current_input) == self.current_text:
+            if self.typing.complete:
+                self.wait_loaded()
                 self.mode = MODE_IDLE
                 self.reset(True)
 
+    def reload_buildings(self, records: list[dict], version: int, summary: str = "",
+                         catalog: "BuildingCatalog | None" = None) -> bool:
+        """
+        Swaps in a reloaded buildings asset, called between frames. A build menu in progress is rebuilt
+        from what has been typed. Games recording a journal keep their buildings, a replay has to see the same ones.
+        """
+        if self.journal is not None:
+            self.buildings.version = version
+            return False
+        self.buildings.update(records, version, catalog)
+        if self.mode == MODE_BUILDING_SELECT:
+            self.build_cursor = self.buildings.index.cursor()
+            for char in self.current_input:
+                self.build_cursor.push(char)
+        self.log(f"Buildings reloaded: {summary}", priority=True)
+        return True
+
     def game_over(self, win: bool):
         """
         Handles game over and adds win messages.
@@ -178,25 +275,32 @@ class GameManager:
         self.add_message(f"Your total money was {self.resources.money.amount}!", Colors.SUCCESS.pair)
         self.add_message("Press [Esc] to exit the game.", Colors.TEXT.pair)
 
-    def key_logic(self, key: int):
+    def key_logic(self, key: int, arrival: float | None = None):
         """
         Interprets keycodes given by curses and decided what to do with it.
+        arrival is when the key was read from the terminal, WPM and the key highlight are measured from it.
         """
 
         if key != -1:  # might not work
-            self.key_press_time = time()
+            self.key_press_time = arrival if arrival is not None else self.clock()
+            if self.journal is not None:
+                self.journal.record(key, self.key_press_time)
             self.log(key)
             if not self.mode == MODE_GAME_OVER:
                 if 32 <= key <= 126:  # Writable characters
                     key_char = chr(key)
                     self.active_key = key_char.lower()
-                    if self.mode == MODE_BUILDING_SELECT or (
-                            self.mode == MODE_INITIAL and len(self.current_input) < len(self.current_text)):
-                        self.current_input.append(key_char)
-                    elif self.mode == MODE_TYPING and len(self.current_input) < len(self.current_text):
+                    if self.mode == MODE_BUILDING_SELECT:
                         self.current_input.append(key_char)
-                        if key_char != self.current_text[len(self.current_input) - 1]:
-                            self.mistakes += 1
+                        self.build_cursor.push(key_char)
+                        self.build_page = 0
+                    elif self.mode == MODE_INITIAL:
+                        self.typing.push(key_char, self.key_press_time)
+                    elif self.mode == MODE_TYPING and not self.typing.full:
+                        if self.analytics is not None:
+                            self.analytics.keystroke(self.typing, key_char, self.current_key.building.id,
+                                                     self.key_press_time)
+                        self.typing.push(key_char, self.key_press_time)
                         self.log(key)
                     if not self.mode == MODE_INITIAL:
                         self.interact_key(key_char)
@@ -209,18 +313,29 @@ class GameManager:
                         if self.phases.day == DAYS_TO_SURVIVE:
                             self.game_over(win=True)
 
+                if key in (KEY_NPAGE, KEY_PPAGE) and self.mode == MODE_BUILDING_SELECT:  # Page through the build menu
+                    self.build_page = max(self.build_page + (1 if key == KEY_NPAGE else -1), 0)
+
                 # TODO: add support for diacritics
 
                 if key == 263 or key == 8:
-                    if self.mode in (MODE_BUILDING_SELECT, MODE_TYPING, MODE_INITIAL) and self.current_input:
+                    if self.mode == MODE_BUILDING_SELECT and self.current_input:
                         self.current_input.pop()
+                        self.build_cursor.pop()
+                        self.build_page = 0
+                    elif self.mode in (MODE_TYPING, MODE_INITIAL):
+                        self.typing.pop()
+
+            if key == KEY_F1:
+                self.debug_mode = not self.debug_mode
+                self.log_message = ""
 
             if key == 27:  # escape = exit
                 if self.mode in (MODE_IDLE, MODE_GAME_OVER, MODE_INITIAL):
-                    if time() - self.escape_time <= 5.0:
+                    if self.key_press_time - self.escape_time <= 5.0:
                         raise KeyboardInterrupt
                     else:
-                        self.escape_time = time()
+                        self.escape_time = self.key_press_time
                         self.add_message("To exit press [Esc] again!", Colors.WARNING.pair)
                 else:
                     self.reset(True)
@@ -240,7 +355,8 @@ class GameManager:
             self.current_key = None
             self.current_text = None
             self.current_input = list()
-            self.mistakes = 0
+            self.build_cursor = None
+            self.typing = None
 
     def add_message(self, message: str, message_color):
         """
@@ -249,7 +365,7 @@ class GameManager:
         if len(self.message) >= 3:
             self.message.pop(0)
         self.message.append((message, message_color))
-        self.message_time = time()
+        self.message_time = self.clock()
 
     def log(self, message, priority: bool = False):
         """
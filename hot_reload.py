@@ -0,0 +1,185 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from pathlib import Path
+from time import sleep
+
+import game_manager as gm
+from buildings import BuildingsError, read_records, shared_catalog
+from catalog import BuildingCatalog
+
+POLL_INTERVAL = 1.0  # Seconds between checks of the file where inotify isn't available
+SETTLE_TIME = 0.2  # Quiet time after the last change before reparsing, editors save in several writes
+WAIT_TIMEOUT = 0.5  # Longest the watcher thread blocks before checking whether it was closed
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+
+class InotifyWatcher:
+    """
+    Waits for the kernel to report a change of the file. Watches the directory, as editors often save
+    by renaming a new file over the old one, which a watch on the file itself would lose.
+    """
+
+    def __init__(self, path: str | Path):
+        path = Path(path).resolve()
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.name = os.fsencode(path.name)
+        if libc.inotify_add_watch(self.fd, os.fsencode(path.parent), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch failed for {path.parent}")
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Returns whether the file changed within timeout seconds.
+        """
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return False
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return False
+        changed = False
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = EVENT.unpack_from(data, offset)
+            start = offset + EVENT.size
+            changed |= data[start:start + length].rstrip(b"\0") == self.name
+            offset = start + length
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Fallback comparing the file's modification time, size and inode every POLL_INTERVAL.
+    """
+
+    def __init__(self, path: str | Path, interval: float = POLL_INTERVAL):
+        self.path = Path(path)
+        self.interval = interval
+        self.signature = self._signature()
+
+    def _signature(self) -> tuple[int, int, int] | None:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def wait(self, timeout: float) -> bool:
+        sleep(min(timeout, self.interval))
+        signature = self._signature()
+        changed, self.signature = signature != self.signature, signature
+        return changed
+
+    def close(self):
+        pass
+
+
+def watch(path: str | Path) -> InotifyWatcher | PollingWatcher:
+    """
+    inotify where the platform has it, polling everywhere else.
+    """
+    try:
+        return InotifyWatcher(path)
+    except (OSError, AttributeError, TypeError):
+        return PollingWatcher(path)
+
+
+def diff(old: list[dict] | None, new: list[dict]) -> str:
+    """
+    Summary of what changed between two parses. Unchanged text lists and unchanged records are carried over
+    from old, so every version shares them instead of holding its own copy and games can skip them by identity.
+    """
+    previous = {record["id"]: record for record in old or ()}
+    added, changed = list(), list()
+    for position, record in enumerate(new):
+        before = previous.pop(record["id"], None)
+        if before is None:
+            added.append(record["id"])
+            continue
+        if before["texts"] == record["texts"]:
+            record["texts"] = before["texts"]
+        if before != record:
+            changed.append(record["id"])
+        else:
+            new[position] = before
+    parts = [f"{label} {', '.join(ids)}" for label, ids in (("added", added), ("changed", changed),
+                                                           ("removed", list(previous))) if ids]
+    return "; ".join(parts) or "no changes"
+
+
+class BuildingsReloader:
+    """
+    Watches a buildings json asset and reparses, validates and diffs it in a background thread.
+    Games pick up the latest valid parse between frames with apply, which only binds and swaps references,
+    the build menu index being built once per version here and shared, so the frame loop never waits on
+    the disk, the parser or the index. A broken edit is reported in error and ignored.
+    The parse of the asset at start is published as version 0 once ready is set, for games to load from.
+    """
+
+    def __init__(self, path: str | Path = gm.BUILDINGS_FILE_PATH, watcher=None):
+        self.path = path
+        self.watcher = watcher if watcher is not None else watch(path)
+        self.latest: tuple[int, list[dict], str, BuildingCatalog] | None = None  # Version, records, summary, catalog
+        self.ready = threading.Event()
+        self.version = 0  # The asset as it was at start, the one new games have loaded
+        self.error: str | None = None
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="buildings-reloader", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            records = read_records(self.path)
+            self.latest = (self.version, records, "", shared_catalog(records))
+        except BuildingsError as error:
+            records = None
+            self.error = str(error)
+        self.ready.set()
+        while not self.closed:
+            if not self.watcher.wait(WAIT_TIMEOUT):
+                continue
+            while not self.closed and self.watcher.wait(SETTLE_TIME):
+                pass
+            try:
+                new_records = read_records(self.path)
+            except BuildingsError as error:
+                self.error = str(error)
+                continue
+            summary = diff(records, new_records)
+            records = new_records
+            self.error = None
+            self.version += 1
+            self.latest = (self.version, records, summary, shared_catalog(records))
+
+    def apply(self, game_manager: gm.GameManager) -> bool:
+        """
+        Brings the game's buildings up to the latest version, returns whether anything was swapped in.
+        """
+        latest = self.latest
+        if latest is None or latest[0] == game_manager.buildings.version:
+            return False
+        version, records, summary, catalog = latest
+        return game_manager.reload_buildings(records, version, summary, catalog)
+
+    def close(self):
+        self.closed = True
+        self.thread.join()
+        self.watcher.close()
@@ -0,0 +1,244 @@
+import argparse
+import os
+from dataclasses import dataclass
+from multiprocessing import Pool
+from pathlib import Path
+from time import perf_counter, sleep, time_ns
+
+import game_manager as gm
+
+# File layout: magic | header varints | (delta ns, zigzag keycode) records | optional trailer
+MAGIC = b"KKJ1"
+VERSION = 1
+TRAILER = -2  # Keycode marking the final state record, curses never returns it
+FLUSH_EVERY = 256
+
+
+def write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data: bytes, position: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def write_string(out: bytearray, string: str):
+    encoded = string.encode("utf-8")
+    write_varint(out, len(encoded))
+    out += encoded
+
+
+def read_string(data: bytes, position: int) -> tuple[str, int]:
+    length, position = read_varint(data, position)
+    return data[position:position + length].decode("utf-8"), position + length
+
+
+@dataclass(frozen=True)
+class FinalState:
+    """
+    The part of a game a replay has to reproduce exactly.
+    """
+    resources: tuple[int, ...]
+    day: int
+    phase: int
+    mode: str
+
+    @staticmethod
+    def of(game_manager: gm.GameManager) -> "FinalState":
+        phases = game_manager.phases
+        return FinalState(tuple(resource.amount for resource in game_manager.resources), phases.day,
+                          phases.phases.index(phases.current_phase), game_manager.mode)
+
+
+class ReplayMismatch(Exception):
+    """
+    Raised when a replayed game doesn't end in the state its journal recorded.
+    """
+
+
+class JournalWriter:
+    """
+    Records every key reaching GameManager.key_logic with its arrival time as delta-encoded varints.
+    """
+
+    def __init__(self, path: str | Path, seed: int, layout: list[str]):
+        self.file = Path(path).open("wb")
+        self.buffer = bytearray(MAGIC)
+        self.start_ns = self.last_ns = time_ns()
+        self.records = 0
+        write_varint(self.buffer, VERSION)
+        write_varint(self.buffer, seed)
+        write_varint(self.buffer, self.start_ns)
+        write_varint(self.buffer, len(layout))
+        for row in layout:
+            write_string(self.buffer, row)
+
+    def record(self, key: int, arrival: float | None = None):
+        """
+        Appends a key, arrival is in seconds on the game clock (time.time by default).
+        """
+        now_ns = round(arrival * 1e9) if arrival is not None else time_ns()
+        write_varint(self.buffer, max(now_ns - self.last_ns, 0))
+        write_varint(self.buffer, zigzag(key))
+        self.last_ns = max(now_ns, self.last_ns)
+        self.records += 1
+        if self.records % FLUSH_EVERY == 0:
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+
+    def finish(self, game_manager: gm.GameManager):
+        """
+        Writes the final state of the game for replays to check against and closes the journal.
+        """
+        state = FinalState.of(game_manager)
+        write_varint(self.buffer, 0)
+        write_varint(self.buffer, zigzag(TRAILER))
+        write_varint(self.buffer, len(state.resources))
+        for amount in state.resources:
+            write_varint(self.buffer, zigzag(amount))
+        write_varint(self.buffer, state.day)
+        write_varint(self.buffer, state.phase)
+        write_string(self.buffer, state.mode)
+        self.close()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+@dataclass
+class Journal:
+    """
+    Decoded journal: the session seed, layout and every recorded (arrival ns, keycode).
+    """
+    seed: int
+    start_ns: int
+    layout: list[str]
+    keys: list[tuple[int, int]]
+    final: FinalState | None
+
+    @staticmethod
+    def load(path: str | Path) -> "Journal":
+        data = Path(path).read_bytes()
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a journal")
+        position = len(MAGIC)
+        version, position = read_varint(data, position)
+        if version != VERSION:
+            raise ValueError(f"{path} is journal version {version}, expected {VERSION}")
+        seed, position = read_varint(data, position)
+        start_ns, position = read_varint(data, position)
+        rows, position = read_varint(data, position)
+        layout = list()
+        for _ in range(rows):
+            row, position = read_string(data, position)
+            layout.append(row)
+
+        keys = list()
+        final = None
+        now_ns = start_ns
+        while position < len(data):
+            delta, position = read_varint(data, position)
+            key, position = read_varint(data, position)
+            key = unzigzag(key)
+            if key == TRAILER:
+                count, position = read_varint(data, position)
+                resources = list()
+                for _ in range(count):
+                    amount, position = read_varint(data, position)
+                    resources.append(unzigzag(amount))
+                day, position = read_varint(data, position)
+                phase, position = read_varint(data, position)
+                mode, position = read_string(data, position)
+                final = FinalState(tuple(resources), day, phase, mode)
+                break
+            now_ns += delta
+            keys.append((now_ns, key))
+        return Journal(seed, start_ns, layout, keys, final)
+
+
+def replay(path: str | Path, realtime: bool = False) -> FinalState:
+    """
+    Feeds a journal back through key_logic with no terminal, either as fast as possible or in real time.
+    Raises ReplayMismatch if the journal has a final state and the replay doesn't end in it.
+    """
+    journal = Journal.load(path)
+    now = [journal.start_ns / 1e9]
+    game = gm.GameManager(journal.layout, journal.seed, clock=lambda: now[0])
+    started = perf_counter()
+    for arrival_ns, key in journal.keys:
+        if realtime:
+            sleep(max((arrival_ns - journal.start_ns) / 1e9 - (perf_counter() - started), 0.0))
+        now[0] = arrival_ns / 1e9
+        try:
+            game.key_logic(key, now[0])
+        except KeyboardInterrupt:
+            break
+
+    state = FinalState.of(game)
+    if journal.final is not None and state != journal.final:
+        raise ReplayMismatch(f"{path}: replay ended in {state}, journal recorded {journal.final}")
+    return state
+
+
+def check(path: str) -> tuple[str, str | None]:
+    """
+    Replays a single journal inside a worker process, returns the path and the error if there was one.
+    """
+    try:
+        replay(path)
+    except (ReplayMismatch, ValueError, IndexError) as error:
+        return path, str(error)
+    return path, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay keystroke journals and check their final state.")
+    parser.add_argument("journals", nargs="+")
+    parser.add_argument("--realtime", action="store_true", help="replay a single journal at recorded speed")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    if args.realtime:
+        for path in args.journals:
+            print(path, replay(path, realtime=True))
+        return
+
+    start = perf_counter()
+    failures = 0
+    with Pool(args.workers) as pool:
+        for path, error in pool.imap_unordered(check, args.journals, chunksize=16):
+            if error is not None:
+                failures += 1
+                print(f"MISMATCH {error}")
+    elapsed = perf_counter() - start
+    print(f"Replayed {len(args.journals)} journals, {failures} mismatched, "
+          f"{len(args.journals) / elapsed * 60:.0f} journals per minute")
+
+
+if __name__ == "__main__":
+    main()
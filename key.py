@@ -1,53 +1,108 @@
-from math import sqrt
-from buildings import BuildingType
+from array import array
+from typing import Iterator
 
-CENTER_KEYS: dict[str, tuple[int, int]] = dict()
+from buildings import BuildingType
+from layout import compile_layout
 
 
 class Key:
     """
-    Single key for keyboard.
+    Single key for keyboard. A thin view, the state lives in its Keyboard's arrays.
     """
+    __slots__ = ("keyboard", "index")
+
+    def __init__(self, keyboard: "Keyboard", index: int):
+        self.keyboard = keyboard
+        self.index = index
+
+    @property
+    def char(self) -> str:
+        return self.keyboard.layout.chars[self.index]
+
+    @property
+    def row(self) -> int:
+        return self.keyboard.layout.positions[self.index][0]
+
+    @property
+    def col(self) -> int:
+        return self.keyboard.layout.positions[self.index][1]
+
+    @property
+    def unlock_cost(self) -> int:
+        return self.keyboard.unlock_costs[self.index]
 
-    def __init__(self, char: str, row: int, col: int):
-        self.char: str = char
-        self.row: int = row
-        self.col: int = col
-        self.building: BuildingType | None = None
-        self.locked: bool = True
-        self.active: bool = True
-        self.unlock_cost: int = int((min(
-            sqrt((r - row) ** 2 + (c - col) ** 2)
-            for r, c in CENTER_KEYS.values()
-        ) * 10))
+    @property
+    def locked(self) -> bool:
+        return bool(self.keyboard.locked >> self.index & 1)
+
+    @locked.setter
+    def locked(self, value: bool):
+        self.keyboard.set_locked(self.index, value)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.keyboard.active >> self.index & 1)
+
+    @active.setter
+    def active(self, value: bool):
+        self.keyboard.set_active(self.index, value)
+
+    @property
+    def building(self) -> BuildingType | None:
+        return self.keyboard.building_at(self.index)
+
+    @building.setter
+    def building(self, building: BuildingType | None):
+        self.keyboard.set_building(self.index, building)
 
 
 class Keyboard:
     """
     Keyboard holding all information on keys and operates over the keys.
+    Key state is stored as arrays: bitsets for locked, active and built keys (bit i is key i),
+    building slots and unlock costs as typed arrays. Phase resets and counts are single integer operations.
     """
 
     def __init__(self, layout: list[str], center_keys: list[str]):
-        global CENTER_KEYS
-        for letter in center_keys:
-            for row_idx, row in enumerate(layout):
-                if letter in row:
-                    col_idx = row.index(letter)
-                    CENTER_KEYS[letter] = (row_idx, col_idx)
-                    break
-
-        self.keys = list()
-        for row_id, char_row in enumerate(layout):
-            for col_id, char in enumerate(list(char_row)):
-                key = Key(char, row_id, col_id)
-                self.keys.append(key)
-        self.char_rows = layout
+        self.layout = compile_layout(layout, center_keys)
+        count = len(self.layout.chars)
+        self.all_keys: int = (1 << count) - 1
+        self.locked: int = self.all_keys
+        self.active: int = self.all_keys
+        self.built: int = 0
+        self.unlock_costs = array("I", self.layout.unlock_costs)
+        self.building_slots = array("H", bytes(2 * count))  # 0 for no building, else index + 1 into building_types
+        self.building_types: list[BuildingType] = list()
+        self.type_slots: dict[str, int] = dict()  # Building id -> slot of the latest BuildingType with that id
+        self.keys = [Key(self, index) for index in range(count)]
+
+    def set_locked(self, index: int, value: bool):
+        self.locked = self.locked | 1 << index if value else self.locked & ~(1 << index)
+
+    def set_active(self, index: int, value: bool):
+        self.active = self.active | 1 << index if value else self.active & ~(1 << index)
+
+    def building_at(self, index: int) -> BuildingType | None:
+        slot = self.building_slots[index]
+        return self.building_types[slot - 1] if slot else None
+
+    def set_building(self, index: int, building: BuildingType | None):
+        if building is None:
+            self.building_slots[index] = 0
+            self.built &= ~(1 << index)
+            return
+        slot = self.type_slots.get(building.id)
+        if slot is None or self.building_types[slot - 1] is not building:  # A reload may replace a removed id
+            self.building_types.append(building)
+            slot = self.type_slots[building.id] = len(self.building_types)
+        self.building_slots[index] = slot
+        self.built |= 1 << index
 
     def starting_keys(self, buildings):
         """
         Initializes the starting keys and adds starter buildings on keys 'f' and 'j'.
         """
-        for key_char in CENTER_KEYS.keys():
+        for key_char in self.layout.center_keys.keys():
             key = self.get_by_char(key_char)
             key.locked = False
             match key_char:
@@ -58,14 +113,41 @@ class Keyboard:
 
     def get_by_char(self, char: str) -> Key:
         """
-        Returns the first key found with the given char.
+        Returns the key with the given char (case insensitive) or None.
         """
-        return next((key for key in self.keys if key.char.lower() == char.lower()), None)
+        index = self.layout.find(char)
+        return self.keys[index] if index is not None else None
 
     def reset_keys(self):
         """
         Resets all keys in the keyboard to be active again.
         Usually called after going to the next phase.
         """
-        for key in self.keys:
-            key.active = True
+        self.active = self.all_keys
+
+    def unlocked_count(self) -> int:
+        return (self.all_keys & ~self.locked).bit_count()
+
+    def select(self, mask: int) -> Iterator[Key]:
+        """
+        Yields the keys whose bits are set in mask, in layout order.
+        """
+        while mask:
+            lowest = mask & -mask
+            yield self.keys[lowest.bit_length() - 1]
+            mask ^= lowest
+
+    def active_buildings(self) -> Iterator[Key]:
+        """
+        Unlocked keys with a building that can still be activated this phase.
+        """
+        return self.select(self.active & self.built & ~self.locked)
+
+    def empty_keys(self) -> Iterator[Key]:
+        """
+        Unlocked keys with nothing built on them.
+        """
+        return self.select(self.all_keys & ~self.locked & ~self.built)
+
+    def locked_keys(self) -> Iterator[Key]:
+        return self.select(self.locked)
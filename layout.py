@@ -0,0 +1,98 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from math import sqrt
+
+# Key geometry in terminal cells
+KEY_HEIGHT = 5
+KEY_WIDTH = 9
+GAP_X = 2
+GAP_Y = 1
+ROW_STAGGER = (0, 1, 1, 2)  # Horizontal offset per row, the last value repeats for larger layouts
+EMPTY_SLOT = " "  # Leaves a gap in a row, used for split layouts
+
+
+@dataclass(eq=False)
+class CompiledLayout:
+    """
+    Keyboard layout with everything derivable from it precomputed:
+    char -> key index lookup, grid positions, unlock costs and screen rectangles per terminal size.
+    """
+    rows: tuple[str, ...]
+    chars: tuple[str, ...]
+    positions: tuple[tuple[int, int], ...]
+    index: dict[str, int]
+    center_keys: dict[str, tuple[int, int]]
+    unlock_costs: tuple[int, ...]
+    _geometry: dict[tuple[int, int], tuple[tuple[int, int], ...]] = field(default_factory=dict, repr=False)
+
+    def find(self, char: str) -> int | None:
+        """
+        Returns the index of the key for char (case insensitive) or None if it's not on the layout.
+        """
+        return self.index.get(char.lower())
+
+    def geometry(self, max_h: int, max_w: int) -> tuple[tuple[int, int], ...]:
+        """
+        Returns the top-left screen corner of every key for the given terminal size.
+        Only computed once per terminal size, so a frame never recomputes it unless the terminal was resized.
+        """
+        geometry = self._geometry.get((max_h, max_w))
+        if geometry is None:
+            if len(self._geometry) >= 16:
+                self._geometry.clear()
+            geometry = self._geometry[(max_h, max_w)] = self._compute_geometry(max_h, max_w)
+        return geometry
+
+    def _compute_geometry(self, max_h: int, max_w: int) -> tuple[tuple[int, int], ...]:
+        start_y = max(max_h - len(self.rows) * (KEY_HEIGHT + GAP_Y) - 4, max_h // 2)
+        row_starts = [
+            (max_w - len(row) * (KEY_WIDTH + GAP_X)) // 2 + ROW_STAGGER[min(row_idx, len(ROW_STAGGER) - 1)]
+            for row_idx, row in enumerate(self.rows)
+        ]
+        return tuple(
+            (start_y + row * (KEY_HEIGHT + GAP_Y), row_starts[row] + col * (KEY_WIDTH + GAP_X))
+            for row, col in self.positions
+        )
+
+
+def unlock_cost_field(positions: tuple[tuple[int, int], ...], centers: list[tuple[int, int]],
+                      height: int, width: int) -> tuple[int, ...]:
+    """
+    Computes the unlock cost of every key: ten times the distance to the closest center key.
+    Squared row and column offsets are tabulated once per center, so each key is only a table lookup.
+    """
+    if not centers:
+        return tuple(0 for _ in positions)
+    row_offsets = [[(row - center_row) ** 2 for row in range(height)] for center_row, _ in centers]
+    col_offsets = [[(col - center_col) ** 2 for col in range(width)] for _, center_col in centers]
+    tables = list(zip(row_offsets, col_offsets))
+    return tuple(
+        int(sqrt(min(rows[row] + cols[col] for rows, cols in tables)) * 10)
+        for row, col in positions
+    )
+
+
+@lru_cache(maxsize=32)
+def _compile(rows: tuple[str, ...], center_keys: tuple[str, ...]) -> CompiledLayout:
+    chars = list()
+    positions = list()
+    index = dict()
+    for row_idx, row in enumerate(rows):
+        for col_idx, char in enumerate(row):
+            if char == EMPTY_SLOT:
+                continue
+            index.setdefault(char.lower(), len(chars))
+            chars.append(char)
+            positions.append((row_idx, col_idx))
+
+    centers = {letter: positions[index[letter]] for letter in center_keys if letter in index}
+    costs = unlock_cost_field(tuple(positions), list(centers.values()), len(rows),
+                              max((len(row) for row in rows), default=0))
+    return CompiledLayout(rows, tuple(chars), tuple(positions), index, centers, costs)
+
+
+def compile_layout(layout: list[str], center_keys: list[str]) -> CompiledLayout:
+    """
+    Compiles a layout given as rows of characters, results are cached per layout and center keys.
+    """
+    return _compile(tuple(layout), tuple(center_keys))
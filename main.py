@@ -1,20 +1,35 @@
+from time import perf_counter
+STARTED = perf_counter()  # Startup timings are measured from here, before any other import
+
+import argparse
 import curses
+import json
 import os
-from time import sleep, time
+import signal
+import sys
+import threading
+from functools import partial
+from time import time
+from catalog import BUILD_PAGE_SIZE
 from colors import Colors
+from event_loop import EventLoop
+from layout import KEY_HEIGHT, KEY_WIDTH
+from renderer import TRANSPARENT, Pad, Renderer
+from sprites import Sprite, SpriteCache, blit
 
 import game_manager as gm
 from game_manager import GameManager
+from typing_state import TypingState
+
+# Modules the intro screen doesn't need (buildings, hot reload, analytics, journal, snapshots) are imported
+# by Startup on a background thread, keep them out of the imports above
+IMPORTED = perf_counter()
 
 # Params
 KEY_DELAY = 0.1
+KEY_SPRITES = SpriteCache()  # Every look a key has been drawn in, shared by all keyboards
 MESSAGE_TIME = 5.0
-KEYBOARD_LAYOUT = [
-    "`1234567890-=",
-    "qwertyuiop[]",
-    "asdfghjkl;'",
-    "zxcvbnm,./"
-]
+KEYBOARD_LAYOUT = gm.KEYBOARD_LAYOUT
 
 LOGO: list[str] = [
     r" _  __             _                           _   _  _                     _",
@@ -51,26 +66,51 @@ INITIAL_MESSAGE: list[str] = [
     "",
     "To continue to the main game type:",
 ]
-CONFIRM_MESSAGE = "Continue"
+CONFIRM_MESSAGE = gm.CONFIRM_MESSAGE
 
 
 def draw(screen, game_manager: GameManager):
     """
-    Complete unified draw function
+    Complete unified draw function, screen is the Renderer back buffer so only changed cells reach curses
     """
+    perf = game_manager.perf
+    perf.begin_frame()
     screen.erase()
     screen.bkgd(' ', Colors.TEXT.pair)
     max_h, max_w = screen.getmaxyx()
     # renderer graphics
-    draw_border(game_manager, screen, max_h, max_w, game_manager.phases.current_phase)
+    with perf.section("draw_border"):
+        draw_border(game_manager, screen, max_h, max_w, game_manager.phases.current_phase)
     screen.addstr(0, 0, game_manager.log_message, Colors.TEXT.pair)
     if game_manager.mode == gm.MODE_INITIAL:
-        draw_initial_screen(screen, game_manager, max_w)
+        with perf.section("draw_initial"):
+            draw_initial_screen(screen, game_manager, max_w)
     else:
-        draw_ui(screen, game_manager, max_h, max_w)
-        draw_keyboard(screen, game_manager, max_h, max_w)
-    draw_message(game_manager, screen, max_w)
-    screen.refresh()
+        with perf.section("draw_ui"):
+            draw_ui(screen, game_manager, max_h, max_w)
+        with perf.section("draw_keyboard"):
+            draw_keyboard(screen, game_manager, max_h, max_w)
+    with perf.section("draw_message"):
+        draw_message(game_manager, screen, max_w)
+    if game_manager.debug_mode:
+        draw_perf_hud(screen, game_manager, max_h, max_w)
+    with perf.section("refresh"):
+        screen.refresh()
+    perf.end_frame()
+
+
+def draw_perf_hud(screen, game_manager: GameManager, max_h: int, max_w: int):
+    """
+    Debug overlay in the bottom right corner with the frame, draw and input timings
+    """
+    lines = game_manager.perf.report()
+    width = max(len(line) for line in lines)
+    x = max(max_w - width - 2, 0)
+    try:
+        for i, line in enumerate(lines):
+            screen.addstr(max_h - len(lines) - 1 + i, x, f"{line:<{width}}", Colors.TEXT.pair | curses.A_REVERSE)
+    except curses.error:
+        game_manager.log("DrawPerfHud failed")
 
 
 def draw_border(game_manager, screen, max_h, max_w, curr_phase):
@@ -115,7 +155,6 @@ def draw_initial_screen(screen, game_manager: GameManager, max_w: int):
         for index_y, line in enumerate(LOGO):
             screen.addstr(height_modifier + index_y - 7, start_x, line, Colors.NOON.pair)
 
-        game_manager.current_text = CONFIRM_MESSAGE
         for index_y, line in enumerate(INITIAL_MESSAGE):
             if index_y == len(INITIAL_MESSAGE) - 1:
                 screen.addstr(height_modifier + index_y, (max_w - len(line)) // 2, line, Colors.NOON.pair)
@@ -126,105 +165,95 @@ def draw_initial_screen(screen, game_manager: GameManager, max_w: int):
         if start_x < 0:
             start_x = 0
 
-        for i, char in enumerate(CONFIRM_MESSAGE):
-            color = Colors.TEXT.pair
-            # Check if the character is correctly typed
-            if i < len(game_manager.current_input):
-                color = Colors.SUCCESS.pair if game_manager.current_input[i] == char else Colors.ERROR.pair
-            screen.addch(len(INITIAL_MESSAGE) + height_modifier + 2, start_x + i, char, color | curses.A_BOLD)
-
-        cursor_idx = len(game_manager.current_input)
-        if cursor_idx <= len(CONFIRM_MESSAGE):
-            screen.addch(len(INITIAL_MESSAGE) + height_modifier + 3, start_x + cursor_idx, '^', Colors.TEXT.pair)
+        draw_typed_text(screen, game_manager.typing, len(INITIAL_MESSAGE) + height_modifier + 2, start_x,
+                        mark_spaces=False)
     except curses.error:
         game_manager.log("DrawInitialScreen failed")
 
 
 def draw_keyboard(screen, game_manager, max_h, max_w):
     """
-    Draws the keyboard in the lower middle of the screen
-    """
-    key_height = 5
-    key_width = 9
-    gap_x = 2
-    gap_y = 1
-
-    start_y = max_h - len(game_manager.keyboard.char_rows) * (key_height + gap_y) - 4
-    if start_y < max_h // 2:
-        start_y = max_h // 2
-
-    for row_idx, row_str in enumerate(game_manager.keyboard.char_rows):
-        row_len_px = len(row_str) * (key_width + gap_x)
-        start_x = (max_w - row_len_px) // 2
-
-        # Stagger
-        match row_idx:
-            case 0:
-                start_x += 0
-            case 1:
-                start_x += 1
-            case 2:
-                start_x += 1
-            case 3:
-                start_x += 2
-
-        current_y = start_y + (row_idx * (key_height + gap_y))
-
-        for i, char in enumerate(row_str):
-            current_x = start_x + (i * (key_width + gap_x))
-            slot = game_manager.keyboard.get_by_char(char)
-
-            # --- Colors ---
-            bg_color = Colors.GREY_KEY.pair  # Default Grey
-            is_active = (game_manager.active_key == char)
-
-            # --- Key Press Offset Logic ---
-            draw_y = current_y
-            draw_x = current_x
-            draw_shadow = True
-
-            if is_active:
-                bg_color = Colors.SUCCESS.pair  # Green Press
-                draw_y += 1  # Offset down
-                draw_x += 1  # Offset right
-                draw_shadow = False  # No shadow when pressed
-
-            elif slot:
-                if slot.locked:
-                    bg_color = Colors.ERROR.pair  # Red Locked
-                elif not slot.active and game_manager.mode == gm.MODE_IDLE:
-                    bg_color = Colors.WARNING.pair  # Yellow Activated (Wait next phase)
-            # Draw the key box (with press offset and shadow logic)
-            draw_rounded_key_box(game_manager, screen, draw_y, draw_x, key_height, key_width, bg_color,
-                                 shadow=draw_shadow)
-
-            # Fill the interior
-            for row in range(1, key_height - 1):
-                try:
-                    screen.addstr(draw_y + row, draw_x + 1, " " * (key_width - 2), bg_color)
-                except curses.error:
-                    game_manager.log("DrawKeyboard failed at filling interior")
+    Draws the keyboard in the lower middle of the screen, every key is a blit of a cached sprite
+    """
+    keyboard = game_manager.keyboard
+    locked_keys = keyboard.locked  # Bitsets read once instead of through every Key view
+    active_keys = keyboard.active
+    clipped = False
+
+    for index, (current_y, current_x) in enumerate(keyboard.layout.geometry(max_h, max_w)):
+        char = keyboard.layout.chars[index]
+        locked = bool(locked_keys >> index & 1)
+        # --- Colors ---
+        bg_color = Colors.GREY_KEY.pair  # Default Grey
+        is_active = (game_manager.active_key == char)
+
+        # --- Key Press Offset Logic ---
+        draw_y = current_y
+        draw_x = current_x
+        draw_shadow = True
+
+        if is_active:
+            bg_color = Colors.SUCCESS.pair  # Green Press
+            draw_y += 1  # Offset down
+            draw_x += 1  # Offset right
+            draw_shadow = False  # No shadow when pressed
+
+        elif locked:
+            bg_color = Colors.ERROR.pair  # Red Locked
+        elif not active_keys >> index & 1 and game_manager.mode == gm.MODE_IDLE:
+            bg_color = Colors.WARNING.pair  # Yellow Activated (Wait next phase)
+
+        # Content (center)
+        building = keyboard.building_at(index)
+        if locked:
+            label = f"{keyboard.unlock_costs[index]}{game_manager.resources.knowledge.symbol}"
+        elif building is not None:
+            label = building.symbol
+        else:
+            label = ""
+
+        look = (char, locked, label, bg_color, draw_shadow)
+        sprite = KEY_SPRITES.get(look)
+        if sprite is None:
+            sprite = KEY_SPRITES.put(look, render_key(game_manager, *look))
+        clipped = blit(screen, sprite, draw_y, draw_x) or clipped
+    if clipped:
+        game_manager.log("DrawKeyboard clipped keys")
+
+
+def render_key(game_manager, char: str, locked: bool, label: str, bg_color: int, shadow: bool) -> Sprite:
+    """
+    Renders a single key look with its shadow into a transparent pad, done once per look
+    """
+    key_height = KEY_HEIGHT
+    key_width = KEY_WIDTH
+    pad = Pad(key_height + 2, key_width + 2, TRANSPARENT)  # Spare row and column, so the shadow isn't the last cell
 
-            # Character (bottom center)
-            try:
-                char_x = draw_x + (key_width // 2)
-                screen.addstr(draw_y + key_height - 2, char_x, char.upper(), bg_color | curses.A_BOLD)
-            except curses.error:
-                game_manager.log("DrawKeyboard failed at characters")
-
-            # Content (center)
-            if slot:
-                if slot.locked:
-                    try:
-                        cost_str = f"{slot.unlock_cost}{game_manager.resources.knowledge.symbol}"
-                        screen.addstr(draw_y + 2, draw_x + (key_width - len(cost_str)) // 2, cost_str, bg_color)
-                    except curses.error:
-                        game_manager.log("DrawKeyboard failed at unlock cost")
-                elif slot.building is not None:
-                    try:
-                        screen.addstr(draw_y + 2, draw_x + (key_width - 2) // 2, slot.building.symbol, bg_color)
-                    except curses.error:
-                        game_manager.log("DrawKeyboard failed at emojis")
+    # Draw the key box (with shadow logic)
+    draw_rounded_key_box(game_manager, pad, 0, 0, key_height, key_width, bg_color, shadow=shadow)
+
+    # Fill the interior
+    for row in range(1, key_height - 1):
+        try:
+            pad.addstr(row, 1, " " * (key_width - 2), bg_color)
+        except curses.error:
+            game_manager.log("DrawKeyboard failed at filling interior")
+
+    # Character (bottom center)
+    try:
+        pad.addstr(key_height - 2, key_width // 2, char.upper(), bg_color | curses.A_BOLD)
+    except curses.error:
+        game_manager.log("DrawKeyboard failed at characters")
+
+    # Unlock cost or building symbol (center)
+    try:
+        if locked:
+            pad.addstr(2, (key_width - len(label)) // 2, label, bg_color)
+        elif label:
+            pad.addstr(2, (key_width - 2) // 2, label, bg_color)
+    except curses.error:
+        game_manager.log("DrawKeyboard failed at key label")
+    return Sprite(pad)
 
 
 def draw_rounded_key_box(game_manager, screen, y, x, h, w, color, shadow=True):
@@ -267,10 +296,8 @@ def draw_rounded_key_box(game_manager, screen, y, x, h, w, color, shadow=True):
 
 
 def draw_message(game_manager, screen, max_w):
-    global MESSAGE_TIME
-    if game_manager.mode == gm.MODE_GAME_OVER:
-        MESSAGE_TIME = 1000.0
-    if game_manager.message and time() - game_manager.message_time <= MESSAGE_TIME:
+    message_time = 1000.0 if game_manager.mode == gm.MODE_GAME_OVER else MESSAGE_TIME
+    if game_manager.message and time() - game_manager.message_time <= message_time:
         try:
             for dy, (message, message_color) in enumerate(game_manager.message):
                 c_x = (max_w - len(message)) // 2
@@ -358,17 +385,21 @@ def draw_ui(screen, game_manager: GameManager, max_h: int, max_w: int):
             start_x = (max_w - len(header)) // 2
             screen.addstr(center_y + 1, start_x, header, Colors.TEXT.pair | curses.A_UNDERLINE)
 
-            # Rows
+            # Rows, ranked by the catalog index
+            rows = game_manager.buildings.index.view(curr_input_str, game_manager.resources.money.amount,
+                                                     game_manager.build_page)
             row_offset = 2
-            for building in game_manager.buildings:
+            for row in rows:
                 # Highlight match
-                attr = Colors.SUCCESS.pair if (
-                        game_manager.resources.money.amount >= building.purchase_cost) else Colors.ERROR.pair
-                if building.name.lower().startswith(curr_input_str.lower()) and len(curr_input_str) > 0:
-                    attr = attr | curses.A_REVERSE
+                attr = Colors.SUCCESS.pair if row.affordable else Colors.ERROR.pair
+                if len(curr_input_str) > 0:
+                    attr = attr | (curses.A_REVERSE if row.distance == 0 else curses.A_DIM)
 
-                screen.addstr(center_y + row_offset, start_x, str(building), attr)
+                screen.addstr(center_y + row_offset, start_x, row.text, attr)
                 row_offset += 1
+            if game_manager.build_page > 0 or len(rows) == BUILD_PAGE_SIZE:
+                page_lbl = f"[PgUp/PgDn: Page {game_manager.build_page + 1}]"
+                screen.addstr(center_y + row_offset, start_x, page_lbl, Colors.TEXT.pair | curses.A_DIM)
         except curses.error:
             game_manager.log("DrawUI Failed on BUILDING_SELECT")
 
@@ -386,7 +417,8 @@ def draw_ui(screen, game_manager: GameManager, max_h: int, max_w: int):
 
 def draw_typing_interface(game_manager: GameManager, screen, title: str, start_y: int, max_w: int):
     """
-    Draws the typing interface including colored text for correct/mistakes
+    Draws the typing interface including colored text for correct/mistakes, with the rolling WPM and accuracy
+    of the last keystrokes
     """
     try:
         screen.addstr(start_y - 2, (max_w - len(title)) // 2, title, Colors.TEXT.pair | curses.A_DIM)
@@ -401,27 +433,137 @@ def draw_typing_interface(game_manager: GameManager, screen, title: str, start_y
         if start_x < 0:
             start_x = 0
 
-        for i, char in enumerate(game_manager.current_text):
-            color = Colors.TEXT.pair
-            # Check if the character is correctly typed
-            if i < len(game_manager.current_input):
-                if game_manager.current_input[i] == char:
-                    color = Colors.SUCCESS.pair  # Correct
-                elif char == ' ' and game_manager.current_input[i] != ' ':
-                    color = Colors.ERROR.pair  # Incorrect (space)
-                    screen.addch(start_y + 1, start_x + i, '¯', color)  # Red overline ASCII char for wrong space
-                else:
-                    color = Colors.ERROR.pair  # Incorrect
-            screen.addch(start_y, start_x + i, char, color | curses.A_BOLD)
-
-        cursor_idx = len(game_manager.current_input)
-        if cursor_idx <= len(game_manager.current_text):
-            screen.addch(start_y + 1, start_x + cursor_idx, '^', Colors.TEXT.pair)
+        draw_typed_text(screen, game_manager.typing, start_y, start_x)
     except curses.error:
         game_manager.log("DrawTypingInterface failed")
 
 
-def main(screen):
+def draw_typed_text(screen, typing: TypingState, y: int, x: int, mark_spaces: bool = True):
+    """
+    Draws a text colored by what has been typed with the cursor below it.
+    Reads the running state of typing, only the part typed after the first mistake is drawn per character.
+    """
+    text = typing.text
+    typed_len = len(typing.typed)
+    prefix = typing.correct_prefix
+    if prefix:
+        screen.addstr(y, x, text[:prefix], Colors.SUCCESS.pair | curses.A_BOLD)  # Correct
+    for i in range(prefix, typed_len):
+        if not typing.mismatches[i]:
+            color = Colors.SUCCESS.pair  # Correct
+        else:
+            color = Colors.ERROR.pair  # Incorrect
+            if mark_spaces and text[i] == ' ':
+                screen.addch(y + 1, x + i, '¯', color)  # Red overline ASCII char for wrong space
+        screen.addch(y, x + i, text[i], color | curses.A_BOLD)
+    if typed_len < len(text):
+        screen.addstr(y, x + typed_len, text[typed_len:], Colors.TEXT.pair | curses.A_BOLD)
+
+    screen.addch(y + 1, x + typed_len, '^', Colors.TEXT.pair)
+
+
+class Startup:
+    """
+    Loads everything the intro screen doesn't need on a background thread while the player types the confirm
+    message: the buildings and keyboard of a new game, then the hot reloader, analytics and autosave writer with
+    their imports. Records the startup timings, seconds since STARTED, in the game's PerfMonitor.
+    The services a game holds are only built there, attach hands them over on the main thread between keys.
+    """
+
+    def __init__(self, game_manager: GameManager, args: argparse.Namespace):
+        self.game_manager = game_manager
+        self.args = args
+        self.reloader = None  # hot_reload.BuildingsReloader
+        self.analytics = None  # analytics.AnalyticsStore
+        self.snapshots = None  # snapshot.SnapshotWriter
+        self.charset = None  # charset.CharsetIndex, practice.PracticeSelector, battle.BattleEngine and
+        self.practice = None  # analytics.SessionRecorder for the game, see attach
+        self.battle = None
+        self.recorder = None
+        self.attached = False
+        self.error: Exception | None = None
+        self.ready = threading.Event()
+        self.times = game_manager.perf.startup
+        self.times["imports"] = IMPORTED - STARTED
+        self.thread = threading.Thread(target=self._run, name="startup", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        game_manager, args = self.game_manager, self.args
+        try:
+            if not game_manager.loaded.is_set():
+                game_manager.load_assets()
+            self.times["assets"] = perf_counter() - STARTED
+            from hot_reload import BuildingsReloader
+            self.reloader = BuildingsReloader(gm.BUILDINGS_FILE_PATH)
+            if args.unlocked_texts and game_manager.journal is None:  # Like practice, a replay draws without it
+                from charset import CharsetIndex, CharsetLibrary
+                library = CharsetLibrary(game_manager.keyboard.layout, game_manager.buildings)
+                self.charset = CharsetIndex(library, game_manager.buildings.rng)
+            if args.battles and game_manager.journal is None:  # A replay resolves nights by the threat alone
+                from battle import BattleEngine
+                self.battle = BattleEngine()
+            if args.analytics:
+                from analytics import AnalyticsStore, default_player, weakness
+                from practice import PracticeSelector
+                player = args.player or default_player()
+                self.analytics = AnalyticsStore(args.analytics)
+                self.recorder = self.analytics.session(player, game_manager.seed)
+                if game_manager.journal is None:  # A replay has to be handed the same texts, it knows no history
+                    self.practice = PracticeSelector(weakness(args.analytics, player), game_manager.buildings.rng)
+            if args.save:
+                import snapshot
+                self.snapshots = snapshot.SnapshotWriter(args.save)
+        except Exception as error:
+            self.error = error
+        finally:
+            self.times["ready"] = perf_counter() - STARTED
+            self.ready.set()
+
+    def attach(self, game_manager: GameManager):
+        """
+        Waits for loading to finish and hands the services to the game, once. Called on the main thread,
+        by the frame loop as soon as they are ready and by the game leaving the intro, whichever comes first.
+        """
+        if self.attached:
+            return
+        self.ready.wait()
+        self.attached = True
+        if self.error is not None:
+            raise self.error
+        game_manager.buildings.charset = self.charset
+        game_manager.buildings.practice = self.practice
+        game_manager.battle = self.battle
+        game_manager.analytics = self.recorder
+
+    def frame_drawn(self):
+        if "first_frame" not in self.times:
+            self.times["first_frame"] = perf_counter() - STARTED
+
+    def close(self, game_manager: GameManager):
+        """
+        Stops the services once loading finished, saving the game a last time.
+        """
+        self.ready.wait()
+        if self.reloader is not None:
+            self.reloader.close()
+        if self.analytics is not None:
+            self.analytics.close()
+        if self.snapshots is not None:
+            import snapshot
+            self.snapshots.submit(snapshot.capture(game_manager))
+            self.snapshots.close()
+
+    def report(self, path: str):
+        """
+        Appends the timings as one json line, so they can be compared across releases.
+        """
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"time": time(), "python": sys.version.split()[0],
+                                **{name: round(seconds, 6) for name, seconds in self.times.items()}}) + "\n")
+
+
+def main(screen, args: argparse.Namespace):
     """
     Main function that sets all curses requirements and handles the main game loop
     """
@@ -430,32 +572,152 @@ def main(screen):
     curses.start_color()
     Colors.init()
     screen.nodelay(True)
-    game_manager = gm.GameManager(KEYBOARD_LAYOUT)
+    broadcaster = None
+    if args.broadcast:
+        from broadcast import Broadcaster, FrameTap
+        broadcaster = Broadcaster(args.broadcast)
+    renderer = Renderer(FrameTap(screen, broadcaster) if broadcaster is not None else screen)
+    game_manager = start_game(args.save)
+    game_manager.debug_mode = args.debug
+    if args.record and game_manager.mode == gm.MODE_INITIAL:  # A journal replays from the seed, not a snapshot
+        from journal import JournalWriter
+        game_manager.journal = JournalWriter(args.record, game_manager.seed, KEYBOARD_LAYOUT)
+    startup = Startup(game_manager, args)
+    game_manager.services = partial(startup.attach, game_manager)
     try:
         curses.set_escdelay(1)
     except AttributeError:
         os.environ.setdefault('ESCDELAY', '1')
+    for signum in (signal.SIGHUP, signal.SIGTERM):  # Closing the terminal still saves and finishes the journal
+        signal.signal(signum, stop)
+    loop = EventLoop(sys.stdin.fileno())
+    started = False
+    running = True
+    try:
+        while running:
+            if not started and startup.ready.is_set():
+                started = True
+                startup.attach(game_manager)
+                if startup.snapshots is not None:
+                    schedule_autosave(loop, game_manager, startup.snapshots)
+            if startup.reloader is not None:
+                startup.reloader.apply(game_manager)  # Only swaps references, parsing happened on its thread
+            draw(renderer, game_manager)
+            startup.frame_drawn()
+            loop.wait(game_manager.mode)
+            keys = read_keys(screen, game_manager)
+            for key, arrival in keys:  # The whole backlog is applied before the next frame
+                try:
+                    with game_manager.perf.section("key_logic"):
+                        game_manager.key_logic(key, arrival)
+                except KeyboardInterrupt:
+                    running = False
+                    break
+
+            if keys:
+                schedule_timers(loop, game_manager)
+                if game_manager.journal is not None:  # One write per batch keeps a killed session replayable
+                    game_manager.journal.flush()
+    finally:
+        loop.close()
+        if broadcaster is not None:
+            broadcaster.close()
+        startup.close(game_manager)
+        if game_manager.journal is not None:
+            game_manager.journal.finish(game_manager)
+        if args.startup_report:
+            startup.report(args.startup_report)
+
+
+def stop(signum, frame):
+    """
+    Signal handler leaving the main loop the same way a double Esc does
+    """
+    raise KeyboardInterrupt
+
+
+def start_game(save_path: str | None) -> GameManager:
+    """
+    Resumes the snapshot at save_path if there is a readable one, otherwise starts a new game
+    """
+    if save_path is not None and os.path.exists(save_path):
+        import snapshot
+        try:
+            return snapshot.load(save_path)
+        except (snapshot.SnapshotError, OSError, KeyError, ValueError, TypeError):
+            pass  # Unreadable or from another game version, start over and let autosave replace it
+    return gm.GameManager(KEYBOARD_LAYOUT, load=False)  # Startup loads the assets behind the intro
+
+
+def schedule_autosave(loop: EventLoop, game_manager: GameManager, snapshots):
+    """
+    Captures the game every AUTOSAVE_INTERVAL seconds if keys were handled since, the writer thread does the disk work
+    """
+    import snapshot
+    saved_at_keys = game_manager.perf.keys
+
+    def autosave():
+        nonlocal saved_at_keys
+        if game_manager.perf.keys != saved_at_keys:
+            saved_at_keys = game_manager.perf.keys
+            snapshots.submit(snapshot.capture(game_manager))
+        loop.timers.call_later("autosave", snapshot.AUTOSAVE_INTERVAL, autosave)
+
+    loop.timers.call_later("autosave", snapshot.AUTOSAVE_INTERVAL, autosave)
+
+
+def read_keys(screen, game_manager: GameManager) -> list[tuple[int, float]]:
+    """
+    Drains every key pending in the terminal, each stamped with the time it was read off the queue
+    """
+    keys = list()
     while True:
-        draw(screen, game_manager)
         try:
             key = screen.getch()
         except curses.error:
             game_manager.log("Main failed on getch")
-            key = -1
+            game_manager.perf.key_dropped()
+            continue
+        if key == -1:
+            return keys
+        keys.append((key, time()))
+        game_manager.perf.key_read()
 
-        if game_manager.active_key and (time() - game_manager.key_press_time > KEY_DELAY):
-            game_manager.active_key = None
 
-        try:
-            game_manager.key_logic(key)
-        except KeyboardInterrupt:
-            break
+def schedule_timers(loop: EventLoop, game_manager: GameManager):
+    """
+    Arms the deadlines for the key highlight and message expiry after a key has been handled.
+    """
+    def clear_active_key():
+        game_manager.active_key = None
 
-        sleep(0.01)
+    def expire_messages():
+        if game_manager.mode != gm.MODE_GAME_OVER:
+            game_manager.reset(True, False)
 
+    if game_manager.active_key:
+        loop.timers.call_later("active_key", max(game_manager.key_press_time + KEY_DELAY - time(), 0.0),
+                               clear_active_key)
+    if game_manager.message_time is not None:
+        loop.timers.call_later("message", max(game_manager.message_time + MESSAGE_TIME - time(), 0.0),
+                               expire_messages)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keyboard Kingdoms")
+    parser.add_argument("--debug", action="store_true", help="start in debug mode with the performance HUD (F1)")
+    parser.add_argument("--save", metavar="PATH", help="autosave to PATH in the background and resume from it")
+    parser.add_argument("--record", metavar="PATH", help="journal every keystroke to PATH for journal.py to replay")
+    parser.add_argument("--analytics", metavar="PATH", help="add typing statistics to the sqlite file at PATH")
+    parser.add_argument("--unlocked-texts", action="store_true",
+                        help="only hand out texts typeable with the unlocked keys where a building has one")
+    parser.add_argument("--battles", action="store_true",
+                        help="fight nights out unit by unit, with raider waves and losses, see battle.py")
+    parser.add_argument("--player", help="name the statistics are stored under, the login name if omitted")
+    parser.add_argument("--broadcast", metavar="SOCKET",
+                        help="stream the screen to viewers on a Unix socket, watch with broadcast.py SOCKET")
+    parser.add_argument("--startup-report", metavar="PATH",
+                        help="append import, first frame and ready times as a json line to PATH")
     try:
-        curses.wrapper(main)
+        curses.wrapper(main, parser.parse_args())
     except KeyboardInterrupt:
         pass
@@ -0,0 +1,133 @@
+from array import array
+from time import perf_counter
+
+HISTOGRAM_SIZE = 512  # Samples kept per histogram, older ones are overwritten
+PERCENTILES = (50, 95, 99)
+
+
+class RingHistogram:
+    """
+    Fixed-size ring buffer of the latest samples (in seconds). Adding is a single array store,
+    percentiles are only computed when somebody asks for them.
+    """
+    __slots__ = ("samples", "position", "count")
+
+    def __init__(self, size: int = HISTOGRAM_SIZE):
+        self.samples = array("d", bytes(8 * size))
+        self.position = 0
+        self.count = 0
+
+    def add(self, value: float):
+        self.samples[self.position] = value
+        self.position = (self.position + 1) % len(self.samples)
+        if self.count < len(self.samples):
+            self.count += 1
+
+    def percentiles(self, percentiles: tuple[int, ...] = PERCENTILES) -> list[float]:
+        """
+        Returns the nearest-rank percentiles of the kept samples, zeros if there are none yet.
+        """
+        if not self.count:
+            return [0.0] * len(percentiles)
+        ordered = sorted(self.samples[:self.count])
+        return [ordered[min(self.count * p // 100, self.count - 1)] for p in percentiles]
+
+
+class Section:
+    """
+    Reusable context manager timing one named part of a frame into its histogram.
+    """
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: RingHistogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.add(perf_counter() - self.start)
+
+
+class PerfMonitor:
+    """
+    Frame time, per draw function and key_logic timings, keystroke to visible frame latency and input counters.
+    Always recording, reading the numbers is left to the debug HUD.
+    """
+
+    def __init__(self, size: int = HISTOGRAM_SIZE):
+        self.size = size
+        self.frames = RingHistogram(size)
+        self.latency = RingHistogram(size)
+        self.sections: dict[str, Section] = dict()
+        self.frame_start: float = 0.0
+        self.frame_count: int = 0
+        self.last_frame_end: float = 0.0
+        self.frame_interval = RingHistogram(size)
+
+        # Input
+        self.pending_key_time: float | None = None  # Oldest key handled but not yet on screen
+        self.keys_since_frame: int = 0
+        self.keys: int = 0
+        self.coalesced: int = 0  # Keys that reached the screen in the same frame as an earlier one
+        self.dropped: int = 0  # Reads which failed, the key is lost
+        self.startup: dict[str, float] = dict()  # Seconds from process start to each startup milestone
+
+    def section(self, name: str) -> Section:
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = Section(RingHistogram(self.size))
+        return section
+
+    def begin_frame(self):
+        self.frame_start = perf_counter()
+
+    def end_frame(self):
+        """
+        Called once the frame has been flushed to the terminal.
+        """
+        now = perf_counter()
+        self.frames.add(now - self.frame_start)
+        if self.last_frame_end:
+            self.frame_interval.add(now - self.last_frame_end)
+        self.last_frame_end = now
+        self.frame_count += 1
+        if self.pending_key_time is not None:
+            self.latency.add(now - self.pending_key_time)
+            self.pending_key_time = None
+        if self.keys_since_frame > 1:
+            self.coalesced += self.keys_since_frame - 1
+        self.keys_since_frame = 0
+
+    def key_read(self, arrival: float | None = None):
+        """
+        Marks a key read from the terminal, arrival is its perf_counter timestamp if known earlier.
+        """
+        self.keys += 1
+        self.keys_since_frame += 1
+        if self.pending_key_time is None:
+            self.pending_key_time = arrival if arrival is not None else perf_counter()
+
+    def key_dropped(self):
+        self.dropped += 1
+
+    def report(self) -> list[str]:
+        """
+        HUD lines: percentiles in milliseconds for every histogram, then the input counters.
+        """
+        def row(name: str, histogram: RingHistogram) -> str:
+            p50, p95, p99 = (value * 1000 for value in histogram.percentiles())
+            return f"{name:<14}{p50:>7.2f}{p95:>7.2f}{p99:>7.2f}"
+
+        lines = [f"{'ms':<14}{'p50':>7}{'p95':>7}{'p99':>7}",
+                 row("frame", self.frames),
+                 row("interval", self.frame_interval),
+                 row("key latency", self.latency)]
+        lines.extend(row(name, section.histogram) for name, section in self.sections.items())
+        lines.append(f"frames {self.frame_count} keys {self.keys}")
+        lines.append(f"coalesced {self.coalesced} dropped {self.dropped}")
+        if self.startup:
+            lines.append("startup " + " ".join(f"{name} {seconds * 1000:.0f}" for name, seconds in self.startup.items()))
+        return lines
@@ -0,0 +1,107 @@
+import random
+import threading
+from array import array
+from collections.abc import Sequence
+from itertools import accumulate
+from time import perf_counter
+
+from buildings import BuildingType
+
+PRACTICE_SHARE = 0.75  # Activations picking a text for the player's weaknesses, the rest stay plain random draws
+CANDIDATES = 8  # Texts drawn through the index and scored for each practice pick
+
+
+def features(text: str) -> set[str]:
+    """
+    Characters and bigrams a text exercises.
+    """
+    found = set(text)
+    found.update(text[i:i + 2] for i in range(len(text) - 1))
+    return found
+
+
+class PoolIndex:
+    """
+    Inverted index of one building's texts, from every character and bigram to the sorted indices of the texts
+    containing it.
+    """
+
+    def __init__(self, texts: Sequence[str]):
+        self.texts = texts
+        self.postings: dict[str, array] = dict()
+        for index, text in enumerate(texts):
+            for feature in features(text):
+                posting = self.postings.get(feature)
+                if posting is None:
+                    posting = self.postings[feature] = array("I")
+                posting.append(index)
+
+
+class PracticeSelector:
+    """
+    Picks building texts weighted towards the characters and bigrams a player is weak on.
+    A weak feature is drawn by its weight, then a text containing it from the feature's posting list.
+    CANDIDATES such texts are scored against the whole weakness vector and the best one is handed out,
+    so a pick costs the same on a pool of a hundred texts or a hundred thousand. Candidates the building's sampler
+    handed out recently are skipped and the pick is taken from the sampler, so both share one no-repeat window.
+    Pools are indexed on a background thread the first time their building is activated, and again once
+    a reload replaced its texts. Until then the building's sampler hands out its texts as before.
+    """
+
+    def __init__(self, weakness: dict[str, float], rng: random.Random, share: float = PRACTICE_SHARE,
+                 candidates: int = CANDIDATES):
+        self.weakness = weakness
+        self.rng = rng
+        self.share = share
+        self.candidates = candidates
+        self.pools: dict[str, PoolIndex] = dict()
+        self.indexing: set[str] = set()  # Building ids with an index being built
+        self.index_time = 0.0  # Seconds spent indexing pools so far
+
+    def pool(self, building: BuildingType) -> PoolIndex | None:
+        """
+        The building's index if it is up to date, otherwise starts building it and returns None.
+        """
+        pool = self.pools.get(building.id)
+        if pool is not None and pool.texts is building.texts:
+            return pool
+        if building.id not in self.indexing:
+            self.indexing.add(building.id)
+            threading.Thread(target=self._index, args=(building.id, building.texts),
+                             name=f"practice-index-{building.id}", daemon=True).start()
+        return None
+
+    def _index(self, building_id: str, texts: Sequence[str]):
+        start = perf_counter()
+        self.pools[building_id] = PoolIndex(texts)
+        self.index_time += perf_counter() - start
+        self.indexing.discard(building_id)
+
+    def score(self, text: str) -> float:
+        weakness = self.weakness
+        return sum(weakness.get(feature, 0.0) for feature in features(text)) / len(text)
+
+    def get_text(self, building: BuildingType) -> str:
+        """
+        A text of the building, from its sampler when the player has no weakness the pool can exercise.
+        """
+        if not self.weakness or self.rng.random() >= self.share:
+            return building.get_text()
+        pool = self.pool(building)
+        weak = [feature for feature in self.weakness if feature in pool.postings] if pool is not None else None
+        if not weak:
+            return building.get_text()
+        cumulative = list(accumulate(self.weakness[feature] for feature in weak))
+        best, best_score = None, 0.0
+        for feature in self.rng.choices(weak, cum_weights=cumulative, k=self.candidates):
+            posting = pool.postings[feature]
+            index = posting[self.rng.randrange(len(posting))]
+            if index in building.sampler.recent:
+                continue
+            score = self.score(pool.texts[index])
+            if score > best_score:
+                best, best_score = index, score
+        if best is None:  # Every candidate was handed out recently
+            return building.get_text()
+        building.sampler.take(best)
+        return pool.texts[best]
@@ -0,0 +1,209 @@
+import curses
+import unicodedata
+from functools import lru_cache
+
+WIDE_TAIL = ""  # Marks the right half of a double width character
+TRANSPARENT = (None, 0)  # Pad cell nothing was drawn on, blits leave the cell below alone
+
+
+@lru_cache(maxsize=None)
+def char_width(char: str) -> int:
+    """
+    Returns how many terminal cells a single character takes up (0, 1 or 2).
+    """
+    if unicodedata.combining(char) or unicodedata.category(char) in ("Mn", "Me", "Cf"):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+
+class Pad:
+    """
+    Off-screen cell grid answering the same addstr/addch calls as a curses window.
+    Cells are (char, attr) pairs, the right half of a wide character holds WIDE_TAIL.
+    """
+
+    def __init__(self, height: int, width: int, blank: tuple[str | None, int] = (" ", 0)):
+        self.height: int = height
+        self.width: int = width
+        self.blank = blank
+        self.back: list[list[tuple[str, int]]] = [[blank] * width for _ in range(height)]
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self.height, self.width
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0):
+        """
+        Writes text into the back buffer, wrapping like curses does.
+        Raises curses.error when writing outside the window or past its last cell.
+        """
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise curses.error("addstr() returned ERR")
+        row = self.back[y]
+        if not text:
+            return
+        if text.isascii() and x + len(text) < self.width:  # Fast path for plain text that fits on the row
+            self._clear_wide(row, x)
+            self._clear_wide(row, x + len(text) - 1)
+            row[x:x + len(text)] = [(char, attr) for char in text]
+            return
+        for char in text:
+            width = char_width(char)
+            if width == 0:  # Combining characters stick to the previous cell
+                if x > 0 and row[x - 1][0] != WIDE_TAIL:
+                    row[x - 1] = (row[x - 1][0] + char, row[x - 1][1])
+                elif x > 1:
+                    row[x - 2] = (row[x - 2][0] + char, row[x - 2][1])
+                continue
+            if x + width > self.width:
+                y, x = y + 1, 0
+                if y >= self.height:
+                    raise curses.error("addstr() returned ERR")
+                row = self.back[y]
+            self._clear_wide(row, x)
+            row[x] = (char, attr)
+            if width == 2:
+                self._clear_wide(row, x + 1)
+                row[x + 1] = (WIDE_TAIL, attr)
+            x += width
+            if x >= self.width:
+                y, x = y + 1, 0
+                if y >= self.height:
+                    raise curses.error("addstr() returned ERR")
+                row = self.back[y]
+
+    def addch(self, y: int, x: int, char, attr: int = 0):
+        """
+        Writes a single character into the back buffer.
+        """
+        self.addstr(y, x, chr(char) if isinstance(char, int) else char, attr)
+
+    def _clear_wide(self, row: list[tuple[str, int]], x: int):
+        """
+        Blanks the other half of a double width character about to be overwritten at x.
+        """
+        if row[x][0] == WIDE_TAIL and x > 0:
+            row[x - 1] = self.blank
+        elif x + 1 < self.width and row[x + 1][0] == WIDE_TAIL:
+            row[x + 1] = self.blank
+
+    def blit(self, sprite, y: int, x: int) -> bool:
+        """
+        Copies a sprite's opaque cells with its top left corner at y, x.
+        Parts outside the grid are clipped, returns whether anything was.
+        """
+        clipped = False
+        for dy, spans in enumerate(sprite.spans):
+            target_y = y + dy
+            if not 0 <= target_y < self.height:
+                clipped = clipped or bool(spans)
+                continue
+            row = self.back[target_y]
+            for start, cells in spans:
+                target_x = x + start
+                low = max(-target_x, 0)
+                high = min(len(cells), self.width - target_x)
+                if low or high < len(cells):
+                    clipped = True
+                    if low < high and cells[low][0] == WIDE_TAIL:  # Never copy half of a wide character
+                        low += 1
+                    if low < high < len(cells) and cells[high][0] == WIDE_TAIL:
+                        high -= 1
+                if low >= high:
+                    continue
+                self._clear_wide(row, target_x + low)
+                self._clear_wide(row, target_x + high - 1)
+                row[target_x + low:target_x + high] = cells[low:high]
+        return clipped
+
+
+class Renderer(Pad):
+    """
+    Double buffered cell grid sitting in front of a curses window.
+    Draw functions write into the back buffer through the usual addstr/addch calls,
+    refresh then flushes only the cells which changed since the last frame.
+    """
+
+    def __init__(self, screen):
+        super().__init__(0, 0)
+        self.screen = screen
+        self.front: list[list[tuple[str, int]]] = list()
+
+        # Frame statistics
+        self.frames: int = 0
+        self.cells_flushed: int = 0
+        self.bytes_flushed: int = 0
+
+        self.resize()
+
+    def resize(self):
+        """
+        Reallocates both buffers to the current size of the window and clears the window.
+        """
+        self.height, self.width = self.screen.getmaxyx()
+        self.screen.erase()
+        self.back = [[self.blank] * self.width for _ in range(self.height)]
+        self.front = [[self.blank] * self.width for _ in range(self.height)]
+
+    def bkgd(self, char: str, attr: int = 0):
+        """
+        Sets the background used for erased cells, forwarded to the window only when it changes.
+        """
+        if self.blank != (char, attr):
+            old_blank, self.blank = self.blank, (char, attr)
+            self.screen.bkgd(char, attr)
+            self.back = [[self.blank if cell == old_blank else cell for cell in row] for row in self.back]
+            self.front = [[self.blank] * self.width for _ in range(self.height)]
+            self.screen.erase()
+
+    def erase(self):
+        """
+        Clears the back buffer, follows window size changes.
+        """
+        if self.screen.getmaxyx() != (self.height, self.width):
+            self.resize()
+        self.back = [[self.blank] * self.width for _ in range(self.height)]
+
+    def refresh(self):
+        """
+        Flushes the cells that changed since the last frame to the window.
+        Idle frames do not touch curses at all.
+        """
+        self.frames += 1
+        self.cells_flushed = 0
+        self.bytes_flushed = 0
+        for y in range(self.height):
+            back_row = self.back[y]
+            front_row = self.front[y]
+            if back_row == front_row:
+                continue
+            for x, text, attr in self._row_runs(back_row, front_row):
+                self.cells_flushed += len(text)
+                self.bytes_flushed += len(text.encode("utf-8"))
+                try:
+                    self.screen.addstr(y, x, text, attr)
+                except curses.error:
+                    pass  # Writing the last cell of the window always errors, the cell is still drawn
+            self.front[y] = back_row[:]
+        if self.cells_flushed:
+            self.screen.refresh()
+
+    def _row_runs(self, back_row: list[tuple[str, int]], front_row: list[tuple[str, int]]):
+        """
+        Yields (x, text, attr) runs of changed cells sharing the same attribute.
+        """
+        x = 0
+        while x < self.width:
+            if back_row[x] == front_row[x]:
+                x += 1
+                continue
+            start = x - 1 if back_row[x][0] == WIDE_TAIL and x > 0 else x  # Include the left half of wide chars
+            attr = back_row[start][1]
+            chars = list()
+            x = start
+            while x < self.width:
+                cell = back_row[x]
+                if cell[1] != attr or (x > start and cell == front_row[x] and cell[0] != WIDE_TAIL):
+                    break
+                chars.append(cell[0])
+                x += 1
+            yield start, "".join(chars), attr
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+MONEY_SYMBOL = "🪙"
+
 
 @dataclass
 class Resource:
@@ -28,16 +30,16 @@ class Resource:
         self.amount -= min(amount, self.amount)
 
 
-@dataclass
 class Resources:
     """
-    Singleton class holding all information on resources for the game's needs.
+    All resources of a single game, every GameManager owns its own.
     """
-    money = Resource("Money", "🪙", 50)
-    food = Resource("Food", "🍖", 0)
-    military = Resource("Military", "🪖", 0)
-    knowledge = Resource("Knowledge", "🧠", 0)
-    __instance = None
+
+    def __init__(self):
+        self.money = Resource("Money", MONEY_SYMBOL, 50)
+        self.food = Resource("Food", "🍖", 0)
+        self.military = Resource("Military", "🪖", 0)
+        self.knowledge = Resource("Knowledge", "🧠", 0)
 
     def __iter__(self):
         yield from [self.money,
@@ -54,13 +56,3 @@ class Resources:
         Returns the first building found with the given name (could pose trouble with duplicate buildings)
         """
         return [resource for resource in self if resource.name.lower() == name.lower()][0]
-
-    @staticmethod
-    def get_instance():
-        """
-        Initializes an instance of Resources if it's not already made, else gives a reference to the one active.
-        Enables singleton acting.
-        """
-        if Resources.__instance is None:
-            Resources.__instance = Resources()
-        return Resources.__instance
@@ -0,0 +1,76 @@
+import random
+from collections import deque
+
+
+class TextSampler:
+    """
+    Endless random draws of indices in range(size) that never repeat within the last `window` draws.
+
+    Works as a lazy Fisher-Yates shuffle over a virtual array: positions below `boundary` hold the
+    indices that can be drawn, the most recent draws sit (virtually) above it. Only positions holding
+    something other than their own index are stored, which is never more than `window` of them.
+    Each draw is O(1) time and the extra memory is O(window), whatever the size of the pool.
+    """
+
+    def __init__(self, size: int, window: int, rng: random.Random):
+        self.size = size
+        self.window = max(min(window, size - 1), 0)
+        self.rng = rng
+        self.boundary = size
+        self.overrides: dict[int, int] = dict()
+        self.recent: deque[int] = deque()
+
+    def _get(self, position: int) -> int:
+        return self.overrides.get(position, position)
+
+    def _place(self, position: int, index: int):
+        if index == position:
+            self.overrides.pop(position, None)
+        else:
+            self.overrides[position] = index
+
+    def draw(self) -> int:
+        """
+        Returns the next index.
+        """
+        if not self.size:
+            raise IndexError("draw from an empty pool")
+        position = self.rng.randrange(self.boundary)
+        drawn = self._get(position)
+        if self.window:
+            self._move(position, drawn)
+        return drawn
+
+    def take(self, index: int) -> bool:
+        """
+        Draws the given index as if draw had returned it, so picks made elsewhere share the window.
+        Returns False without drawing it when it is among the recent draws.
+        """
+        if index in self.recent:
+            return False
+        if not self.window:
+            return True
+        if index < self.boundary and index not in self.overrides:
+            position = index
+        else:  # Another index sits at its own position, it was moved to one of the overridden ones
+            position = next(position for position, held in self.overrides.items() if held == index)
+        self._move(position, index)
+        return True
+
+    def _move(self, position: int, drawn: int):
+        """
+        Takes the index drawn from position out of the drawable ones until it leaves the window.
+        """
+        if len(self.recent) < self.window:  # Filling the window, the drawn index moves above the boundary
+            last = self.boundary - 1
+            if position != last:
+                self._place(position, self._get(last))
+            self.overrides.pop(last, None)
+            self.boundary -= 1
+        else:  # The oldest recent index takes the drawn one's place
+            oldest = self.recent.popleft()
+            if oldest >= self.boundary or oldest == position:
+                self._place(position, oldest)
+            else:  # Send oldest back to its own position, whatever held that one fills the gap
+                self._place(position, self.overrides.pop(oldest))
+        self.recent.append(drawn)
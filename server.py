@@ -0,0 +1,363 @@
+import argparse
+import asyncio
+import curses
+import os
+import random
+import resource
+from time import monotonic, perf_counter, process_time, time
+
+import game_manager as gm
+from analytics import AnalyticsStore, weakness
+from ansi import ENTER_SCREEN, LEAVE_SCREEN, AnsiScreen
+from charset import CharsetIndex, CharsetLibrary
+from event_loop import FrameGovernor, TimerWheel
+from hot_reload import BuildingsReloader
+from main import KEYBOARD_LAYOUT, draw, schedule_timers
+from practice import PracticeSelector
+from renderer import Renderer
+
+DEFAULT_SIZE = (50, 160)  # Rows and columns used until the client reports its own
+HIGH_WATER = 256 * 1024  # Bytes queued for a client above which its frames are skipped
+CLIENT_TIMEOUT = 30.0  # Seconds a client may stay above HIGH_WATER before it is dropped
+REPORT_INTERVAL = 10.0
+
+QUERY_SIZE = "\x1b[18t"  # Terminal answers with ESC [ 8 ; rows ; cols t
+
+# Escape sequences the decoder turns into curses keycodes
+ESCAPE_KEYS: dict[str, int] = {
+    "[A": curses.KEY_UP,
+    "[B": curses.KEY_DOWN,
+    "[C": curses.KEY_RIGHT,
+    "[D": curses.KEY_LEFT,
+    "[5~": gm.KEY_PPAGE,
+    "[6~": gm.KEY_NPAGE,
+    "OP": gm.KEY_F1,
+    "[11~": gm.KEY_F1,
+}
+KEY_BACKSPACE = 263
+
+
+class KeyDecoder:
+    """
+    Turns the raw bytes a client terminal sends into curses keycodes and size reports.
+    """
+
+    def __init__(self):
+        self.pending = ""
+        self.size: tuple[int, int] | None = None  # Latest size the terminal reported
+
+    def feed(self, data: bytes) -> list[int]:
+        text = self.pending + data.decode("latin-1")
+        self.pending = ""
+        keys = list()
+        i = 0
+        while i < len(text):
+            char = text[i]
+            if char != "\x1b":
+                keys.append(KEY_BACKSPACE if char in "\x7f\x08" else ord(char))
+                i += 1
+                continue
+            if i + 1 == len(text):  # A lone escape at the end of a read is the Esc key
+                keys.append(27)
+                break
+            end = i + 2
+            if text[i + 1] == "[":  # CSI: parameters up to a final byte
+                while end < len(text) and not 0x40 <= ord(text[end]) <= 0x7e:
+                    end += 1
+                if end == len(text):  # Sequence split across reads
+                    self.pending = text[i:]
+                    break
+                end += 1
+            elif text[i + 1] == "O":  # SS3: a single final byte
+                if i + 2 == len(text):  # Sequence split across reads
+                    self.pending = text[i:]
+                    break
+                end = i + 3
+            sequence = text[i + 1:end]
+            if sequence.startswith("[8;") and sequence.endswith("t"):
+                rows, cols = sequence[3:-1].split(";")
+                self.size = (int(rows), int(cols))
+            elif sequence in ESCAPE_KEYS:
+                keys.append(ESCAPE_KEYS[sequence])
+            else:  # Esc followed by a normal key, or a sequence we don't know: pass it through as typed
+                keys.append(27)
+                end = i + 1
+            i = end
+        return keys
+
+
+class Session:
+    """
+    One client: its own game, renderer, timers and frame pacing, running as a single asyncio task.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, game: gm.GameManager,
+                 size: tuple[int, int] = DEFAULT_SIZE, reloader: BuildingsReloader | None = None):
+        self.reader = reader
+        self.writer = writer
+        self.game = game
+        self.screen = AnsiScreen(*size)
+        self.renderer = Renderer(self.screen)
+        self.timers = TimerWheel()  # Read by main.schedule_timers like an EventLoop's
+        self.governor = FrameGovernor()
+        self.decoder = KeyDecoder()
+        self.inbox: asyncio.Queue[tuple[bytes, float]] = asyncio.Queue()
+        self.backlogged_since: float | None = None
+        self.frames_skipped = 0
+        self.reloader = reloader
+
+    async def receive(self):
+        """
+        Moves whatever the client sends into the inbox stamped with its arrival time.
+        """
+        while data := await self.reader.read(4096):
+            self.inbox.put_nowait((data, time()))
+        self.inbox.put_nowait((b"", time()))
+
+    def flush(self) -> bool:
+        """
+        Draws and queues a frame unless the client is still behind on earlier ones.
+        Returns False once a client has been behind for longer than CLIENT_TIMEOUT.
+        """
+        if self.writer.transport.get_write_buffer_size() > HIGH_WATER:
+            self.frames_skipped += 1
+            now = monotonic()
+            if self.backlogged_since is None:
+                self.backlogged_since = now
+            return now - self.backlogged_since < CLIENT_TIMEOUT
+        self.backlogged_since = None
+        if self.reloader is not None:
+            self.reloader.apply(self.game)
+        draw(self.renderer, self.game)
+        data = self.screen.take()
+        if data:
+            self.writer.write(data)
+        return True
+
+    async def run(self):
+        self.writer.write((ENTER_SCREEN + QUERY_SIZE).encode())
+        receiver = asyncio.create_task(self.receive())
+        try:
+            while self.flush():
+                timeout = self.governor.timeout(self.game.mode, self.timers.next_deadline())
+                try:
+                    batch = [await asyncio.wait_for(self.inbox.get(), timeout)]
+                except asyncio.TimeoutError:
+                    batch = list()
+                while not self.inbox.empty():  # Apply everything that arrived before drawing again
+                    batch.append(self.inbox.get_nowait())
+                self.timers.advance(monotonic())
+                if not self.handle(batch):
+                    break
+        finally:
+            receiver.cancel()
+            if not self.writer.is_closing():
+                self.writer.write(LEAVE_SCREEN.encode())
+                self.writer.close()
+
+    def handle(self, batch: list[tuple[bytes, float]]) -> bool:
+        """
+        Feeds a batch of received data through key_logic, returns False once the session is over.
+        """
+        handled = False
+        for data, arrival in batch:
+            if not data:  # Client went away
+                return False
+            for key in self.decoder.feed(data):
+                handled = True
+                try:
+                    self.game.key_logic(key, arrival)
+                except KeyboardInterrupt:
+                    return False
+        if self.decoder.size is not None and self.decoder.size != self.screen.getmaxyx():
+            self.screen.height, self.screen.width = self.decoder.size
+        if handled:
+            schedule_timers(self, self.game)
+        return True
+
+
+def rss_bytes() -> int:
+    """
+    Resident memory of this process, falling back to the peak where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class GameServer:
+    """
+    Accepts clients on a TCP or Unix socket and runs a Session for each of them.
+    """
+
+    def __init__(self, size: tuple[int, int] = DEFAULT_SIZE, analytics_path: str | None = None,
+                 unlocked_texts: bool = False):
+        self.size = size
+        self.analytics_path = analytics_path
+        self.unlocked_texts = unlocked_texts
+        self.sessions: set[Session] = set()
+        self.served = 0
+        self.base_rss = rss_bytes()
+        self.reloader: BuildingsReloader | None = None  # One watcher for every session, started by serve
+        self.analytics: AnalyticsStore | None = None  # One writer thread for every session, started by serve
+        self.charset: CharsetLibrary | None = None  # Text groups shared by every session, built by serve
+
+    def new_game(self) -> gm.GameManager:
+        """
+        A game loaded from the reloader's latest parse, sharing its records and build menu with every other game.
+        Runs on a worker thread, the event loop keeps serving the other sessions meanwhile.
+        """
+        game = gm.GameManager(KEYBOARD_LAYOUT, load=False)
+        latest = self.reloader.latest if self.reloader is not None else None
+        if latest is None:  # The asset at start was broken, every game reports it reading the file
+            game.load_assets()
+        else:
+            version, records, _, catalog = latest
+            game.load_assets(records, catalog)
+            game.buildings.version = version
+        return game
+
+    def charset_library(self) -> CharsetLibrary:
+        """
+        Text groups of the buildings new games load, built once on a worker thread before clients are accepted.
+        """
+        game = self.new_game()
+        return CharsetLibrary(game.keyboard.layout, game.buildings)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        game = await asyncio.to_thread(self.new_game)
+        session = Session(reader, writer, game, self.size, reloader=self.reloader)
+        if self.unlocked_texts:
+            session.game.buildings.charset = CharsetIndex(self.charset, session.game.buildings.rng)
+        if self.analytics is not None:  # Clients are anonymous, their statistics are kept per address
+            peer = writer.get_extra_info("peername")
+            player = peer[0] if isinstance(peer, tuple) else "local"
+            session.game.analytics = self.analytics.session(player, session.game.seed)
+            history = await asyncio.to_thread(weakness, self.analytics_path, player)
+            session.game.buildings.practice = PracticeSelector(history, session.game.buildings.rng)
+        self.sessions.add(session)
+        self.served += 1
+        try:
+            await session.run()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.sessions.discard(session)
+
+    def stats(self, cpu_seconds: float, wall_seconds: float) -> dict:
+        """
+        Load figures over the last interval: busy cores, sessions a fully busy core could host and memory per session.
+        """
+        sessions = len(self.sessions)
+        cores_busy = cpu_seconds / max(wall_seconds, 1e-9)
+        return {
+            "sessions": sessions,
+            "served": self.served,
+            "cores_busy": cores_busy,
+            "sessions_per_core": sessions / cores_busy if cores_busy else 0.0,
+            "memory_per_session": (rss_bytes() - self.base_rss) / sessions if sessions else 0.0,
+            "frames_skipped": sum(session.frames_skipped for session in self.sessions),
+        }
+
+    async def report(self, interval: float):
+        cpu, wall = process_time(), perf_counter()
+        while True:
+            await asyncio.sleep(interval)
+            stats = self.stats(process_time() - cpu, perf_counter() - wall)
+            cpu, wall = process_time(), perf_counter()
+            print(f"Sessions: {stats['sessions']} (served {stats['served']}) | "
+                  f"Cores busy: {stats['cores_busy']:.2f} | Sessions per core: {stats['sessions_per_core']:.0f} | "
+                  f"Memory per session: {stats['memory_per_session'] / 1024:.0f} KiB | "
+                  f"Skipped frames: {stats['frames_skipped']}", flush=True)
+            if self.reloader is not None and self.reloader.error is not None:
+                print(f"Buildings not reloaded: {self.reloader.error}", flush=True)
+            if self.analytics is not None and self.analytics.error is not None:
+                print(f"Analytics not written: {self.analytics.error}", flush=True)
+
+    async def serve(self, host: str, port: int, unix_path: str | None = None, interval: float = REPORT_INTERVAL):
+        self.reloader = BuildingsReloader(gm.BUILDINGS_FILE_PATH)
+        if self.analytics_path is not None:
+            self.analytics = AnalyticsStore(self.analytics_path)
+        reporter = None
+        try:
+            await asyncio.to_thread(self.reloader.ready.wait)  # New games load from its parse
+            if self.unlocked_texts:
+                self.charset = await asyncio.to_thread(self.charset_library)
+            if unix_path is not None:
+                server = await asyncio.start_unix_server(self.handle_client, unix_path)
+            else:
+                server = await asyncio.start_server(self.handle_client, host, port)
+            reporter = asyncio.create_task(self.report(interval))
+            async with server:
+                await server.serve_forever()
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+            self.reloader.close()
+            if self.analytics is not None:
+                self.analytics.close()
+
+
+async def load_client(host: str, port: int, unix_path: str | None, keys_per_second: float, duration: float,
+                      rng: random.Random):
+    """
+    Synthetic player: confirms the intro, then presses random letters, Tab and Backspace and discards the frames.
+    """
+    if unix_path is not None:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    async def discard():
+        while await reader.read(65536):
+            pass
+
+    sink = asyncio.create_task(discard())
+    writer.write(gm.CONFIRM_MESSAGE.encode())
+    keys = "fjgh" * 4 + "asdkl" + "\t\x7f"
+    end = monotonic() + duration
+    while monotonic() < end and not sink.done():
+        writer.write(rng.choice(keys).encode())
+        await asyncio.sleep(rng.expovariate(keys_per_second))
+    writer.close()
+    sink.cancel()
+
+
+async def load(host: str, port: int, unix_path: str | None, clients: int, keys_per_second: float,
+               duration: float):
+    await asyncio.gather(*(load_client(host, port, unix_path, keys_per_second, duration, random.Random(i))
+                           for i in range(clients)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many Keyboard Kingdoms sessions in one process.",
+                                     epilog="Play from a raw terminal, e.g. socat -,rawer TCP:127.0.0.1:7777")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--size", default=f"{DEFAULT_SIZE[0]}x{DEFAULT_SIZE[1]}",
+                        help="rows x columns for clients that don't report their size")
+    parser.add_argument("--report", type=float, default=REPORT_INTERVAL, help="seconds between load reports")
+    parser.add_argument("--load", type=int, metavar="CLIENTS",
+                        help="instead of serving, connect this many synthetic players to a running server")
+    parser.add_argument("--keys-per-second", type=float, default=5.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--analytics", metavar="PATH", help="add typing statistics of every session to PATH")
+    parser.add_argument("--unlocked-texts", action="store_true",
+                        help="only hand out texts typeable with the unlocked keys where a building has one")
+    args = parser.parse_args()
+
+    try:
+        if args.load:
+            asyncio.run(load(args.host, args.port, args.unix, args.load, args.keys_per_second, args.duration))
+        else:
+            rows, cols = (int(value) for value in args.size.split("x"))
+            asyncio.run(GameServer((rows, cols), args.analytics, args.unlocked_texts).serve(args.host, args.port, args.unix, args.report))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
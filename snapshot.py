@@ -0,0 +1,220 @@
+import json
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from time import time
+from typing import Callable
+
+import game_manager as gm
+from colors import Colors
+from typing_state import TypingState
+
+# File layout: header | zlib compressed json of the captured state
+MAGIC = b"KKS1"
+VERSION = 3
+HEADER = struct.Struct("<4sH")  # magic, version
+AUTOSAVE_INTERVAL = 5.0  # Seconds between background saves while the game is changing
+
+
+class SnapshotError(Exception):
+    """
+    Raised when a snapshot file is not one this version can restore.
+    """
+
+
+def capture_typing(typing: TypingState, now: float) -> dict:
+    return {
+        "captured_at": now,
+        "text": typing.text,
+        "start_time": typing.start_time,
+        "typed": "".join(typing.typed),
+        "mismatches": typing.mismatches.hex(),
+        "mismatch_count": typing.mismatch_count,
+        "correct_prefix": typing.correct_prefix,
+        "mistakes": typing.mistakes,
+        "keystroke_times": list(typing.keystroke_times),
+        "keystroke_hits": list(typing.keystroke_hits),
+        "window_hits": typing.window_hits,
+    }
+
+
+def restore_typing(state: dict, now: float) -> TypingState:
+    """
+    Rebuilds a TypingState with its times moved to now, so the time the game was closed doesn't count towards WPM.
+    """
+    shift = now - state["captured_at"]
+    typing = TypingState(state["text"], state["start_time"] + shift)
+    typing.typed = list(state["typed"])
+    typing.mismatches = bytearray.fromhex(state["mismatches"])
+    typing.mismatch_count = state["mismatch_count"]
+    typing.correct_prefix = state["correct_prefix"]
+    typing.mistakes = state["mistakes"]
+    typing.keystroke_times.extend(arrival + shift for arrival in state["keystroke_times"])
+    typing.keystroke_hits.extend(state["keystroke_hits"])
+    typing.window_hits = state["window_hits"]
+    return typing
+
+
+def capture(game: gm.GameManager) -> dict:
+    """
+    Copies the whole game state into plain data. Cheap enough for the frame loop, nothing is encoded here.
+    """
+    phases = game.phases
+    return {
+        "seed": game.seed,
+        "layout": game.keyboard.layout.rows,
+        "mode": game.mode,
+        "day": phases.day,
+        "phase": phases.phases.index(phases.current_phase),
+        "resources": [resource.amount for resource in game.resources],
+        "locked": game.keyboard.locked,
+        "active": game.keyboard.active,
+        "buildings": [key.building.id if key.building is not None else None for key in game.keyboard.keys],
+        "building_costs": [key.building.purchase_cost if key.building is not None else 0 for key in game.keyboard.keys],
+        "rng": game.buildings.rng.getstate(),
+        "samplers": {building.id: (building.sampler.size, building.sampler.boundary,
+                                   list(building.sampler.overrides.items()), list(building.sampler.recent))
+                     for building in game.buildings},
+        "current_key": game.current_key.char if game.current_key is not None else None,
+        "current_text": game.current_text,
+        "current_input": "".join(game.current_input),
+        "build_page": game.build_page,
+        "typing": capture_typing(game.typing, game.clock()) if game.typing is not None else None,
+        "type_time": game.type_time,
+        "wpm": game.wpm,
+        "mistake_ratio": game.mistake_ratio,
+        "threat": game.threat,
+        "battle_report": list(game.battle_report) if game.battle_report is not None else None,
+    }
+
+
+def restore(state: dict, clock: Callable[[], float] = time) -> gm.GameManager:
+    """
+    Builds a GameManager in exactly the captured state, text pools continue where they were.
+    An asset edited since loses what no longer fits: a building whose texts changed in number starts a fresh
+    sampler, a building removed from the asset is taken off its key and its price refunded.
+    """
+    game = gm.GameManager(list(state["layout"]), state["seed"], clock)
+    game.mode = state["mode"]
+    game.phases.day = state["day"]
+    game.phases.current_phase = game.phases.phases[state["phase"]]
+    for resource, amount in zip(game.resources, state["resources"]):
+        resource.amount = amount
+    game.keyboard.locked = state["locked"]
+    game.keyboard.active = state["active"]
+    for key, building_id, cost in zip(game.keyboard.keys, state["buildings"], state["building_costs"]):
+        if building_id is None:
+            continue
+        key.building = game.buildings.find_building_by_id(building_id)
+        if key.building is None:
+            game.resources.money.add(cost)
+            game.add_message(f"'{building_id}' was removed from the game, key '{key.char.upper()}' refunded "
+                             f"{cost}{game.resources.money.symbol}.", Colors.ERROR.pair)
+
+    version, internal, gauss = state["rng"]
+    game.buildings.rng.setstate((version, tuple(internal), gauss))
+    for building in game.buildings:
+        if building.id not in state["samplers"]:  # Added to the asset after the snapshot was taken
+            continue
+        size, boundary, overrides, recent = state["samplers"][building.id]
+        if size != len(building.texts):  # The saved positions may point past the texts there are now
+            continue
+        building.sampler.boundary = boundary
+        building.sampler.overrides = dict((position, index) for position, index in overrides)
+        building.sampler.recent.extend(recent)
+
+    game.current_key = game.keyboard.get_by_char(state["current_key"]) if state["current_key"] else None
+    game.current_text = state["current_text"]
+    game.current_input = list(state["current_input"])
+    if game.mode == gm.MODE_BUILDING_SELECT:
+        game.build_cursor = game.buildings.index.cursor()
+        for char in game.current_input:
+            game.build_cursor.push(char)
+    game.build_page = state["build_page"]
+    game.typing = restore_typing(state["typing"], clock()) if state["typing"] is not None else None
+    game.type_time = state["type_time"]
+    game.wpm = state["wpm"]
+    game.mistake_ratio = state["mistake_ratio"]
+    game.threat = state["threat"]
+    game.battle_report = state["battle_report"]
+    return game
+
+
+def encode(state: dict) -> bytes:
+    return HEADER.pack(MAGIC, VERSION) + zlib.compress(json.dumps(state, separators=(",", ":")).encode("utf-8"))
+
+
+def decode(data: bytes) -> dict:
+    if len(data) < HEADER.size:
+        raise SnapshotError("snapshot is truncated")
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise SnapshotError(f"not a version {VERSION} snapshot")
+    try:
+        return json.loads(zlib.decompress(data[HEADER.size:]))
+    except (zlib.error, ValueError) as error:
+        raise SnapshotError(f"snapshot is corrupt: {error}") from error
+
+
+def write(path: str | Path, state: dict):
+    """
+    Encodes and writes a captured state, atomically replacing the previous snapshot.
+    """
+    path = Path(path)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(encode(state))
+        f.flush()
+        os.fsync(f.fileno())
+    tmp_path.replace(path)
+
+
+def load(path: str | Path, clock: Callable[[], float] = time) -> gm.GameManager:
+    return restore(decode(Path(path).read_bytes()), clock)
+
+
+class SnapshotWriter:
+    """
+    Background thread encoding and writing snapshots. Only the newest pending capture is kept,
+    so a slow disk skips intermediate saves instead of queueing them.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.pending: dict | None = None
+        self.closed = False
+        self.written = 0
+        self.error: OSError | None = None
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, state: dict):
+        with self.condition:
+            self.pending = state
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                state, self.pending = self.pending, None
+                if state is None:
+                    return
+            try:
+                write(self.path, state)
+                self.written += 1
+            except OSError as error:
+                self.error = error
+
+    def close(self):
+        """
+        Writes whatever is still pending and stops the thread.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
@@ -0,0 +1,444 @@
+import argparse
+from bisect import bisect_right
+from dataclasses import dataclass
+from heapq import nlargest
+from math import ceil
+from time import perf_counter
+from typing import Iterator
+
+import game_manager as gm
+from buildings import Buildings
+from layout import compile_layout
+from resources import Resources
+
+DAY_PHASES = 3  # Phases with work before every night
+MAX_LAYER = 5_000  # States kept per phase, above it the search stops being exhaustive
+PRUNE_LIMIT = 40_000  # Successors compared for dominance at once, the rest are cut first
+
+
+@dataclass(frozen=True)
+class BuildingRule:
+    """
+    A building type reduced to what the rules look at, output already scaled by the assumed accuracy.
+    """
+    id: str
+    cost: int
+    output_resource: int
+    output: int
+    input_resource: int | None
+    input_amount: int
+
+
+@dataclass(frozen=True)
+class Rules:
+    """
+    Everything the solver needs from buildings.json, the layout and the balancing constants.
+    """
+    resources: tuple[str, ...]
+    buildings: tuple[BuildingRule, ...]
+    start_amounts: tuple[int, ...]
+    start_buildings: tuple[str, ...]
+    start_unlocked: int
+    unlock_cumulative: tuple[int, ...]  # Total cost of unlocking the n cheapest locked keys
+    days: int = gm.DAYS_TO_SURVIVE
+    threat_starter: float = gm.THREAT_STARTER
+    threat_modifier: float = gm.THREAT_MODIFIER
+
+    @classmethod
+    def load(cls, file_path: str = gm.BUILDINGS_FILE_PATH, layout: list[str] = gm.KEYBOARD_LAYOUT,
+             accuracy: float = 1.0, **constants) -> "Rules":
+        resources = Resources()
+        names = [resource.name for resource in resources]
+        buildings = tuple(
+            BuildingRule(building.id, building.purchase_cost, names.index(building.output_resource.name),
+                         int(round(building.output_amount * accuracy)),  # GameManager.logic_checks rounding
+                         names.index(building.input_resource.name) if building.input_resource else None,
+                         building.input_amount or 0)
+            for building in Buildings(file_path, resources, 0))
+        keyboard_layout = compile_layout(layout, gm.CENTER_KEYS)
+        locked_costs = sorted(cost for char, cost in zip(keyboard_layout.chars, keyboard_layout.unlock_costs)
+                              if char not in keyboard_layout.center_keys)
+        cumulative = [0]
+        for cost in locked_costs:
+            cumulative.append(cumulative[-1] + cost)
+        return cls(tuple(names), buildings, tuple(resource.amount for resource in resources),
+                   ("low_food", "low_money"),  # Keyboard.starting_keys
+                   len(keyboard_layout.center_keys), tuple(cumulative), **constants)
+
+    def threat(self, day: int) -> int:
+        """
+        Same curve as GameManager.calculate_threat.
+        """
+        return int(round((day * self.threat_starter) * (self.threat_modifier ** day)))
+
+
+@dataclass
+class Solution:
+    score: int | None  # Money at the end of the campaign, None if no plan survives
+    plan: list[tuple[int, int, int, dict[str, int]]]  # Day, phase, unlocked keys, buildings built
+    final_buildings: dict[str, int]
+    states: int  # States expanded over all layers
+    largest_layer: int
+    time: float
+    exact: bool  # False if some layer had to be cut down to max_layer
+
+
+@dataclass(frozen=True)
+class Bundle:
+    """
+    Buildings of one group built together in a phase.
+    """
+    cost: int
+    keys: int
+    output: int  # Per activation
+    counts: tuple[tuple[int, int], ...]  # Building index, count
+    payback: float  # Phases the slowest building needs to earn back its cost
+    smallest: int  # Output of the weakest building
+
+
+def efficient_bundles(rules: Rules, indices: list[int], max_keys: int) -> list[Bundle]:
+    """
+    Bundles of the given building types which no other bundle beats on cost, keys and output together,
+    sorted by cost. Four Markets are never worth it next to one Bank, so their bundles never show up.
+    """
+    buildings = [rules.buildings[index] for index in indices]
+    bundles = list()
+
+    def collect(first: int, keys: int, counts: tuple[tuple[int, int], ...]):
+        if first == len(indices):
+            chosen = [(buildings[indices.index(index)], count) for index, count in counts]
+            bundles.append(Bundle(sum(building.cost * count for building, count in chosen),
+                                  sum(count for _, count in chosen),
+                                  sum(building.output * count for building, count in chosen), counts,
+                                  max((building.cost / max(building.output, 1) for building, _ in chosen), default=0),
+                                  min((building.output for building, _ in chosen), default=0)))
+            return
+        for count in range(max_keys - keys + 1):
+            collect(first + 1, keys + count, counts + (((indices[first], count),) if count else ()))
+
+    collect(0, 0, ())
+    bundles.sort(key=lambda bundle: (bundle.cost, bundle.keys, -bundle.output))
+    best_output = [-1] * (max_keys + 1)  # Best output per key count among the cheaper bundles
+    efficient = list()
+    for bundle in bundles:
+        if max(best_output[:bundle.keys + 1]) >= bundle.output and bundle.keys:
+            continue
+        efficient.append(bundle)
+        best_output[bundle.keys] = max(best_output[bundle.keys], bundle.output)
+    return efficient
+
+
+class Solver:
+    """
+    Layered search over abstract game states, one layer per day phase.
+
+    Any resource is only ever good to have, so every building that can be activated is activated
+    and food is always turned into military. What remains to decide each phase is what to build. Keys are only
+    unlocked to build on them right away, always the cheapest ones, since unlocking later costs the same.
+    Within a phase the player activates what is built, builds, then activates the new buildings and converts food.
+    Builds come as bundles per group of buildings producing the same resource, leaving out bundles another one
+    beats on cost, keys and output, and bundles with more than the rest of the campaign can use.
+
+    A state keeps resources, income per phase of the buildings without input, counts of the converting buildings,
+    empty keys and unlocked keys, with anything beyond what can still be used cut off. Different keyboards with
+    the same numbers share one entry of the layer's transposition table. A state is pruned when another in its
+    layer is at least as good in every number, as it can then copy anything the dominated state does.
+    Layers above max_layer keep the states richest at the end if they stopped building, the result is
+    then only the best order found.
+    """
+
+    def __init__(self, rules: Rules, max_layer: int = MAX_LAYER, banned: frozenset[str] = frozenset()):
+        self.rules = rules
+        self.max_layer = max_layer
+        self.resource_count = len(rules.resources)
+        self.converters = [index for index, building in enumerate(rules.buildings)
+                           if building.input_resource is not None]
+        self.converters.sort(key=lambda index: -rules.buildings[index].input_amount)  # Big batches first
+        self.fuel = {rules.buildings[index].input_resource for index in self.converters}
+        self.fuel_ratio = max((rules.buildings[index].input_amount / max(rules.buildings[index].output, 1)
+                               for index in self.converters), default=0)
+        self.money = rules.resources.index("Money")
+        self.military = rules.resources.index("Military")
+        self.knowledge = rules.resources.index("Knowledge")
+        # Highest threat of the nights from a day on, military above it is never needed
+        self.max_threat = [0] * (rules.days + 2)
+        for day in range(rules.days, 0, -1):
+            self.max_threat[day] = max(rules.threat(day), self.max_threat[day + 1])
+        # Buildings without input are grouped by what they produce, converters stay on their own
+        max_keys = rules.start_unlocked + len(rules.unlock_cumulative) - 1
+        producers: dict[int, list[int]] = dict()
+        for index, building in enumerate(rules.buildings):
+            if building.input_resource is None and building.id not in banned:
+                producers.setdefault(building.output_resource, list()).append(index)
+        self.groups = [(resource, efficient_bundles(rules, indices, max_keys))
+                       for resource, indices in producers.items()]
+        self.groups.extend((rules.buildings[index].output_resource, efficient_bundles(rules, [index], max_keys))
+                           for index in self.converters if rules.buildings[index].id not in banned)
+
+    def start(self) -> tuple[int, ...]:
+        count = self.resource_count
+        state = list(self.rules.start_amounts) + [0] * count + [0] * len(self.converters) + [0, 0]
+        for building_id in self.rules.start_buildings:
+            self._place(state, next(index for index, building in enumerate(self.rules.buildings)
+                                    if building.id == building_id), 1)
+        state[-2] = self.rules.start_unlocked - len(self.rules.start_buildings)
+        return tuple(state)
+
+    def _place(self, state: list[int], index: int, count: int):
+        """
+        Adds count buildings of one type to the state's incomes or converter counts.
+        """
+        building = self.rules.buildings[index]
+        if building.input_resource is None:
+            state[self.resource_count + building.output_resource] += building.output * count
+        else:
+            state[2 * self.resource_count + self.converters.index(index)] += count
+
+    def options(self, state: list[int], unlocked: int, knowledge: int, day: int,
+                phases_left: int) -> list[list[Bundle]]:
+        """
+        Bundles worth building per group in this state, anything else only costs money and keys.
+        A bundle is left out when it still covers what its resource is needed for without one of its buildings:
+        military and its fuel up to the highest threat ahead, knowledge up to the locked keys' cost.
+        Money bundles have to earn back every building's cost in the phases left.
+        """
+        rules = self.rules
+        military_need = self.max_threat[day] - state[self.military]
+        needs = {
+            self.military: military_need,
+            self.knowledge: rules.unlock_cumulative[-1] - rules.unlock_cumulative[unlocked] - knowledge,
+        }
+        for resource in self.fuel:
+            needs[resource] = military_need * self.fuel_ratio - state[resource]
+        options = list()
+        for resource, bundles in self.groups:
+            if resource == self.money:
+                options.append([bundle for bundle in bundles if bundle.payback < phases_left])
+            else:
+                need = needs.get(resource)
+                options.append([bundle for bundle in bundles if not bundle.keys or need is None
+                                or (bundle.output - bundle.smallest) * phases_left < need])
+        return options
+
+    def _builds(self, options: list[list[Bundle]], money: int, slots: int, first: int = 0) -> Iterator[dict]:
+        """
+        Every affordable combination of one bundle per group, as counts per building type.
+        """
+        if first == len(options):
+            yield dict()
+            return
+        for bundle in options[first]:  # Sorted by cost
+            if bundle.cost > money:
+                break
+            if bundle.keys > slots:
+                continue
+            for rest in self._builds(options, money - bundle.cost, slots - bundle.keys, first + 1):
+                rest.update(bundle.counts)
+                yield rest
+
+    def canonical(self, state: list[int], day: int) -> tuple[int, ...]:
+        """
+        Forgets what can't matter any more from day on, so equivalent states meet in the transposition table
+        and dominate each other more often.
+        """
+        count = self.resource_count
+        rules = self.rules
+        military_need = self.max_threat[day] - state[self.military]
+        if military_need <= 0:
+            state[self.military] = self.max_threat[day]
+            for resource in self.fuel:
+                state[resource] = state[count + resource] = 0
+            for slot in range(len(self.converters)):
+                state[2 * count + slot] = 0
+        else:  # Fuel and converters beyond what the remaining military needs are never used
+            for resource in self.fuel:
+                state[resource] = min(state[resource], ceil(military_need * self.fuel_ratio))
+            for slot, index in enumerate(self.converters):
+                state[2 * count + slot] = min(state[2 * count + slot],
+                                              -(-military_need // max(rules.buildings[index].output, 1)))
+        locked_cost = rules.unlock_cumulative[-1] - rules.unlock_cumulative[state[-1]]
+        if state[self.knowledge] >= locked_cost:
+            state[self.knowledge] = locked_cost
+            if not locked_cost:
+                state[count + self.knowledge] = 0
+        return tuple(state)
+
+    def expand(self, state: tuple[int, ...], day: int, phases_left: int) -> Iterator[tuple[tuple, list[int]]]:
+        """
+        Yields (action, next state) for every sensible way to play one day phase from state.
+        phases_left counts the day phases until the end of the campaign, this one included.
+        """
+        count = self.resource_count
+        rules = self.rules
+        base = list(state)
+        for resource in range(count):  # Activate every building without input
+            base[resource] += base[count + resource]
+        unlocked = base[-1]
+        cumulative = rules.unlock_cumulative
+        affordable = bisect_right(cumulative, cumulative[unlocked] + base[self.knowledge]) - 1 - unlocked
+        options = self.options(base, unlocked, base[self.knowledge], day, phases_left)
+        for built in self._builds(options, base[self.money], base[-2] + affordable):
+            after = list(base)
+            for index, amount in built.items():
+                building = rules.buildings[index]
+                after[-2] -= amount
+                after[self.money] -= building.cost * amount
+                self._place(after, index, amount)
+                if building.input_resource is None:  # Built this phase, still active
+                    after[building.output_resource] += building.output * amount
+            unlocks = max(-after[-2], 0)  # Only keys that get a building right away
+            after[self.knowledge] -= cumulative[unlocked + unlocks] - cumulative[unlocked]
+            after[-1] += unlocks
+            after[-2] += unlocks
+            for slot, index in enumerate(self.converters):
+                building = rules.buildings[index]
+                activations = min(after[2 * count + slot], after[building.input_resource] // building.input_amount)
+                after[building.input_resource] -= activations * building.input_amount
+                after[building.output_resource] += activations * building.output
+            yield (unlocks, built), after
+
+    def night(self, state: list[int], day: int) -> bool:
+        """
+        resolve_night_battle, False if the city falls.
+        """
+        threat = self.rules.threat(day)
+        if state[self.military] < threat:
+            return False
+        state[self.knowledge] += threat
+        return True
+
+    def cut(self, layer: dict[tuple, tuple], size: int, phases_left: int) -> dict[tuple, tuple]:
+        """
+        Keeps the size states which would end with the most money if they stopped building.
+        """
+        income = self.resource_count + self.money
+        kept = nlargest(size, layer, key=lambda state: state[self.money] + state[income] * phases_left)
+        return {state: layer[state] for state in kept}
+
+    @staticmethod
+    def prune(layer: dict[tuple, tuple]) -> dict[tuple, tuple]:
+        """
+        Drops every state dominated by another state of the layer.
+        A dominating state sorts before the ones it dominates, so with states in descending order
+        the candidates dominating a state are the ones before it. Per dimension those at least as good are
+        intersected as a bitset, a state survives when only its own bit is left.
+        """
+        states = sorted(layer, reverse=True)
+        own = [1 << position for position in range(len(states))]
+        dominators = [(bit << 1) - 1 for bit in own]
+        for dimension in range(len(states[0]) if states else 0):
+            order = sorted(range(len(states)), key=lambda position: states[position][dimension], reverse=True)
+            mask = 0
+            start = 0
+            while start < len(order):
+                value = states[order[start]][dimension]
+                end = start
+                while end < len(order) and states[order[end]][dimension] == value:
+                    mask |= own[order[end]]
+                    end += 1
+                for position in order[start:end]:
+                    if dominators[position] != own[position]:
+                        dominators[position] &= mask
+                start = end
+        return {state: layer[state] for state, bit, mask in zip(states, own, dominators) if mask == bit}
+
+    def solve(self) -> Solution:
+        start_time = perf_counter()
+        rules = self.rules
+        layer: dict[tuple, tuple] = {self.start(): (None, None)}
+        history: list[dict[tuple, tuple]] = [layer]
+        expanded = 0
+        largest = 1
+        exact = True
+        for day in range(1, rules.days + 1):
+            for phase in range(DAY_PHASES):
+                phases_left = (rules.days - day) * DAY_PHASES + DAY_PHASES - phase
+                following: dict[tuple, tuple] = dict()
+                for state in layer:
+                    expanded += 1
+                    for action, after in self.expand(state, day, phases_left):
+                        if phase == DAY_PHASES - 1:
+                            if not self.night(after, day):
+                                continue
+                            after = self.canonical(after, day + 1)
+                        else:
+                            after = self.canonical(after, day)
+                        if after not in following:  # Transposition, the first path to a state is kept
+                            following[after] = (state, action)
+                largest = max(largest, len(following))
+                if len(following) > PRUNE_LIMIT:
+                    exact = False
+                    following = self.cut(following, PRUNE_LIMIT, phases_left - 1)
+                layer = self.prune(following)
+                if len(layer) > self.max_layer:
+                    exact = False
+                    layer = self.cut(layer, self.max_layer, phases_left - 1)
+                history.append(layer)
+                if not layer:
+                    return Solution(None, list(), dict(), expanded, largest, perf_counter() - start_time, exact)
+
+        best = max(layer, key=lambda state: state[self.money])
+        plan = list()
+        state = best
+        for step in range(len(history) - 1, 0, -1):
+            parent, (unlocks, built) = history[step][state]
+            day, phase = divmod(step - 1, DAY_PHASES)
+            plan.append((day + 1, phase, unlocks, {rules.buildings[index].id: amount
+                                                   for index, amount in sorted(built.items())}))
+            state = parent
+        plan.reverse()
+
+        final_buildings = {building_id: 0 for building_id in (building.id for building in rules.buildings)}
+        for building_id in rules.start_buildings:
+            final_buildings[building_id] += 1
+        for _, _, _, built in plan:
+            for building_id, amount in built.items():
+                final_buildings[building_id] += amount
+        return Solution(best[self.money], plan, final_buildings, expanded, largest, perf_counter() - start_time,
+                        exact)
+
+
+def report(solution: Solution):
+    print(f"States expanded: {solution.states} | Largest layer: {solution.largest_layer} | "
+          f"Time: {solution.time:.2f}s | {'Exact' if solution.exact else 'Best found, layers were cut'}")
+    if solution.score is None:
+        print("No build order survives every night.")
+        return
+    names = [phase.name for phase in gm.Phases.phases]
+    for day, phase, unlocks, built in solution.plan:
+        actions = [f"unlock {unlocks}"] if unlocks else list()
+        actions.extend(f"build {amount} {building_id}" for building_id, amount in built.items())
+        print(f"Day {day} {names[phase]:<10} {', '.join(actions) or '-'}")
+    print(f"Final money: {solution.score}")
+    print("Buildings: " + ", ".join(f"{building_id} {amount}"
+                                    for building_id, amount in solution.final_buildings.items() if amount))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the build order ending Keyboard Kingdoms with the most money.")
+    parser.add_argument("--accuracy", type=float, default=1.0, help="assumed typing accuracy of every activation")
+    parser.add_argument("--days", type=int, default=gm.DAYS_TO_SURVIVE)
+    parser.add_argument("--threat-starter", type=float, default=gm.THREAT_STARTER)
+    parser.add_argument("--threat-modifier", type=float, default=gm.THREAT_MODIFIER)
+    parser.add_argument("--max-layer", type=int, default=MAX_LAYER,
+                        help="states kept per phase, lower is faster but may miss the best order")
+    parser.add_argument("--ablate", action="store_true",
+                        help="solve again without each building type to spot strategies leaning on a single one")
+    args = parser.parse_args()
+
+    rules = Rules.load(accuracy=args.accuracy, days=args.days, threat_starter=args.threat_starter,
+                       threat_modifier=args.threat_modifier)
+    solution = Solver(rules, args.max_layer).solve()
+    report(solution)
+    if args.ablate and solution.score is not None:
+        print(f"{'without':<16}{'money':>8}{'change':>9}")
+        for building in rules.buildings:
+            banned = Solver(rules, args.max_layer, frozenset((building.id,))).solve()
+            if banned.score is None:
+                print(f"{building.id:<16}{'lost':>8}")
+            else:
+                print(f"{building.id:<16}{banned.score:>8}{banned.score / solution.score - 1:>+9.1%}")
+
+
+if __name__ == "__main__":
+    main()
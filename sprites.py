@@ -0,0 +1,97 @@
+import curses
+from collections import OrderedDict
+from typing import Hashable
+
+from renderer import TRANSPARENT, WIDE_TAIL, Pad
+
+SPRITE_CACHE_SIZE = 256  # Distinct key looks kept, a full keyboard in every state needs about 200
+
+
+class Sprite:
+    """
+    Pre-rendered block of cells. Each row is stored as spans of opaque cells for cell-grid blits
+    and as (x, text, attr) runs for plain curses windows.
+    """
+    __slots__ = ("height", "width", "spans", "runs")
+
+    def __init__(self, pad: Pad):
+        self.height = pad.height
+        self.width = pad.width
+        self.spans: list[list[tuple[int, list[tuple[str, int]]]]] = list()
+        self.runs: list[list[tuple[int, str, int]]] = list()
+        for row in pad.back:
+            spans = list()
+            runs = list()
+            x = 0
+            while x < pad.width:
+                if row[x] is TRANSPARENT:
+                    x += 1
+                    continue
+                start = x
+                while x < pad.width and row[x] is not TRANSPARENT:
+                    x += 1
+                spans.append((start, row[start:x]))
+                runs.extend(self._runs(row, start, x))
+            self.spans.append(spans)
+            self.runs.append(runs)
+
+    @staticmethod
+    def _runs(row: list[tuple[str, int]], start: int, end: int):
+        x = start
+        while x < end:
+            attr = row[x][1]
+            run_start = x
+            chars = list()
+            while x < end and row[x][1] == attr:
+                if row[x][0] != WIDE_TAIL:
+                    chars.append(row[x][0])
+                x += 1
+            yield run_start, "".join(chars), attr
+
+
+class SpriteCache:
+    """
+    Least recently used sprites by look, so only looks that stopped appearing get rendered again.
+    """
+
+    def __init__(self, capacity: int = SPRITE_CACHE_SIZE):
+        self.capacity = capacity
+        self.sprites: OrderedDict[Hashable, Sprite] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, key: Hashable) -> Sprite | None:
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.sprites.move_to_end(key)
+        return sprite
+
+    def put(self, key: Hashable, sprite: Sprite) -> Sprite:
+        self.sprites[key] = sprite
+        self.sprites.move_to_end(key)
+        if len(self.sprites) > self.capacity:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    def clear(self):
+        self.sprites.clear()
+
+
+def blit(screen, sprite: Sprite, y: int, x: int) -> bool:
+    """
+    Draws a sprite at y, x. Cell grids copy whole spans, other windows get one addstr per run.
+    Returns whether part of the sprite fell outside the screen.
+    """
+    if isinstance(screen, Pad):
+        return screen.blit(sprite, y, x)
+    clipped = False
+    for dy, runs in enumerate(sprite.runs):
+        for dx, text, attr in runs:
+            try:
+                screen.addstr(y + dy, x + dx, text, attr)
+            except curses.error:
+                clipped = True
+    return clipped
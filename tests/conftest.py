@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(autouse=True)
+def repo_dir(monkeypatch):
+    """
+    Assets are found relative to the repository, like the game does when started from it.
+    """
+    monkeypatch.chdir(ROOT)
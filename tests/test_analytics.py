@@ -0,0 +1,67 @@
+import sqlite3
+
+from analytics import AnalyticsStore, connect, report, weakness
+from typing_state import TypingState
+
+
+def type_text(recorder, text: str, typed: str, now: float, step: float = 0.2, slow: str = "") -> float:
+    typing = TypingState(text, now)
+    for char in typed:
+        now += step * (6 if char in slow else 1)
+        recorder.keystroke(typing, char, "farm", now)
+        typing.push(char, now)
+    recorder.text(typing, "farm", now)
+    return now
+
+
+def test_store_writes_events_with_rollups(tmp_path):
+    path = tmp_path / "analytics.db"
+    store = AnalyticsStore(path, interval=60.0)
+    recorder = store.session("ann", 7)
+    type_text(recorder, "abab", "abxb", 100.0)
+    store.close()
+    assert store.error is None and store.written == 6
+    connection = connect(path)
+    try:
+        assert connection.execute("SELECT player, seed FROM sessions").fetchall() == [("ann", 7)]
+        assert connection.execute("SELECT expected, typed FROM keystrokes").fetchall() == [
+            ("a", "a"), ("b", "b"), ("a", "x"), ("b", "b")]
+        assert connection.execute("SELECT key, count, errors, timed FROM key_stats ORDER BY key").fetchall() == [
+            ("a", 2, 1, 1), ("b", 2, 0, 2)]
+        assert connection.execute("SELECT bigram, count, errors FROM bigram_stats ORDER BY bigram").fetchall() == [
+            ("ab", 2, 0), ("ba", 1, 1)]
+        assert connection.execute("SELECT attempts, mistakes FROM text_stats").fetchall() == [(1, 1)]
+    finally:
+        connection.close()
+
+
+def test_stores_sharing_a_file_get_distinct_sessions(tmp_path):
+    path = tmp_path / "analytics.db"
+    first, second = AnalyticsStore(path, interval=60.0), AnalyticsStore(path, interval=60.0)
+    type_text(first.session("ann", 1), "ab", "ab", 0.0)
+    type_text(second.session("bob", 2), "ab", "ab", 0.0)
+    first.close()
+    second.close()
+    connection = sqlite3.connect(path)
+    try:
+        rows = connection.execute("SELECT sessions.player, COUNT(*) FROM keystrokes JOIN sessions "
+                                  "ON sessions.id = keystrokes.session GROUP BY sessions.id").fetchall()
+    finally:
+        connection.close()
+    assert sorted(rows) == [("ann", 2), ("bob", 2)]
+
+
+def test_weakness_ranks_slow_and_mistyped_features(tmp_path):
+    path = tmp_path / "analytics.db"
+    store = AnalyticsStore(path, interval=60.0)
+    recorder = store.session("ann", 0)
+    now = 0.0
+    for _ in range(10):
+        now = type_text(recorder, "asdf", "asdf", now, slow="f")
+        now = type_text(recorder, "asdf", "axdf", now, slow="f")
+    store.close()
+    weights = weakness(path, "ann", min_count=5)
+    assert list(weights)[:2] == ["s", "as"] and "f" in weights and "a" not in weights
+    assert weakness(path, "bob", min_count=5) == dict()
+    lines = report(path, "ann", min_count=5)
+    assert "Slowest keys (at least 5 keystrokes)" in lines and "Hardest building texts" in lines
@@ -0,0 +1,42 @@
+import numpy as np
+
+from battle import DEFENDERS, RAIDERS, fight, muster, night, points, raid
+
+
+def battles(count: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    defenders = rng.integers(0, 200, (count, len(DEFENDERS)))
+    raiders = rng.integers(0, 200, (count, len(RAIDERS)))
+    return defenders, raiders
+
+
+def test_fight_is_deterministic_for_a_seed():
+    defenders, raiders = battles(500, 1)
+    first = fight(defenders, raiders, np.random.default_rng(42))
+    second = fight(defenders, raiders, np.random.default_rng(42))
+    for a, b in zip(first, second):
+        assert np.array_equal(a, b)
+    other = fight(defenders, raiders, np.random.default_rng(43))
+    assert not all(np.array_equal(a, b) for a, b in zip(first, other))
+
+
+def test_fight_results_are_bounded_by_the_armies():
+    defenders, raiders = battles(300, 2)
+    home, left, rounds = fight(defenders, raiders, np.random.default_rng(0))
+    assert home.shape == left.shape == rounds.shape == (300,)
+    assert (home <= defenders.sum(axis=1)).all() and (left <= raiders.sum(axis=1)).all()
+    assert ((home == 0) | (left == 0) | (rounds > 0)).all()
+
+
+def test_night_without_raiders_is_held_without_losses():
+    military = np.array([5, 10])
+    held, left, rounds = night(military, np.zeros((2, len(DEFENDERS))), np.zeros(2, np.int64), 1,
+                               np.random.default_rng(0))
+    assert held.all() and (points(left) == military).all() and (rounds == 0).all()
+
+
+def test_muster_and_raid_split_the_units():
+    counts = muster(np.array([10]), np.array([[1.0, 3.0]]))
+    assert counts.tolist() == [[25, 75]]
+    assert raid(np.array([10]), 1).tolist() == [[100, 0]]
+    assert raid(np.array([10]), 3).sum() == 100
@@ -0,0 +1,36 @@
+import json
+import shutil
+
+import game_manager as gm
+from buildings import Buildings
+from corpus import compile_corpus
+from resources import Resources
+
+
+def asset_records() -> list[dict]:
+    with open(gm.BUILDINGS_FILE_PATH, encoding="utf-8") as f:
+        return json.load(f)["buildings"]
+
+
+def test_loads_every_building_from_a_compiled_corpus(tmp_path):
+    path = tmp_path / "buildings.json"
+    shutil.copy(gm.BUILDINGS_FILE_PATH, path)
+    compile_corpus(path)
+    buildings = Buildings(path, Resources(), 0)
+    assert buildings.corpus is not None
+    records = asset_records()
+    assert len(list(buildings)) == len(records)
+    for record in records:
+        building = buildings.find_building_by_id(record["id"])
+        assert building.name == record["name"] and building.purchase_cost == record["purchase_cost"]
+        assert list(building.texts) == record["texts"]
+        assert building.get_text() in record["texts"]
+    assert set(buildings.records) == {record["id"] for record in records}
+
+
+def test_loads_the_same_buildings_from_json_and_from_records():
+    records = asset_records()
+    from_file = Buildings(gm.BUILDINGS_FILE_PATH, Resources(), 0)
+    from_records = Buildings(gm.BUILDINGS_FILE_PATH, Resources(), 0, records=records)
+    assert [building.id for building in from_file] == [building.id for building in from_records]
+    assert [building.texts for building in from_file] == [record["texts"] for record in records]
@@ -0,0 +1,66 @@
+import random
+
+from catalog import BuildingCatalog
+
+
+class Building:
+    def __init__(self, number: int, name: str, purchase_cost: int):
+        self.id = f"b{number}"
+        self.name = name
+        self.purchase_cost = purchase_cost
+
+    def __str__(self):
+        return self.name
+
+
+def catalog_of(names_and_costs: list[tuple[str, int]]) -> tuple[BuildingCatalog, list[Building]]:
+    buildings = [Building(number, name, cost) for number, (name, cost) in enumerate(names_and_costs)]
+    return BuildingCatalog(buildings), buildings
+
+
+def all_pages(catalog: BuildingCatalog, query: str, page_size: int) -> list:
+    rows, page = list(), 0
+    while True:
+        view = catalog.view(query, 1000, page, page_size)
+        rows.extend(view)
+        page += 1
+        if len(view) < page_size:
+            return rows
+
+
+def test_prefix_matches_first_by_cost_then_typos():
+    catalog, _ = catalog_of([("Farm", 30), ("Fort", 10), ("Forge", 20), ("Form", 5), ("Mill", 1)])
+    rows = catalog.view("for", 1000)
+    assert [(row.building.name, row.distance) for row in rows] == [("Form", 0), ("Fort", 0), ("Forge", 0),
+                                                                    ("Farm", 1)]
+    assert [row.affordable for row in catalog.view("for", 15)] == [True, True, False, False]
+
+
+def test_pages_list_every_match_once_in_rank_order():
+    rng = random.Random(0)
+    names = [f"hut{i}" for i in range(15)] + [f"hat{i}" for i in range(25)] + [f"hit{i}" for i in range(5)]
+    catalog, _ = catalog_of([(name, rng.randrange(20)) for name in names] + [("castle", 1)])
+    for page_size in (1, 4, 10):
+        rows = all_pages(catalog, "hut", page_size)
+        assert len({row.building.id for row in rows}) == len(rows) == 45
+        ranks = [(row.distance, row.building.purchase_cost) for row in rows]
+        assert ranks == sorted(ranks)
+        assert [row.distance for row in rows[:15]] == [0] * 15
+
+
+def test_typos_only_leaves_out_prefix_matches():
+    catalog, _ = catalog_of([("hut", 1), ("hat", 2), ("hub", 3)])
+    assert {building.name for _, building in catalog.fuzzy("hut", 1, 10)} == {"hut", "hat", "hub"}
+    assert [building.name for _, building in catalog.fuzzy("hut", 1, 10, typos_only=True)] == ["hat", "hub"]
+    assert [building.name for _, building in catalog.fuzzy("hut", 1, 1, typos_only=True)] == ["hat"]
+
+
+def test_cursor_and_exact():
+    catalog, buildings = catalog_of([("Hut", 1), ("House", 2)])
+    cursor = catalog.cursor()
+    for char in "Hut":
+        cursor.push(char)
+    assert cursor.match is buildings[0]
+    cursor.pop()
+    assert cursor.match is None
+    assert catalog.exact("house") is buildings[1] and catalog.exact("hou") is None
@@ -0,0 +1,75 @@
+import random
+
+from buildings import BuildingType
+from charset import CharsetIndex, CharsetLibrary, CharsetPool, TextGroups, text_mask
+from layout import compile_layout
+from resources import Resources
+from sampler import TextSampler
+
+LAYOUT = compile_layout(["qwertyuiop", "asdfghjkl", "zxcvbnm"], ["f", "j"])
+TEXTS = ["sad", "dad fad", "had a hat", "jazz", "quiet", "Sass", "all", "fall", "gag", "lad"]
+
+
+def building(texts: list[str], window: int = 3) -> BuildingType:
+    money = Resources().money
+    building_type = BuildingType("test", "Test", "T", 0, money, 1, None, None, texts)
+    building_type.sampler = TextSampler(len(texts), window, random.Random(1))
+    return building_type
+
+
+def mask_of(chars: str) -> int:
+    return sum(1 << LAYOUT.find(char) for char in chars)
+
+
+def test_text_mask_ignores_case_and_keys_off_the_layout():
+    assert text_mask("Sa d!", LAYOUT) == mask_of("sad")
+
+
+def test_buckets_match_brute_force_over_unlocks():
+    rng = random.Random(3)
+    pool = CharsetPool(TextGroups(TEXTS, LAYOUT))
+    order = list(range(len(LAYOUT.chars)))
+    rng.shuffle(order)
+    unlocked = 0
+    for key in order:
+        unlocked |= 1 << key
+        pool.update(unlocked)
+        expected = {index for index, text in enumerate(TEXTS) if not text_mask(text, LAYOUT) & ~unlocked}
+        assert sorted(pool.eligible) == sorted(expected)
+    pool.update(mask_of("sad"))  # Losing keys starts over
+    assert sorted(pool.eligible) == [0, 5]
+
+
+def test_draw_leans_towards_the_closest_texts():
+    pool = CharsetPool(TextGroups(TEXTS, LAYOUT))
+    closest = {index for index, text in enumerate(TEXTS) if text_mask(text, LAYOUT) & ~mask_of("sd") == mask_of("a")}
+    assert {pool.draw(mask_of("sd"), random.Random(seed)) for seed in range(20)} <= closest
+
+
+def test_index_shares_the_sampler_window():
+    texts = ["sad", "dad", "ads", "dads", "sass", "add", "as", "ad", "jazz"]
+    typeable = building(texts, window=3)
+    index = CharsetIndex(CharsetLibrary(LAYOUT, [typeable]), random.Random(5))
+    repeats = 0
+    for _ in range(40):
+        recent = list(typeable.sampler.recent)
+        drawn = texts.index(index.get_text(typeable, mask_of("sad")))
+        assert drawn != 8
+        if drawn in recent:  # Accepted after RETRIES draws, the window is left as it was
+            repeats += 1
+            assert list(typeable.sampler.recent) == recent
+        else:
+            assert typeable.sampler.recent[-1] == drawn
+    assert repeats < 4
+    recent = list(typeable.sampler.recent)
+    assert typeable.sampler.draw() not in recent
+
+
+def test_library_serves_stale_groups_until_rebuilt():
+    typeable = building(["sad"])
+    library = CharsetLibrary(LAYOUT, [typeable])
+    stale = library.get(typeable)
+    typeable.texts = ["jazz"]
+    typeable.sampler = TextSampler(1, 3, random.Random(1))
+    assert library.get(typeable) is stale or library.get(typeable).texts is typeable.texts
+    assert CharsetIndex(library, random.Random(1)).get_text(typeable, mask_of("sad")) in ("sad", "jazz")
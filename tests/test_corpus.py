@@ -0,0 +1,56 @@
+import json
+import os
+
+import pytest
+
+from corpus import Corpus, CorpusError, compile_corpus, compiled_path
+
+BUILDINGS = {"buildings": [
+    {"id": "farm", "name": "Farm", "symbol": "F", "purchase_cost": 10, "output_resource": "food",
+     "output_amount": 2, "input_resource": None, "input_amount": None, "texts": ["hay", "grüne Wiese", ""]},
+    {"id": "mill", "name": "Mill", "symbol": "M", "purchase_cost": 25, "output_resource": "money",
+     "output_amount": 3, "input_resource": "food", "input_amount": 1, "texts": ["flour"]},
+]}
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    json_path = tmp_path / "buildings.json"
+    json_path.write_text(json.dumps(BUILDINGS), encoding="utf-8")
+    corpus = Corpus(compile_corpus(json_path))
+    yield corpus
+    corpus.close()
+
+
+def test_records_match_the_json(corpus):
+    records = [dict(record, texts=list(record["texts"])) for record in corpus.records()]
+    assert records == BUILDINGS["buildings"]
+
+
+def test_text_pool_indexing(corpus):
+    texts = next(corpus.records())["texts"]
+    assert len(texts) == 3
+    assert texts[1] == texts[-2] == "grüne Wiese"
+    assert texts[2] == ""
+    with pytest.raises(IndexError):
+        texts[3]
+    with pytest.raises(IndexError):
+        texts[-4]
+
+
+def test_compiled_path_is_only_used_while_up_to_date(tmp_path):
+    json_path = tmp_path / "buildings.json"
+    json_path.write_text(json.dumps(BUILDINGS), encoding="utf-8")
+    assert compiled_path(json_path) is None
+    path = compile_corpus(json_path)
+    assert compiled_path(json_path) == path
+    stat = path.stat()
+    os.utime(json_path, (stat.st_atime, stat.st_mtime + 1))
+    assert compiled_path(json_path) is None
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "buildings.kkc"
+    path.write_bytes(b"JSON" + bytes(16))
+    with pytest.raises(CorpusError):
+        Corpus(path)
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+import event_loop
+import game_manager as gm
+from event_loop import EventLoop, FrameGovernor, TimerWheel
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(event_loop, "monotonic", lambda: now[0])
+    return now
+
+
+def test_timers_fire_once_when_due(clock):
+    wheel = TimerWheel()
+    fired = list()
+    wheel.call_later("a", 0.5, lambda: fired.append("a"))
+    wheel.call_later("b", 0.2, lambda: fired.append("b"))
+    assert wheel.next_deadline() == pytest.approx(1000.2)
+    assert wheel.advance(1000.1) == 0
+    assert wheel.advance(1000.3) == 1
+    assert wheel.advance(1000.6) == 1
+    assert wheel.advance(1001.0) == 0
+    assert fired == ["b", "a"] and wheel.next_deadline() is None
+
+
+def test_named_timers_are_replaced_and_cancelled(clock):
+    wheel = TimerWheel()
+    fired = list()
+    wheel.call_later("tick", 0.1, lambda: fired.append(1))
+    wheel.call_later("tick", 0.3, lambda: fired.append(2))
+    wheel.call_later("other", 0.1, lambda: fired.append(3))
+    wheel.cancel("other")
+    assert wheel.count == 1
+    assert wheel.advance(1000.2) == 0
+    assert wheel.advance(1000.4) == 1
+    assert fired == [2]
+
+
+def test_timers_beyond_one_turn_of_the_wheel(clock):
+    wheel = TimerWheel(resolution=0.01, slots=8)
+    fired = list()
+    wheel.call_later("late", 0.5, lambda: fired.append(clock[0]))
+    for step in range(1, 50):
+        clock[0] = 1000.0 + step * 0.01
+        wheel.advance(clock[0])
+    assert fired == []
+    assert wheel.next_deadline() == pytest.approx(1000.5)
+    clock[0] = 1000.51
+    assert wheel.advance(clock[0]) == 1
+
+
+def test_governor_sleeps_by_mode_and_deadline(clock):
+    governor = FrameGovernor()
+    assert governor.timeout(gm.MODE_TYPING, None) == pytest.approx(1 / 60)
+    assert governor.timeout(gm.MODE_IDLE, None) == 1.0
+    assert governor.timeout(gm.MODE_IDLE, 1000.25) == pytest.approx(0.25)
+    assert governor.timeout(gm.MODE_IDLE, 999.0) == 0.0
+
+
+def test_loop_wakes_up_for_input():
+    read_fd, write_fd = os.pipe()
+    loop = EventLoop(read_fd, FrameGovernor({gm.MODE_IDLE: 100.0}))
+    try:
+        assert not loop.wait(gm.MODE_IDLE)
+        os.write(write_fd, b"a")
+        assert loop.wait(gm.MODE_IDLE)
+    finally:
+        loop.close()
+        os.close(read_fd)
+        os.close(write_fd)
@@ -0,0 +1,87 @@
+import json
+import threading
+from time import monotonic, sleep
+
+import game_manager as gm
+from hot_reload import BuildingsReloader, PollingWatcher, diff
+
+
+class ManualWatcher:
+    """
+    Watcher reporting a change whenever the test says so.
+    """
+
+    def __init__(self):
+        self.changed = threading.Event()
+
+    def wait(self, timeout: float) -> bool:
+        changed = self.changed.wait(timeout)
+        self.changed.clear()
+        return changed
+
+    def close(self):
+        pass
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = monotonic() + timeout
+    while not condition():
+        assert monotonic() < deadline, "timed out"
+        sleep(0.01)
+
+
+def record(id_: str, name: str, texts: list[str]) -> dict:
+    return {"id": id_, "name": name, "texts": texts}
+
+
+def test_diff_summarizes_and_carries_over_unchanged_parts():
+    old = [record("a", "A", ["x"]), record("b", "B", ["y"]), record("c", "C", ["z"])]
+    new = [record("a", "A", ["x"]), record("b", "Bee", ["y"]), record("d", "D", ["w"])]
+    assert diff(old, new) == "added d; changed b; removed c"
+    assert new[0] is old[0] and new[1]["texts"] is old[1]["texts"]
+    assert diff(new, [dict(item) for item in new]) == "no changes"
+    assert diff(None, new) == "added a, b, d"
+
+
+def test_polling_watcher_sees_a_rewrite(tmp_path):
+    path = tmp_path / "buildings.json"
+    path.write_text("{}", encoding="utf-8")
+    watcher = PollingWatcher(path, interval=0.01)
+    assert not watcher.wait(0.01)
+    path.write_text('{"buildings": []}', encoding="utf-8")
+    assert watcher.wait(0.01)
+    assert not watcher.wait(0.01)
+
+
+def test_reloader_publishes_valid_edits_to_games(tmp_path, monkeypatch):
+    with open(gm.BUILDINGS_FILE_PATH, encoding="utf-8") as f:
+        asset = json.load(f)
+    path = tmp_path / "buildings.json"
+    path.write_text(json.dumps(asset), encoding="utf-8")
+    monkeypatch.setattr(gm, "BUILDINGS_FILE_PATH", str(path))
+    watcher = ManualWatcher()
+    reloader = BuildingsReloader(path, watcher)
+    try:
+        assert reloader.ready.wait(5.0) and reloader.latest[0] == 0
+        game = gm.GameManager(gm.KEYBOARD_LAYOUT, 0)
+        game.load_assets()
+        assert not reloader.apply(game)
+
+        path.write_text("{broken", encoding="utf-8")
+        watcher.changed.set()
+        wait_for(lambda: reloader.error is not None)
+        assert reloader.latest[0] == 0 and not reloader.apply(game)
+
+        farm = game.buildings.find_building_by_id("low_food")
+        changed = next(record for record in asset["buildings"] if record["id"] == "high_food")
+        changed["name"] = "Renamed"
+        path.write_text(json.dumps(asset), encoding="utf-8")
+        watcher.changed.set()
+        wait_for(lambda: reloader.latest[0] == 1)
+        assert reloader.error is None and reloader.latest[2] == "changed high_food"
+        assert reloader.apply(game) and not reloader.apply(game)
+        assert game.buildings.find_building_by_id("high_food").name == "Renamed"
+        assert game.buildings.find_building_by_id("low_food") is farm  # Unchanged buildings are kept
+        assert game.keyboard.get_by_char("f").building is farm
+    finally:
+        reloader.close()
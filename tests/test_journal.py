@@ -0,0 +1,27 @@
+import random
+
+import game_manager as gm
+from batch import AutoPlayer
+from journal import Journal, JournalWriter, replay
+
+
+def test_record_and_replay_round_trip(tmp_path):
+    path = tmp_path / "game.kkj"
+    writer = JournalWriter(path, 7, gm.KEYBOARD_LAYOUT)
+    now = [writer.start_ns / 1e9]
+    game = gm.GameManager(gm.KEYBOARD_LAYOUT, 7, clock=lambda: now[0])
+    game.journal = writer
+    player = AutoPlayer(random.Random(7))
+    rng = random.Random(7)
+    keys = 0
+    while game.mode != gm.MODE_GAME_OVER and keys < 20000:
+        now[0] += rng.uniform(0.03, 0.3)
+        game.key_logic(player(game), now[0])
+        keys += 1
+    writer.finish(game)
+
+    journal = Journal.load(path)
+    assert journal.seed == 7 and journal.layout == gm.KEYBOARD_LAYOUT
+    assert len(journal.keys) == keys
+    assert journal.final is not None and journal.final.mode == gm.MODE_GAME_OVER
+    assert replay(path) == journal.final
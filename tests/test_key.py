@@ -0,0 +1,52 @@
+import game_manager as gm
+from buildings import Buildings
+from key import Keyboard
+
+
+def new_keyboard() -> tuple[Keyboard, Buildings]:
+    game = gm.GameManager(gm.KEYBOARD_LAYOUT, 0)
+    game.load_assets()
+    return Keyboard(gm.KEYBOARD_LAYOUT, gm.CENTER_KEYS), game.buildings
+
+
+def test_starting_keys():
+    keyboard, buildings = new_keyboard()
+    assert keyboard.unlocked_count() == 0
+    keyboard.starting_keys(buildings)
+    assert keyboard.unlocked_count() == len(gm.CENTER_KEYS)
+    assert [key.char for key in keyboard.active_buildings()] == ["f", "j"]
+    assert sorted(key.char for key in keyboard.empty_keys()) == ["g", "h"]
+    assert keyboard.get_by_char("F").building is buildings.find_building_by_id("low_food")
+
+
+def test_key_views_write_through_to_the_bitsets():
+    keyboard, buildings = new_keyboard()
+    key = keyboard.get_by_char("q")
+    key.locked = False
+    key.active = False
+    assert not keyboard.locked >> key.index & 1 and not keyboard.active >> key.index & 1
+    key.building = buildings.find_building_by_id("low_food")
+    assert list(keyboard.select(keyboard.built)) == [key]
+    assert list(keyboard.active_buildings()) == []
+    keyboard.reset_keys()
+    assert key.active and list(keyboard.active_buildings()) == [key]
+    key.building = None
+    assert key.building is None and keyboard.built == 0
+
+
+def test_building_slots_are_shared_per_type():
+    keyboard, buildings = new_keyboard()
+    farm = buildings.find_building_by_id("low_food")
+    for char in "asd":
+        keyboard.get_by_char(char).building = farm
+    assert keyboard.building_types == [farm]
+    assert {keyboard.building_slots[keyboard.layout.find(char)] for char in "asd"} == {1}
+    replaced = buildings.find_building_by_id("low_money")
+    keyboard.get_by_char("a").building = replaced
+    assert keyboard.get_by_char("s").building is farm and keyboard.get_by_char("a").building is replaced
+
+
+def test_select_yields_keys_in_layout_order():
+    keyboard, _ = new_keyboard()
+    mask = sum(1 << keyboard.layout.find(char) for char in "jfq")
+    assert [key.char for key in keyboard.select(mask)] == ["q", "f", "j"]
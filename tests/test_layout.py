@@ -0,0 +1,37 @@
+from math import dist
+
+import game_manager as gm
+from layout import KEY_HEIGHT, compile_layout, unlock_cost_field
+
+
+def test_keys_are_indexed_in_layout_order_skipping_gaps():
+    layout = compile_layout(["ab c", "Dé"], [])
+    assert layout.chars == ("a", "b", "c", "D", "é")
+    assert layout.positions == ((0, 0), (0, 1), (0, 3), (1, 0), (1, 1))
+    assert layout.find("C") == 2 and layout.find("d") == 3 and layout.find("É") == 4
+    assert layout.find(" ") is None and layout.find("z") is None
+
+
+def test_layouts_are_compiled_once():
+    assert compile_layout(gm.KEYBOARD_LAYOUT, gm.CENTER_KEYS) is compile_layout(list(gm.KEYBOARD_LAYOUT),
+                                                                              list(gm.CENTER_KEYS))
+    assert compile_layout(gm.KEYBOARD_LAYOUT, ["f"]) is not compile_layout(gm.KEYBOARD_LAYOUT, gm.CENTER_KEYS)
+
+
+def test_unlock_costs_are_ten_times_the_distance_to_the_closest_center():
+    layout = compile_layout(gm.KEYBOARD_LAYOUT, gm.CENTER_KEYS)
+    centers = list(layout.center_keys.values())
+    assert [layout.unlock_costs[layout.find(char)] for char in gm.CENTER_KEYS] == [0, 0, 0, 0]
+    assert layout.unlock_costs == tuple(int(min(dist(position, center) for center in centers) * 10)
+                                        for position in layout.positions)
+    assert unlock_cost_field(((0, 0), (1, 1)), [], 2, 2) == (0, 0)
+
+
+def test_geometry_is_cached_per_terminal_size():
+    layout = compile_layout(gm.KEYBOARD_LAYOUT, gm.CENTER_KEYS)
+    geometry = layout.geometry(50, 160)
+    assert layout.geometry(50, 160) is geometry
+    assert len(geometry) == len(layout.chars)
+    rows = sorted({y for y, _ in geometry})
+    assert len(rows) == len(gm.KEYBOARD_LAYOUT) and rows[1] - rows[0] > KEY_HEIGHT
+    assert layout.geometry(40, 120) != geometry
@@ -0,0 +1,60 @@
+import random
+from time import monotonic, sleep
+
+from buildings import BuildingType
+from practice import PoolIndex, PracticeSelector, features
+from resources import Resources
+from sampler import TextSampler
+
+TEXTS = ["the cat", "a dog", "zigzag", "quiz", "lazy fox", "hello", "jazz", "ozone"]
+
+
+def building(texts: list[str], window: int = 3) -> BuildingType:
+    building_type = BuildingType("test", "Test", "T", 0, Resources().money, 1, None, None, texts)
+    building_type.sampler = TextSampler(len(texts), window, random.Random(1))
+    return building_type
+
+
+def indexed(selector: PracticeSelector, building_type: BuildingType):
+    deadline = monotonic() + 5.0
+    while selector.pool(building_type) is None:
+        assert monotonic() < deadline, "timed out"
+        sleep(0.01)
+
+
+def test_postings_list_every_text_containing_a_feature():
+    pool = PoolIndex(TEXTS)
+    for feature in set().union(*map(features, TEXTS)):
+        assert list(pool.postings[feature]) == [index for index, text in enumerate(TEXTS) if feature in text]
+    assert "zz" in features("jazz") and "az" in features("jazz")
+
+
+def test_picks_lean_towards_weak_features():
+    typed = building(TEXTS, window=0)
+    selector = PracticeSelector({"z": 1.0}, random.Random(2), share=1.0)
+    indexed(selector, typed)
+    assert all("z" in selector.get_text(typed) for _ in range(50))
+
+
+def test_picks_share_the_sampler_window():
+    typed = building(TEXTS, window=3)
+    selector = PracticeSelector({"z": 1.0, "o": 0.5}, random.Random(3), share=1.0)
+    indexed(selector, typed)
+    for _ in range(40):
+        recent = list(typed.sampler.recent)
+        text = selector.get_text(typed)
+        assert TEXTS.index(text) not in recent
+        assert typed.sampler.recent[-1] == TEXTS.index(text)
+
+
+def test_sampler_serves_until_the_pool_is_indexed():
+    typed = building(TEXTS)
+    assert PracticeSelector(dict(), random.Random(0)).get_text(typed) in TEXTS
+    selector = PracticeSelector({"z": 1.0}, random.Random(0), share=1.0)
+    assert selector.get_text(typed) in TEXTS  # Starts indexing
+    indexed(selector, typed)
+    typed.texts = ["fizz", "buzz"]
+    typed.sampler = TextSampler(2, 1, random.Random(0))
+    assert selector.pool(typed) is None
+    indexed(selector, typed)
+    assert selector.pool(typed).texts is typed.texts
@@ -0,0 +1,84 @@
+import curses
+
+import pytest
+
+from renderer import WIDE_TAIL, Pad, Renderer
+
+
+class RecordingScreen:
+    """
+    Window stand-in keeping every addstr call and counting refreshes.
+    """
+
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self.writes: list[tuple[int, int, str, int]] = list()
+        self.refreshes = 0
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return self.height, self.width
+
+    def erase(self):
+        pass
+
+    def bkgd(self, char, attr=0):
+        pass
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0):
+        self.writes.append((y, x, text, attr))
+
+    def refresh(self):
+        self.refreshes += 1
+
+
+def frame(renderer: Renderer, *texts: tuple[int, int, str, int]) -> list[tuple[int, int, str, int]]:
+    renderer.erase()
+    for y, x, text, attr in texts:
+        renderer.addstr(y, x, text, attr)
+    renderer.screen.writes.clear()
+    renderer.refresh()
+    return renderer.screen.writes
+
+
+def test_only_changed_cells_are_flushed():
+    renderer = Renderer(RecordingScreen(3, 10))
+    assert frame(renderer, (1, 2, "hello", 0)) == [(1, 2, "hello", 0)]
+    assert frame(renderer, (1, 2, "hello", 0)) == []
+    assert renderer.screen.refreshes == 1
+    assert frame(renderer, (1, 2, "help!", 0)) == [(1, 5, "p!", 0)]
+    assert frame(renderer, (1, 2, "help!", 0), (2, 0, "ab", 1)) == [(2, 0, "ab", 1)]
+
+
+def test_runs_split_on_attribute_changes():
+    renderer = Renderer(RecordingScreen(1, 10))
+    assert frame(renderer, (0, 0, "ab", 1), (0, 2, "cd", 2)) == [(0, 0, "ab", 1), (0, 2, "cd", 2)]
+    assert frame(renderer) == [(0, 0, "    ", 0)]
+
+
+def test_wide_characters_are_flushed_whole():
+    renderer = Renderer(RecordingScreen(1, 10))
+    frame(renderer, (0, 0, "a日b", 0))
+    assert renderer.back[0][:4] == [("a", 0), ("日", 0), (WIDE_TAIL, 0), ("b", 0)]
+    assert frame(renderer, (0, 0, "a本b", 0)) == [(0, 1, "本" + WIDE_TAIL, 0)]
+    assert frame(renderer, (0, 0, "a本b", 0), (0, 2, "x", 0)) == [(0, 1, " x", 0)]
+
+
+def test_erase_follows_the_window_size():
+    screen = RecordingScreen(2, 5)
+    renderer = Renderer(screen)
+    frame(renderer, (0, 0, "abc", 0))
+    screen.height, screen.width = 3, 8
+    assert frame(renderer, (2, 0, "abc", 0)) == [(2, 0, "abc", 0)]
+    assert renderer.getmaxyx() == (3, 8)
+
+
+def test_pad_raises_like_curses_outside_the_grid():
+    pad = Pad(2, 4)
+    with pytest.raises(curses.error):
+        pad.addstr(2, 0, "a")
+    with pytest.raises(curses.error):
+        pad.addstr(1, 2, "abc")
+    pad = Pad(2, 4)
+    pad.addstr(0, 2, "abcd")  # Wraps onto the next row
+    assert [cell[0] for row in pad.back for cell in row] == [" ", " ", "a", "b", "c", "d", " ", " "]
@@ -0,0 +1,19 @@
+from day_phases import Phases
+from resources import Resources
+
+
+def test_every_game_has_its_own_resources():
+    first, second = Resources(), Resources()
+    assert first != second and first == first
+    first.money.add(10)
+    assert first.money.amount == second.money.amount + 10
+    assert first.find_resource_by_name("food") is first.food
+
+
+def test_every_game_has_its_own_phases():
+    first, second = Phases(), Phases()
+    assert first != second
+    for _ in range(4):
+        first.next_phase()
+    assert (first.day, second.day) == (2, 1)
+    assert first.current_phase is second.current_phase and not first.is_night()
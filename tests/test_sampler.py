@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from sampler import TextSampler
+
+
+def drawable(sampler: TextSampler) -> list[int]:
+    return sorted(sampler.overrides.get(position, position) for position in range(sampler.boundary))
+
+
+@pytest.mark.parametrize("size, window", [(1, 5), (2, 1), (10, 3), (50, 20), (100, 99)])
+def test_draws_never_repeat_within_window(size, window):
+    sampler = TextSampler(size, window, random.Random(size))
+    drawn = [sampler.draw() for _ in range(2000)]
+    for i in range(len(drawn)):
+        assert drawn[i] not in drawn[max(i - sampler.window, 0):i]
+    assert set(drawn) == set(range(size))
+
+
+def test_window_is_clamped_to_the_pool():
+    assert TextSampler(5, 50, random.Random(0)).window == 4
+    assert TextSampler(0, 50, random.Random(0)).window == 0
+    with pytest.raises(IndexError):
+        TextSampler(0, 50, random.Random(0)).draw()
+
+
+def test_take_shares_the_window_with_draws():
+    rng = random.Random(1)
+    sampler = TextSampler(30, 10, rng)
+    history = list()
+    for _ in range(3000):
+        if rng.random() < 0.5:
+            history.append(sampler.draw())
+        else:
+            index = rng.randrange(30)
+            taken = sampler.take(index)
+            assert taken == (index not in history[-sampler.window:])
+            if taken:
+                history.append(index)
+        assert len(set(history[-sampler.window - 1:])) == len(history[-sampler.window - 1:])
+        assert drawable(sampler) == sorted(set(range(30)) - set(sampler.recent))
+
+
+def test_take_without_window_always_succeeds():
+    sampler = TextSampler(4, 0, random.Random(0))
+    assert sampler.take(2) and sampler.take(2)
@@ -0,0 +1,43 @@
+import curses
+
+import game_manager as gm
+from server import KEY_BACKSPACE, KeyDecoder
+
+
+def feed_all(decoder: KeyDecoder, *reads: str) -> list[int]:
+    keys = list()
+    for data in reads:
+        keys.extend(decoder.feed(data.encode("latin-1")))
+    return keys
+
+
+def test_plain_keys_and_backspace():
+    assert feed_all(KeyDecoder(), "ab\x7f\x08") == [ord("a"), ord("b"), KEY_BACKSPACE, KEY_BACKSPACE]
+
+
+def test_escape_sequences_in_one_read():
+    assert feed_all(KeyDecoder(), "\x1b[A\x1b[6~\x1bOP") == [curses.KEY_UP, gm.KEY_NPAGE, gm.KEY_F1]
+
+
+def test_csi_split_across_reads():
+    assert feed_all(KeyDecoder(), "x\x1b[", "5", "~y") == [ord("x"), gm.KEY_PPAGE, ord("y")]
+
+
+def test_ss3_split_across_reads():
+    assert feed_all(KeyDecoder(), "\x1bO", "P") == [gm.KEY_F1]
+
+
+def test_lone_escape_and_escape_before_a_key():
+    assert feed_all(KeyDecoder(), "\x1b") == [27]
+    assert feed_all(KeyDecoder(), "\x1bq") == [27, ord("q")]
+
+
+def test_size_report_split_across_reads():
+    decoder = KeyDecoder()
+    assert feed_all(decoder, "\x1b[8;4", "0;120t") == []
+    assert decoder.size == (40, 120)
+
+
+def test_unknown_sequences_pass_through():
+    assert feed_all(KeyDecoder(), "\x1b[99~a") == [27] + [ord(char) for char in "[99~a"]
+    assert feed_all(KeyDecoder(), "\x1bO", "zb") == [27] + [ord(char) for char in "Ozb"]
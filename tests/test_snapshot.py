@@ -0,0 +1,61 @@
+import json
+import random
+
+import game_manager as gm
+import snapshot
+from batch import AutoPlayer
+from typing_state import TypingState
+
+
+def played_game(seed: int, keys: int) -> gm.GameManager:
+    game = gm.GameManager(gm.KEYBOARD_LAYOUT, seed)
+    player = AutoPlayer(random.Random(seed))
+    for _ in range(keys):
+        game.key_logic(player(game))
+    return game
+
+
+def test_encode_decode_round_trip():
+    game = played_game(3, 800)
+    state = snapshot.capture(game)
+    restored = snapshot.restore(snapshot.decode(snapshot.encode(state)))
+    assert [resource.amount for resource in restored.resources] == [resource.amount for resource in game.resources]
+    assert restored.mode == game.mode and restored.phases.day == game.phases.day
+    assert [key.building.id if key.building else None for key in restored.keyboard.keys] == \
+           [key.building.id if key.building else None for key in game.keyboard.keys]
+    for building in game.buildings:  # Text pools continue where they were
+        assert restored.buildings.find_building_by_id(building.id).get_text() == building.get_text()
+
+
+def test_restore_after_asset_change(tmp_path, monkeypatch):
+    game = played_game(5, 1200)
+    money_building = game.keyboard.get_by_char("j").building
+    assert money_building.id == "low_money"
+    state = json.loads(json.dumps(snapshot.capture(game)))
+
+    with open(gm.BUILDINGS_FILE_PATH, encoding="utf-8") as f:
+        asset = json.load(f)
+    food = next(record for record in asset["buildings"] if record["id"] == "low_food")
+    food["texts"] = food["texts"][:3]
+    asset["buildings"] = [record for record in asset["buildings"] if record["id"] != "low_money"]
+    path = tmp_path / "buildings.json"
+    path.write_text(json.dumps(asset), encoding="utf-8")
+    monkeypatch.setattr(gm, "BUILDINGS_FILE_PATH", str(path))
+
+    restored = snapshot.restore(state)
+    assert restored.keyboard.get_by_char("j").building is None
+    assert restored.resources.money.amount == state["resources"][0] + money_building.purchase_cost
+    assert any("'low_money' was removed" in message for message, _ in restored.message)
+    texts = restored.buildings.find_building_by_id("low_food")
+    assert {texts.get_text() for _ in range(30)} <= set(food["texts"])  # A fresh sampler over the shorter list
+
+
+def test_restore_typing_rebases_times():
+    typing = TypingState("hello", 100.0)
+    for offset, char in enumerate("hel"):
+        typing.push(char, 101.0 + offset)
+    restored = snapshot.restore_typing(snapshot.capture_typing(typing, 104.0), 1004.0)
+    assert restored.start_time == 1000.0
+    assert list(restored.keystroke_times) == [1001.0, 1002.0, 1003.0]
+    assert restored.typed == list("hel") and restored.correct_prefix == 3
+    assert restored.wpm(1004.0) == typing.wpm(104.0)
@@ -0,0 +1,42 @@
+from typing_state import ACCURACY_WINDOW, TypingState
+
+
+def test_push_and_pop_track_the_correct_prefix_and_mismatches():
+    typing = TypingState("hello", 0.0)
+    assert typing.push("h", 1.0)
+    assert not typing.push("x", 2.0)
+    assert typing.correct_prefix == 1 and typing.mismatch_count == 1 and typing.mistakes == 1
+    assert typing.push("l", 3.0)
+    assert typing.correct_prefix == 1  # Still behind the mismatch
+    typing.pop()
+    typing.pop()
+    assert typing.typed == ["h"] and typing.mismatch_count == 0 and typing.correct_prefix == 1
+    assert typing.mistakes == 1  # Backspace doesn't undo a mistake
+    for char in "ello":
+        typing.push(char, 4.0)
+    assert typing.complete and typing.full and typing.correct_prefix == 5
+
+
+def test_push_past_the_end_is_ignored():
+    typing = TypingState("ab", 0.0)
+    typing.push("a", 1.0)
+    typing.push("b", 2.0)
+    assert not typing.push("c", 3.0)
+    assert typing.typed == ["a", "b"]
+
+
+def test_pop_on_empty_input_does_nothing():
+    typing = TypingState("ab", 0.0)
+    typing.pop()
+    assert typing.typed == [] and typing.correct_prefix == 0
+
+
+def test_rolling_wpm_and_accuracy():
+    typing = TypingState("a" * 200, 0.0)
+    assert typing.rolling_wpm() == 0.0 and typing.rolling_accuracy() == 1.0
+    for i in range(100):
+        typing.push("a" if i % 4 else "b", i * 0.2)  # Five keys a second, every fourth one wrong
+    assert abs(typing.rolling_wpm() - 60.0) < 1e-6
+    wrong = sum(1 for i in range(100 - ACCURACY_WINDOW, 100) if not i % 4)
+    assert typing.rolling_accuracy() == (ACCURACY_WINDOW - wrong) / ACCURACY_WINDOW
+    assert abs(typing.wpm(20.0) - 60.0) < 1e-6
@@ -0,0 +1,97 @@
+from collections import deque
+
+# Number of recent keystrokes the rolling statistics are computed over
+WPM_WINDOW = 20
+ACCURACY_WINDOW = 50
+
+
+class TypingState:
+    """
+    Progress of typing a single text. Every keystroke and backspace is O(1),
+    nothing here rescans the text or the typed input.
+    """
+
+    def __init__(self, text: str, start_time: float):
+        self.text: str = text
+        self.start_time: float = start_time
+        self.typed: list[str] = list()
+        self.mismatches: bytearray = bytearray(len(text))  # 1 where the typed char doesn't match the text
+        self.mismatch_count: int = 0
+        self.correct_prefix: int = 0  # Length of the correctly typed start of the text
+        self.mistakes: int = 0  # Wrong keystrokes, backspace doesn't undo them
+
+        # Rolling windows
+        self.keystroke_times: deque[float] = deque(maxlen=WPM_WINDOW)
+        self.keystroke_hits: deque[bool] = deque(maxlen=ACCURACY_WINDOW)
+        self.window_hits: int = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self.typed) >= len(self.text)
+
+    @property
+    def complete(self) -> bool:
+        """
+        True once the whole text has been typed without any uncorrected mismatch.
+        """
+        return len(self.typed) == len(self.text) and not self.mismatch_count
+
+    def push(self, char: str, now: float) -> bool:
+        """
+        Types a character at the cursor and returns whether it was correct.
+        """
+        position = len(self.typed)
+        if position >= len(self.text):
+            return False
+        correct = char == self.text[position]
+        self.typed.append(char)
+        if correct:
+            if not self.mismatch_count:
+                self.correct_prefix = position + 1
+        else:
+            self.mismatches[position] = 1
+            self.mismatch_count += 1
+            self.mistakes += 1
+
+        self.keystroke_times.append(now)
+        if len(self.keystroke_hits) == self.keystroke_hits.maxlen:
+            self.window_hits -= self.keystroke_hits[0]
+        self.keystroke_hits.append(correct)
+        self.window_hits += correct
+        return correct
+
+    def pop(self):
+        """
+        Removes the last typed character (backspace).
+        """
+        if not self.typed:
+            return
+        self.typed.pop()
+        position = len(self.typed)
+        if self.mismatches[position]:
+            self.mismatches[position] = 0
+            self.mismatch_count -= 1
+        if self.correct_prefix > position:
+            self.correct_prefix = position
+        elif not self.mismatch_count:
+            self.correct_prefix = position
+
+    def wpm(self, now: float) -> float:
+        """
+        Words per minute over the whole text so far (a word being 5 characters).
+        """
+        return (len(self.typed) * 12) / max(now - self.start_time, 0.001)
+
+    def rolling_wpm(self) -> float:
+        """
+        Words per minute over the last WPM_WINDOW keystrokes.
+        """
+        if len(self.keystroke_times) < 2:
+            return 0.0
+        return ((len(self.keystroke_times) - 1) * 12) / max(self.keystroke_times[-1] - self.keystroke_times[0], 0.001)
+
+    def rolling_accuracy(self) -> float:
+        """
+        Ratio of correct keystrokes over the last ACCURACY_WINDOW keystrokes.
+        """
+        return self.window_hits / len(self.keystroke_hits) if self.keystroke_hits else 1.0